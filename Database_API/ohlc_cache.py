@@ -0,0 +1,151 @@
+"Script containing the memory-mapped NumPy cache of OHLC price data used by the StockData object"
+
+# Importing the data extraction and management packages:
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+class OHLCArrayCache(object):
+    """A cache that materializes the OHLC dataframe of each ticker on local
+    disk as NumPy arrays that are opened with memory mapping.
+
+    Every cached dataframe is stored as three files:
+
+    - dates.npy: The datetime64[ns] index.
+    - values.npy: The price columns as one float64 array stored in column major
+        (Fortran) order, so that every column is contiguous on disk.
+    - meta.json: The column names and the version of the source data.
+
+    Opening a cached dataframe only maps the files into memory, nothing is
+    parsed or copied, and processes reading the same ticker share the same
+    pages through the OS page cache. The mapped arrays are read-only.
+
+    Each version of a ticker's data is written to its own directory, named after
+    a hash of the version, which is moved into place with a single rename once
+    it is complete. A reader therefore never sees a partially written entry and
+    data is only rebuilt when the version of the source changes.
+
+    Example:
+        cache = OHLCArrayCache("ohlc_cache")
+        ohlc_df = cache.load("AAPL", version)
+        if ohlc_df is None:
+            ohlc_df = cache.store("AAPL", version, read_from_database("AAPL"))
+
+    Arguments:
+        cache_dir (str): The directory the cache is stored in.
+
+    """
+    def __init__(self, cache_dir):
+
+        # Declaring instance params:
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _ticker_dir(self, ticker):
+        "Internal method returning the directory holding the versions of a ticker."
+        return os.path.join(self.cache_dir, str(ticker))
+
+    def _version_dir(self, ticker, version):
+        "Internal method returning the directory of a specific version of a ticker."
+        digest = hashlib.sha1(json.dumps(version, default=str).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._ticker_dir(ticker), digest)
+
+    def load(self, ticker, version):
+        """Method opens the cached dataframe of a ticker if it was built from
+        the given version of the source data.
+
+        Arguments:
+            ticker (str): The ticker symbol.
+
+            version (object): A json serializable token identifying the state of
+                the source data (eg: a row count and checksum).
+
+        Returns:
+            pd.DataFrame: The dataframe backed by the memory-mapped arrays.
+
+            None: None type if there is no cache entry for the version.
+
+        """
+        version_dir = self._version_dir(ticker, version)
+        try:
+            with open(os.path.join(version_dir, "meta.json"), "rt") as meta_file:
+                meta = json.load(meta_file)
+
+            dates = np.load(os.path.join(version_dir, "dates.npy"), mmap_mode="r")
+            values = np.load(os.path.join(version_dir, "values.npy"), mmap_mode="r")
+
+        except (OSError, ValueError):
+            return None
+
+        index = pd.DatetimeIndex(dates, name="Date")
+
+        # A 2D column major array becomes a single dataframe block without a copy:
+        return pd.DataFrame(values, index=index, columns=meta["columns"], copy=False)
+
+    def store(self, ticker, version, ohlc_df):
+        """Method writes a ticker's OHLC dataframe to the cache and returns it
+        re-opened from the memory-mapped files.
+
+        Older versions of the ticker are removed once the new version is in
+        place. Processes that still have them mapped keep reading them safely.
+
+        Arguments:
+            ticker (str): The ticker symbol.
+
+            version (object): The json serializable version of the source data.
+
+            ohlc_df (pd.DataFrame): The dataframe indexed by Date. Every column is
+                stored as float64.
+
+        Returns:
+            pd.DataFrame: The cached dataframe.
+
+        """
+        ticker_dir = self._ticker_dir(ticker)
+        version_dir = self._version_dir(ticker, version)
+        os.makedirs(ticker_dir, exist_ok=True)
+
+        if not os.path.isdir(version_dir):
+            tmp_dir = tempfile.mkdtemp(dir=ticker_dir, prefix=".tmp")
+            try:
+                np.save(os.path.join(tmp_dir, "dates.npy"),
+                    pd.DatetimeIndex(ohlc_df.index).values.astype("datetime64[ns]"))
+                np.save(os.path.join(tmp_dir, "values.npy"),
+                    np.asfortranarray(ohlc_df.to_numpy(dtype="float64")))
+
+                with open(os.path.join(tmp_dir, "meta.json"), "wt") as meta_file:
+                    json.dump({"columns": [str(col) for col in ohlc_df.columns], "version": version},
+                        meta_file, default=str)
+
+                os.rename(tmp_dir, version_dir)
+
+            except OSError:
+                # Another process moved the same version into place first:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                if not os.path.isdir(version_dir):
+                    raise
+
+        # Removing the versions that have been superseded:
+        for entry in os.listdir(ticker_dir):
+            entry_path = os.path.join(ticker_dir, entry)
+            if entry_path != version_dir and not entry.startswith(".tmp"):
+                shutil.rmtree(entry_path, ignore_errors=True)
+
+        return self.load(ticker, version)
+
+    def invalidate(self, ticker=None):
+        """Method removes the cached data of a ticker, or of every ticker.
+
+        Arguments:
+            ticker (str): The ticker symbol. If None the whole cache is cleared.
+
+        """
+        if ticker is None:
+            for entry in os.listdir(self.cache_dir):
+                shutil.rmtree(os.path.join(self.cache_dir, entry), ignore_errors=True)
+        else:
+            shutil.rmtree(self._ticker_dir(ticker), ignore_errors=True)
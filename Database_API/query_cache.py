@@ -0,0 +1,177 @@
+"Script containing the in-process, memory-bounded LRU cache of query results used by the StockData object"
+
+# Importing the data extraction and management packages:
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+def result_size(result):
+    """Method estimates the number of bytes of memory held by a query result.
+
+    Arguments:
+        result (object): A dataframe, series, NumPy array or a tuple/list of them.
+
+    Returns:
+        int: The estimated size in bytes.
+
+    """
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True, deep=True).sum())
+    elif isinstance(result, (pd.Series, pd.Index)):
+        return int(result.memory_usage(deep=True))
+    elif isinstance(result, np.ndarray):
+        return int(result.nbytes)
+    elif isinstance(result, (tuple, list)):
+        return sum(result_size(element) for element in result)
+    else:
+        return 64
+
+def copy_result(result):
+    """Method copies a cached query result so that callers modifying the
+    returned dataframe do not modify the cached one."""
+    if isinstance(result, (pd.DataFrame, pd.Series, pd.Index, np.ndarray)):
+        return result.copy()
+    elif isinstance(result, tuple):
+        return tuple(copy_result(element) for element in result)
+    elif isinstance(result, list):
+        return [copy_result(element) for element in result]
+    else:
+        return result
+
+
+class QueryCache(object):
+    """A least recently used cache of query results bounded by the memory
+    the results use rather than by their number.
+
+    Every entry is tagged with the database tables it was read from and the
+    modification counter of each table at the time it was read. When the
+    database changes, `invalidate_tables()` drops only the entries read from the
+    tables that changed.
+
+    Results are copied on the way out, so a hit costs a memory copy instead of
+    a query and the dataframe parsing that follows it.
+
+    Example:
+        cache = QueryCache(max_bytes=256 * 1024**2)
+        result = cache.get(key)
+        if result is None:
+            result = run_query()
+            cache.put(key, result, tables={"AAPL_ohlc": 3})
+
+    Arguments:
+        max_bytes (int): The maximum memory used by the cached results. Results
+            larger than this are never cached. Defaults to 256MB.
+
+    """
+    def __init__(self, max_bytes=256 * 1024**2):
+
+        # Declaring instance params:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Method returns a copy of a cached result, marking it as recently used.
+
+        Arguments:
+            key (tuple): The hashable key of the query.
+
+        Returns:
+            object: The copied result or None if the key is not cached.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry[0]
+
+        return copy_result(result)
+
+    def put(self, key, result, tables=None):
+        """Method caches a query result, evicting the least recently used
+        results until it fits in `max_bytes`.
+
+        Arguments:
+            key (tuple): The hashable key of the query.
+
+            result (object): The query result.
+
+            tables (dict): A dict mapping each table the result was read from to
+                its modification counter when it was read.
+
+        """
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            self._entries[key] = (copy_result(result), size, dict(tables or {}))
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_tables(self, table_versions):
+        """Method drops the results read from tables whose modification
+        counter differs from the counter the result was read at.
+
+        Arguments:
+            table_versions (dict): A dict mapping table names to their current
+                modification counter. Tables missing from the dict count as 0.
+
+        """
+        with self._lock:
+            stale_keys = [key for key, (_, _, tables) in self._entries.items()
+                if any(table_versions.get(table, 0) != version for table, version in tables.items())]
+
+            for key in stale_keys:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+            self.invalidations += len(stale_keys)
+
+    def clear(self):
+        "Method drops every cached result."
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Method returns the counters of the cache, eg: for tuning `max_bytes`.
+
+        Returns:
+            dict: The hits, misses, evictions (to make room), invalidations (after
+                a database change), number of entries and bytes used.
+
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -1,8 +1,25 @@
 # Importing the data extraction and management packages:
+import hashlib
+import os
 import sqlite3
+import numpy as np
 import pandas as pd
 import backtrader as bt
 
+# Importing the memory-mapped OHLC cache and the query result cache:
+from Database_API.ohlc_cache import OHLCArrayCache
+from Database_API.query_cache import QueryCache
+
+# The table of per-table modification counters maintained by the pipelines' SQLiteSink:
+TABLE_VERSIONS_TABLE = "_table_versions"
+
+# The long-format table written by the OHLCPipeline with storage_layout='long':
+OHLC_TABLE = "ohlc"
+OHLC_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+# The number of tickers read by each batched panel query, kept below sqlite's
+# default limits of 999 bound parameters and 500 UNION ALL terms per statement:
+PANEL_BATCH_SIZE = 250
 
 class StockData(object):
     """An Object that contains all of the methods and internal
@@ -17,26 +34,286 @@ class StockData(object):
     query API, they are the real heroes here. The object exists to simplify data extraction
     and ingestion to other applications such as a backtrader backtesting engine.
 
+    OHLC data is read from either storage layout written by the OHLCPipeline: one
+    `{TICKER}_ohlc` table per ticker or the single long-format `ohlc` table keyed on
+    (ticker, Date). When both exist (eg: part way through a migration) the `ohlc`
+    table is used for the tickers it contains.
+
+    The columnar Parquet dataset optionally written by the OHLCPipeline is read
+    with `get_ohlc_parquet()`, which is much faster for loading many tickers.
+
+    If an `array_cache_dir` is given, `get_ohlc_df()` materializes each ticker
+    as memory-mapped NumPy arrays in that directory (see `OHLCArrayCache`). The
+    `_table_versions` counter of the ticker's table identifies the state of its
+    data (see `get_ohlc_version()`) and the arrays are only rebuilt when it
+    changes, otherwise the dataframe is opened from the cache without parsing
+    anything. Cached dataframes are read-only and store every column as float64.
+
+    If `query_cache_bytes` is set, the results of `get_ohlc_df()` (when no array
+    cache is used) and `get_ohlc_panel()` are kept in an in-process LRU cache
+    bounded by the memory they use (see `QueryCache`). Before every cached query
+    `PRAGMA data_version` is checked, which changes whenever another connection
+    commits to the database. When it has changed, the `_table_versions` counters
+    written by the pipelines are read and only the results read from tables
+    whose counter moved are dropped. Databases without counters (eg: written by
+    an older version of the pipelines) drop every result on any change. Hit, miss and eviction counts are available through
+    `query_cache_stats()`.
+
     Arguments:
         dbpath (str): The path to the sqlite database that the object connects to.
 
+        parquet_dir (str): The root directory of the Parquet OHLC dataset written by
+            the OHLCPipeline. Defaults to None.
+
+        array_cache_dir (str): The directory of the memory-mapped OHLC cache.
+            Defaults to None (no caching).
+
+        query_cache_bytes (int): The maximum memory used by the query result cache.
+            Defaults to None (no caching).
+
     """
-    def __init__(self, dbpath):
+    def __init__(self, dbpath, parquet_dir=None, array_cache_dir=None, query_cache_bytes=None):
         # Declaring instance params:
         self.dbpath = dbpath 
+        self.parquet_dir = parquet_dir
         self.con = sqlite3.connect(self.dbpath)
+        self._has_long_table = None
+
+        # Every database gets its own directory within the cache directory:
+        self.array_cache = None
+        if array_cache_dir is not None:
+            db_key = hashlib.sha1(os.path.abspath(self.dbpath).encode("utf-8")).hexdigest()[:12]
+            self.array_cache = OHLCArrayCache(os.path.join(array_cache_dir, db_key))
+
+        self.query_cache = QueryCache(query_cache_bytes) if query_cache_bytes is not None else None
+        self._data_version = None
+        self._table_versions = {}
+        self._ohlc_versions = {}
+
+    def _refresh_table_versions(self):
+        """Internal method checking if the database has changed since the last
+        cached query and invalidating the query results and the OHLC versions
+        that are out of date.
+
+        `PRAGMA data_version` is a cheap check that only changes when another
+        connection commits, so the `_table_versions` counters are only read
+        after a change.
+        """
+        data_version = self.con.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+
+        self._ohlc_versions = {}
+        try:
+            self._table_versions = dict(self.con.execute(f"SELECT name, version FROM {TABLE_VERSIONS_TABLE}"))
+            if self._data_version is not None and self.query_cache is not None:
+                self.query_cache.invalidate_tables(self._table_versions)
+
+        except sqlite3.OperationalError:
+            # Without modification counters any change invalidates every result:
+            self._table_versions = {}
+            if self._data_version is not None and self.query_cache is not None:
+                self.query_cache.clear()
+
+        self._data_version = data_version
+
+    def _cached_query(self, key, tables, query):
+        """Internal method returning the cached result of a query or running
+        the query and caching its result.
+
+        Arguments:
+            key (tuple): The hashable key of the query and its arguments.
+
+            tables (list): The tables the query reads from.
+
+            query (callable): The function running the query.
+
+        """
+        if self.query_cache is None:
+            return query()
+
+        self._refresh_table_versions()
+        result = self.query_cache.get(key)
+        if result is None:
+            result = query()
+            if result is not None:
+                self.query_cache.put(key, result, {table: self._table_versions.get(table, 0) for table in tables})
+
+        return result
+
+    def query_cache_stats(self):
+        """Method returns the counters of the query result cache.
+
+        Returns:
+            dict: The hits, misses, evictions, invalidations, entries and bytes
+                of the cache, or None if the object has no query cache.
+
+        """
+        return self.query_cache.stats() if self.query_cache is not None else None
+
+    def has_long_table(self):
+        """Method checks if the database contains the long-format `ohlc` table.
+
+        The result is cached once the table is found, as the table is never
+        dropped once created.
+
+        Returns:
+            bool: True if the `ohlc` table exists.
+
+        """
+        if not self._has_long_table:
+            self._has_long_table = self.con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (OHLC_TABLE,)).fetchone() is not None
+
+        return self._has_long_table
+
+    def _date_filter(self, start, end):
+        """Internal method building the parameterized Date range condition of a
+        query. Bounds are formatted the way the pipelines store dates
+        ('YYYY-MM-DD HH:MM:SS') so that the comparison can use the Date index.
+
+        Returns:
+            tuple: The sql condition (or None) and the list of its parameters.
+
+        """
+        start = pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S") if start is not None else None
+        end = pd.Timestamp(end).strftime("%Y-%m-%d %H:%M:%S") if end is not None else None
+
+        if start is not None and end is not None:
+            return "Date BETWEEN ? AND ?", [start, end]
+        elif start is not None:
+            return "Date >= ?", [start]
+        elif end is not None:
+            return "Date <= ?", [end]
+        else:
+            return None, []
+
+    def _column_sql(self, columns):
+        "Internal method building the quoted column list of a query, with the Date column first."
+        return ", ".join('"{}"'.format(str(col).replace('"', '""')) for col in ["Date"] + list(columns))
+
+    def _get_long_ohlc_df(self, ticker, start=None, end=None, columns=None):
+        """Internal method querying a ticker's bars from the long-format `ohlc`
+        table, returning None if the table holds no bars for the ticker."""
+        date_condition, date_params = self._date_filter(start, end)
+        where_sql = "ticker = ?" + (f" AND {date_condition}" if date_condition else "")
+
+        ohlc_df = pd.read_sql_query(
+            f"SELECT {self._column_sql(columns or OHLC_COLUMNS)} FROM {OHLC_TABLE} WHERE {where_sql} ORDER BY Date",
+            self.con,
+            params=[ticker] + date_params,
+            parse_dates=["Date"],
+            index_col="Date")
+
+        if ohlc_df.empty:
+            # Telling an empty date range apart from a ticker that is not in the table:
+            if date_condition is None or self.con.execute(
+                f"SELECT 1 FROM {OHLC_TABLE} WHERE ticker = ? LIMIT 1", (ticker,)).fetchone() is None:
+                return None
+
+        # Price columns the ticker was stored without (eg: 'Adj Close') are left out, as in its own table:
+        if columns is None:
+            return ohlc_df.dropna(axis="columns", how="all")
+
+        return ohlc_df
+
+    def _read_ohlc_df(self, ticker, start=None, end=None, columns=None):
+        "Internal method querying a ticker's OHLC dataframe from whichever layout holds it."
+        # Reading the ticker from the long-format table when it is stored there:
+        if self.has_long_table():
+            ohlc_df = self._get_long_ohlc_df(ticker, start, end, columns)
+            if ohlc_df is not None:
+                return ohlc_df
+
+        # Only the requested columns and the rows in the date range are read, using the Date index:
+        column_sql = "*" if columns is None else self._column_sql(columns)
+        date_condition, date_params = self._date_filter(start, end)
+        where_sql = f" WHERE {date_condition}" if date_condition else ""
+
+        # Querying Database via Pandas for Open High Low Close Dataframe, in date order:
+        return pd.read_sql_query(
+            f'SELECT {column_sql} FROM "{ticker}_ohlc"{where_sql} ORDER BY Date',
+            self.con,
+            params=date_params,
+            parse_dates= ["Date"],
+            index_col="Date")
+
+    def get_ohlc_version(self, ticker):
+        """Method identifies the current state of a ticker's OHLC data.
+
+        The version is the `_table_versions` counter of the table holding the
+        ticker, which the pipelines' SQLiteSink increments with every write. It is
+        only looked up again once `PRAGMA data_version` shows that another
+        connection has committed, so checking an unchanged ticker costs a single
+        pragma. Tables without a counter (eg: written by an older version of the
+        pipelines) fall back to an aggregate query: the row count, first and last
+        date and the total of the price columns.
+
+        Arguments:
+            ticker (str): The ticker symbol.
+
+        Returns:
+            list: The json serializable version of the ticker's data.
+
+        """
+        self._refresh_table_versions()
+
+        version = self._ohlc_versions.get(ticker)
+        if version is None:
+            version = self._ohlc_versions[ticker] = self._read_ohlc_version(ticker)
+
+        return version
+
+    def _read_ohlc_version(self, ticker):
+        "Internal method reading the version of a ticker's OHLC data, see `get_ohlc_version()`."
+        if self.has_long_table() and self.con.execute(
+            f"SELECT 1 FROM {OHLC_TABLE} WHERE ticker = ? LIMIT 1", (ticker,)).fetchone() is not None:
+
+            if OHLC_TABLE in self._table_versions:
+                return ["long", "counter", self._table_versions[OHLC_TABLE]]
+
+            column_sql = " + ".join('TOTAL("{}")'.format(col) for col in OHLC_COLUMNS)
+            version = self.con.execute(
+                f"SELECT COUNT(*), MIN(Date), MAX(Date), {column_sql} FROM {OHLC_TABLE} WHERE ticker = ?",
+                (ticker,)).fetchone()
+
+            return ["long"] + list(version)
+
+        table = f"{ticker}_ohlc"
+        if table in self._table_versions:
+            return ["per_ticker", "counter", self._table_versions[table]]
+
+        columns = [row[1] for row in self.con.execute(f'PRAGMA table_info("{table}")') if row[1] != "Date"]
+        column_sql = " + ".join('TOTAL("{}")'.format(col) for col in columns) or "0"
+        version = self.con.execute(f'SELECT COUNT(*), MIN(Date), MAX(Date), {column_sql} FROM "{table}"').fetchone()
+
+        return ["per_ticker"] + list(version)
     
-    def get_ohlc_df(self, ticker):
+    def get_ohlc_df(self, ticker, start=None, end=None, columns=None):
         """Method makes use of the pandas.read_sql_query method to
         query the Open, High, Low, Close dataframe from the database 
-        table "{TICKER}_ohlc".
+        table "{TICKER}_ohlc", or from the rows of the ticker in the
+        long-format "ohlc" table if the database has one.
 
-        The method is a basic wrapper for the pandas method.
+        The method is a basic wrapper for the pandas method. The date range
+        and columns are pushed down into the query as a parameterized
+        `WHERE Date BETWEEN ? AND ?` filter (answered from the Date index the
+        pipelines create) and an explicit column list. When the object has an
+        array cache the dataframe is opened from the memory-mapped cache instead,
+        unless the ticker's data has changed since it was cached, and sliced to
+        the date range and columns without copying the rows.
 
         Arguments:
             ticker (str): The ticker string that will be used to point to 
                 the correct database table.
 
+            start (str|datetime): The first date included. Defaults to None (no bound).
+
+            end (str|datetime): The last date included. Defaults to None (no bound).
+
+            columns (list): The price columns returned, eg: ['Close']. Defaults to
+                None (all of the columns).
+
         Returns:
             pd.Dataframe: The formatted dataframe containing the OHLC pricing
                 data for the specific ticker.
@@ -45,27 +322,41 @@ class StockData(object):
 
         """
         try:
-            # Querying Database via Pandas for Open High Low Close Dataframe:
-            ohlc_df = pd.read_sql_query(
-                f"SELECT * FROM {ticker}_ohlc",
-                self.con,
-                parse_dates= ["Date"],
-                index_col="Date")
-                
+            if self.array_cache is None:
+                key = ("ohlc_df", ticker, str(start), str(end), tuple(columns) if columns is not None else None)
+                return self._cached_query(key, [OHLC_TABLE, f"{ticker}_ohlc"],
+                    lambda: self._read_ohlc_df(ticker, start, end, columns))
+
+            # Opening the memory-mapped arrays if the table has not changed since they were built:
+            version = self.get_ohlc_version(ticker)
+            ohlc_df = self.array_cache.load(ticker, version)
+            if ohlc_df is None:
+                ohlc_df = self.array_cache.store(ticker, version, self._read_ohlc_df(ticker))
+
+            # Slicing the sorted index by position keeps the result a view of the mapped arrays:
+            first = ohlc_df.index.searchsorted(pd.Timestamp(start), side="left") if start is not None else 0
+            last = ohlc_df.index.searchsorted(pd.Timestamp(end), side="right") if end is not None else len(ohlc_df)
+            ohlc_df = ohlc_df.iloc[first:last]
+
+            if columns is not None:
+                ohlc_df = ohlc_df[list(columns)]
+
             return ohlc_df
 
         except:
             return None
         
-    def get_ohlc_datafeed(self, ticker):
+    def get_ohlc_datafeed(self, ticker, start=None, end=None, columns=None):
         """Method extracts a formatted OHLC price dataframe from the database
         and wraps it into a backtrader PandasData data feed.
 
         This method is used to provide an easy way to feed price data from the
-        database into a backtrader backtest Cerebro engine.
+        database into a backtrader backtest Cerebro engine. The start, end and
+        columns arguments are passed to `get_ohlc_df()` so that only the window
+        being simulated is loaded.
         """
         # Querying Database for Open High Low Close Dataframe:
-        ohlc_df = self.get_ohlc_df(ticker)
+        ohlc_df = self.get_ohlc_df(ticker, start=start, end=end, columns=columns)
 
         if ohlc_df is None:
             return ohlc_df
@@ -73,3 +364,226 @@ class StockData(object):
         else:
             # Passing the formatted dataframe into a backtrader datafeed:
             return bt.feeds.PandasData(dataname=ohlc_df)
+
+    def _per_ticker_columns(self):
+        """Internal method reading the columns of every `{TICKER}_ohlc` table
+        with a single query.
+
+        Returns:
+            dict: A dict mapping each ticker symbol to the set of its table's columns.
+
+        """
+        rows = self.con.execute(
+            "SELECT m.name, p.name FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+            "WHERE m.type = 'table' AND m.name LIKE '%\\_ohlc' ESCAPE '\\'").fetchall()
+
+        table_columns = {}
+        for table, column in rows:
+            table_columns.setdefault(table[:-len("_ohlc")], set()).add(column)
+
+        return table_columns
+
+    def _read_panel_rows(self, tickers, fields, start, end):
+        """Internal method reading the (ticker, Date, *fields) rows of many
+        tickers with batched queries: `ticker IN (...)` queries against the
+        long-format table and `UNION ALL` queries over the per-ticker tables.
+
+        Returns:
+            list: The list of row tuples.
+
+        """
+        date_condition, date_params = self._date_filter(start, end)
+        field_sql = ", ".join('"{}"'.format(field.replace('"', '""')) for field in fields)
+        rows = []
+        remaining = list(tickers)
+
+        # Reading the tickers stored in the long-format table:
+        if self.has_long_table():
+            found = set()
+            for position in range(0, len(remaining), PANEL_BATCH_SIZE):
+                batch = remaining[position:position + PANEL_BATCH_SIZE]
+                where_sql = "ticker IN ({})".format(", ".join("?" for _ in batch))
+                if date_condition:
+                    where_sql += f" AND {date_condition}"
+
+                batch_rows = self.con.execute(
+                    f"SELECT ticker, Date, {field_sql} FROM {OHLC_TABLE} WHERE {where_sql}",
+                    batch + date_params).fetchall()
+
+                rows.extend(batch_rows)
+                found.update(row[0] for row in batch_rows)
+
+            remaining = [ticker for ticker in remaining if ticker not in found]
+
+        # Reading the remaining tickers from their own tables, fields a table lacks are NULL:
+        table_columns = self._per_ticker_columns() if remaining else {}
+        remaining = [ticker for ticker in remaining if ticker in table_columns]
+        where_sql = f" WHERE {date_condition}" if date_condition else ""
+
+        for position in range(0, len(remaining), PANEL_BATCH_SIZE):
+            selects, params = [], []
+            for ticker in remaining[position:position + PANEL_BATCH_SIZE]:
+                ticker_fields = ", ".join(
+                    '"{}"'.format(field.replace('"', '""')) if field in table_columns[ticker] else "NULL"
+                    for field in fields)
+                table = '"{}_ohlc"'.format(ticker.replace('"', '""'))
+
+                selects.append(f"SELECT ? AS ticker, Date, {ticker_fields} FROM {table}{where_sql}")
+                params += [ticker] + date_params
+
+            rows.extend(self.con.execute(" UNION ALL ".join(selects), params).fetchall())
+
+        return rows
+
+    def get_ohlc_panel(self, tickers, fields=("Close",), start=None, end=None, ffill=True, as_array=False):
+        """Method loads the OHLC data of many tickers at once and aligns it on
+        a common date index.
+
+        The data is read with batched queries (a few hundred tickers per query
+        instead of one query per ticker) from either storage layout. The rows are
+        scattered into a (date, ticker, field) array by their factorized date and
+        ticker positions, so no joins between per-ticker dataframes are made, and
+        dates missing for a ticker are filled forward along the date axis in a
+        single vectorized pass.
+
+        Arguments:
+            tickers (list): The ticker symbols, in the order of the result's columns.
+
+            fields (list): The price columns loaded. Defaults to ('Close',).
+
+            start (str|datetime): The first date included. Defaults to None (no bound).
+
+            end (str|datetime): The last date included. Defaults to None (no bound).
+
+            ffill (bool): If the missing values of a ticker are filled with its previous
+                value. Values before a ticker's first date are left as NaN. Defaults to True.
+
+            as_array (bool): If True a 3D NumPy array and its axes are returned instead
+                of a dataframe. Defaults to False.
+
+        Returns:
+            pd.Dataframe: For a single field a date x ticker dataframe, for several fields
+                a dataframe with (field, ticker) columns.
+
+            tuple: If as_array is True, a tuple of the (date, ticker, field) float64
+                array, the DatetimeIndex of dates, the list of tickers and the list
+                of fields (values, dates, tickers, fields).
+
+        """
+        tickers = list(dict.fromkeys(tickers))
+        fields = [fields] if isinstance(fields, str) else list(fields)
+
+        key = ("ohlc_panel", tuple(tickers), tuple(fields), str(start), str(end), ffill, as_array)
+        tables = [OHLC_TABLE] + [f"{ticker}_ohlc" for ticker in tickers]
+
+        return self._cached_query(key, tables, lambda: self._build_panel(tickers, fields, start, end, ffill, as_array))
+
+    def _build_panel(self, tickers, fields, start, end, ffill, as_array):
+        "Internal method querying and aligning the panel returned by `get_ohlc_panel()`."
+        rows = self._read_panel_rows(tickers, fields, start, end)
+        frame = pd.DataFrame.from_records(rows, columns=["ticker", "Date"] + fields)
+
+        # Stored dates are ISO formatted strings, so sorting the strings sorts the dates:
+        date_codes, date_labels = pd.factorize(frame["Date"], sort=True)
+        ticker_codes = pd.Index(tickers).get_indexer(frame["ticker"])
+        dates = pd.DatetimeIndex(pd.to_datetime(date_labels), name="Date")
+
+        values = np.full((len(dates), len(tickers), len(fields)), np.nan)
+        values[date_codes, ticker_codes, :] = frame[fields].to_numpy(dtype="float64")
+
+        if ffill and len(dates) > 0:
+            values = pd.DataFrame(values.reshape(len(dates), -1)).ffill().to_numpy().reshape(values.shape)
+
+        if as_array:
+            return values, dates, tickers, fields
+
+        if len(fields) == 1:
+            return pd.DataFrame(values[:, :, 0], index=dates, columns=pd.Index(tickers, name="ticker"))
+
+        # Laying the fields out as the outer column level, (field, ticker):
+        columns = pd.MultiIndex.from_product([fields, tickers], names=["field", "ticker"])
+        return pd.DataFrame(values.transpose(0, 2, 1).reshape(len(dates), -1), index=dates, columns=columns)
+
+    def get_ohlc_parquet(self, tickers, start=None, end=None, columns=None):
+        """Method reads OHLC price data from the Parquet dataset partitioned by
+        ticker and year.
+
+        Only the requested columns are read from the files (column projection)
+        and the date range is pushed down to the dataset scan: partitions of
+        other tickers and years are never opened and row groups outside the
+        range are skipped using the Parquet statistics. The files are read in
+        parallel by pyarrow, which needs to be installed.
+
+        Arguments:
+            tickers (str|list): A ticker symbol or a list of ticker symbols.
+
+            start (str|datetime): The first date included. Defaults to None (no bound).
+
+            end (str|datetime): The last date included. Defaults to None (no bound).
+
+            columns (list): The price columns read, eg: ['Close']. Defaults to
+                None (all of the price columns).
+
+        Returns:
+            pd.Dataframe: For a single ticker a dataframe indexed by Date, for a list
+                of tickers a dataframe indexed by (ticker, Date).
+
+            None: None type if the dataset contains no data for the query.
+
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.dataset as ds
+        except ImportError as e:
+            raise ImportError("Reading the Parquet OHLC dataset requires pyarrow: pip install pyarrow") from e
+
+        if self.parquet_dir is None:
+            raise ValueError("The StockData object was created without a parquet_dir")
+
+        single_ticker = isinstance(tickers, str)
+        ticker_lst = [tickers] if single_ticker else list(tickers)
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        # Building the predicate, the year bounds prune whole partitions:
+        year_field, date_field = ds.field("year"), ds.field("Date")
+        predicate = None
+        conditions = []
+        # Timestamp.value is in nanoseconds whatever the unit of the Timestamp:
+        if start is not None:
+            conditions += [year_field >= start.year, date_field >= pa.scalar(start.value, pa.timestamp("ns"))]
+        if end is not None:
+            conditions += [year_field <= end.year, date_field <= pa.scalar(end.value, pa.timestamp("ns"))]
+
+        for condition in conditions:
+            predicate = condition if predicate is None else predicate & condition
+
+        read_columns = ["Date"] + list(columns if columns is not None else OHLC_COLUMNS)
+
+        if single_ticker:
+            ticker_dir = os.path.join(self.parquet_dir, f"ticker={tickers}")
+            if not os.path.isdir(ticker_dir):
+                return None
+
+            # Opening the ticker directory directly avoids listing the whole dataset:
+            dataset = ds.dataset(ticker_dir, format="parquet",
+                partitioning=ds.partitioning(pa.schema([("year", pa.int32())]), flavor="hive"))
+            table = dataset.to_table(columns=read_columns, filter=predicate)
+
+            if table.num_rows == 0:
+                return None
+
+            return table.to_pandas().set_index("Date").sort_index()
+
+        # Scanning every requested ticker in a single (multi-threaded) dataset scan:
+        dataset = ds.dataset(self.parquet_dir, format="parquet",
+            partitioning=ds.partitioning(pa.schema([("ticker", pa.string()), ("year", pa.int32())]), flavor="hive"))
+
+        ticker_predicate = ds.field("ticker").isin(ticker_lst)
+        predicate = ticker_predicate if predicate is None else ticker_predicate & predicate
+        table = dataset.to_table(columns=["ticker"] + read_columns, filter=predicate)
+
+        if table.num_rows == 0:
+            return None
+
+        return table.to_pandas().set_index(["ticker", "Date"]).sort_index()
@@ -0,0 +1,360 @@
+"""Script containing the asyncio execution mode of the Web API Pipeline APIs.
+
+The Web API pipelines spend almost all of their time waiting on the network.
+Instead of executing each pipeline's Bonobo graph one after another, `run_async()`
+drives many pipelines from a single event loop: the extract and load nodes have
+async variants (`extract_async()` and `load_async()`) that share one async HTTP
+client with a bounded number of in-flight requests, while the CPU bound transform
+nodes run unchanged in a thread pool so they never block the loop.
+
+A pipeline supports the asyncio execution mode when it implements:
+
+- extract_async(session): An async generator yielding what `extract()` yields.
+- transform(*args): The existing (synchronous) transform node.
+- load_async(sink, *args): A coroutine writing what `transform()` yields.
+
+Example:
+    pipelines = [
+        SPYCompositionWebAPIPipeline("http://localhost:8000/api/spy/", execute=False),
+        DJIACompositionWebAPIPipeline("http://localhost:8000/api/djia/", execute=False),
+    ]
+    results = run_async(pipelines, max_in_flight=20)
+
+This requires `aiohttp`, which is not installed by default.
+
+"""
+# Importing External Packages:
+import asyncio
+import json
+
+# Importing the Web API sink shared with the Bonobo execution mode:
+from ETL_pipelines.web_api_sink import WebAPISink
+
+def _import_aiohttp():
+    """Method imports aiohttp, which is an optional dependency only needed
+    by the asyncio execution mode.
+
+    Returns:
+        module: The aiohttp module.
+
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError("The asyncio execution mode requires aiohttp: pip install aiohttp") from e
+
+    return aiohttp
+
+class AsyncResponse(object):
+    """A fully read HTTP response exposing the parts of the requests.Response
+    API used by the transform methods (`status_code`, `text`, `content`, `json()`),
+    so that the existing transform nodes can parse it unchanged.
+
+    Arguments:
+        url (str): The url of the response.
+
+        status_code (int): The HTTP status code.
+
+        headers (dict): The response headers.
+
+        content (bytes): The (decompressed) response body.
+
+        encoding (str): The charset of the body. Defaults to utf-8.
+
+    """
+    def __init__(self, url, status_code, headers, content, encoding=None):
+
+        # Declaring instance params:
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+class AsyncHTTPSession(object):
+    """An async HTTP client, built on an aiohttp ClientSession, shared by
+    every pipeline driven by the same event loop.
+
+    At most `max_in_flight` requests are in flight at once across all of the
+    pipelines, and at most `limit_per_host` connections are opened to a single
+    host. Connections are kept alive and reused, responses are decompressed and
+    fully read before being returned as AsyncResponse objects.
+
+    The session must be opened inside the running event loop, normally with
+    `async with AsyncHTTPSession() as session:`.
+
+    Arguments:
+        max_in_flight (int): The maximum number of concurrent requests. Defaults to 20.
+
+        limit_per_host (int): The maximum number of connections per host. Defaults to 10.
+
+        timeout (float): The total timeout of a request in seconds. Defaults to 60.
+
+        headers (dict): Additional headers sent with every request.
+
+    """
+    def __init__(self, max_in_flight=20, limit_per_host=10, timeout=60, headers=None):
+
+        # Declaring instance params:
+        self.max_in_flight = max_in_flight
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.headers = headers
+
+        self._session = None
+        self._semaphore = None
+
+    async def open(self):
+        "Method creates the aiohttp session in the running event loop."
+        aiohttp = _import_aiohttp()
+
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.limit_per_host),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.headers)
+
+        return self
+
+    async def close(self):
+        "Method closes the aiohttp session and its connections."
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def request(self, method, url, **kwargs):
+        """Method makes a request once one of the `max_in_flight` slots is free.
+
+        Arguments:
+            method (str): The HTTP method.
+
+            url (str): The url being requested.
+
+            kwargs: Keyword arguments passed to `aiohttp.ClientSession.request()`.
+
+        Returns:
+            AsyncResponse: The fully read response.
+
+        """
+        async with self._semaphore:
+            async with self._session.request(method, url, **kwargs) as response:
+                content = await response.read()
+
+                return AsyncResponse(str(response.url), response.status, dict(response.headers),
+                    content, response.charset)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+class AsyncWebAPISink(WebAPISink):
+    """The asyncio variant of the WebAPISink.
+
+    Records are split, serialized and compressed exactly as by the WebAPISink
+    (in a worker thread) but the chunks of a dataframe are sent concurrently
+    through an AsyncHTTPSession, bounded by the session's `max_in_flight`
+    requests. Only failed chunks are retried, as described in `WebAPISink`.
+
+    Arguments:
+        session (AsyncHTTPSession): The open async session.
+
+        kwargs: The keyword arguments of the WebAPISink (chunk_size, compress, ...).
+
+    """
+    async def post(self, url, df, headers=None):
+        """Method writes the records of a dataframe to a Web API endpoint in
+        concurrently sent chunks, retrying the chunks that failed.
+
+        Returns:
+            dict: The report of the write, see `WebAPISink.post()`.
+
+        Raises:
+            WebAPIWriteError: If rows were rejected and `raise_on_rejected` is set.
+
+        """
+        request_headers = self._request_headers(url, headers)
+        pending = await asyncio.get_event_loop().run_in_executor(None, self._prepare_chunks, url, df)
+        report = self._new_report(df, pending)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self.retry_delay(attempt))
+
+            results = await asyncio.gather(*(
+                self._send_chunk_async(url, body, num_rows, request_headers) for num_rows, body in pending))
+            report["requests"] += len(pending)
+
+            failed = []
+            for chunk, result in zip(pending, results):
+                if result is None:
+                    failed.append(chunk)
+                else:
+                    report["accepted"] += result[0]
+                    report["rejected"] += result[1]
+
+            pending = failed
+            if not pending:
+                break
+
+        return self._finish_report(report, pending, url)
+
+    async def _send_chunk_async(self, url, body, num_rows, headers):
+        "Internal method sending a single chunk, returning its (accepted, rejected) counts or None to retry it."
+        aiohttp = _import_aiohttp()
+        body, headers = self._chunk_encoding(url, body, headers)
+        try:
+            response = await self.session.post(url, data=body, headers=headers)
+        except aiohttp.ClientConnectionError:
+            return None
+        except asyncio.TimeoutError:
+            # The server may have stored the chunk, so it is not sent again:
+            return 0, num_rows
+
+        # Sending the chunk again uncompressed if the endpoint refused the gzip body:
+        if self._gzip_refused(url, response, headers):
+            return await self._send_chunk_async(url, body, num_rows, headers)
+
+        return self._chunk_result(response, num_rows)
+
+async def fetch_page(session, url):
+    """Method fetches a web page through the async session, the async variant
+    of the extract methods' status checked GET request.
+
+    Arguments:
+        session (AsyncHTTPSession): The open async session.
+
+        url (str): The url of the page.
+
+    Returns:
+        AsyncResponse: The response.
+
+    """
+    response = await session.get(url)
+
+    # Conditional logic to only generate values if valid response:
+    if response.status_code != 200:
+        raise ValueError(f"Response Status Code not 200, it is {response.status_code}")
+
+    return response
+
+async def web_api_json_load_async(df, url, sink, **kwargs):
+    """The async variant of `base_pipeline.web_api_json_load()` writing a
+    dataframe's records to a Web API through an AsyncWebAPISink.
+
+    Arguments:
+        df (pandas.DataFrame): The dataframe being written.
+
+        url (str): The api end point the records are sent to.
+
+        sink (AsyncWebAPISink): The sink the records are written with.
+
+    Returns:
+        dict: The report of the write with the accepted and rejected row counts.
+
+    """
+    headers = {}
+
+    # Logic for passing API Key to post request:
+    if "API_Key" in kwargs:
+        key = kwargs["API_Key"]
+        headers["Authorization"] = f"Token {key}"
+
+    report = await sink.post(url, df, headers=headers)
+    print(f"Wrote {report['rows']} rows to {url}: {report['accepted']} accepted, {report['rejected']} rejected")
+
+    return report
+
+def _as_args(item):
+    "Internal method converting a node output into the argument tuple of the next node, as Bonobo does."
+    return item if isinstance(item, tuple) else (item,)
+
+def _run_node(node, item):
+    "Internal method calling a synchronous node with an item and collecting everything it yields."
+    output = node(*_as_args(item))
+    return list(output) if output is not None else []
+
+async def execute_pipeline_async(pipeline, session, sink):
+    """Method executes a single pipeline in the running event loop.
+
+    Every item yielded by `extract_async()` is transformed in a worker thread
+    and each item the transform yields is written by `load_async()`. The
+    pipeline's (synchronous) services are built before the first node runs and
+    closed once the pipeline is done.
+
+    Arguments:
+        pipeline (Pipeline): A pipeline implementing the asyncio execution mode.
+
+        session (AsyncHTTPSession): The open async session.
+
+        sink (AsyncWebAPISink): The async Web API sink.
+
+    Returns:
+        list: The values returned by each `load_async()` call, eg: the write reports.
+
+    """
+    loop = asyncio.get_event_loop()
+    results = []
+
+    pipeline.get_services()
+    try:
+        async for extracted in pipeline.extract_async(session):
+            transformed = await loop.run_in_executor(None, _run_node, pipeline.transform, extracted)
+
+            for item in transformed:
+                results.append(await pipeline.load_async(sink, *_as_args(item)))
+
+    finally:
+        pipeline.close_services()
+
+    return results
+
+def run_async(pipelines, max_in_flight=20, session_params=None, sink_params=None):
+    """Method executes many Web API pipelines concurrently in one event loop
+    sharing a single AsyncHTTPSession and AsyncWebAPISink.
+
+    The pipelines must be constructed without being executed, eg:
+    `SPYCompositionWebAPIPipeline(api_endpoint, execute=False)`.
+
+    Arguments:
+        pipelines (list): The pipelines being executed.
+
+        max_in_flight (int): The maximum number of concurrent requests across
+            every pipeline. Defaults to 20.
+
+        session_params (dict): Additional keyword arguments of the AsyncHTTPSession.
+
+        sink_params (dict): Keyword arguments of the AsyncWebAPISink (chunk_size, ...).
+
+    Returns:
+        list: For each pipeline, in order, either the list of its load results or
+            the exception that stopped it. A failing pipeline does not stop the others.
+
+    """
+    async def main():
+        async with AsyncHTTPSession(max_in_flight=max_in_flight, **(session_params or {})) as session:
+            sink = AsyncWebAPISink(session, **(sink_params or {}))
+
+            return await asyncio.gather(
+                *(execute_pipeline_async(pipeline, session, sink) for pipeline in pipelines),
+                return_exceptions=True)
+
+    return asyncio.run(main())
@@ -3,17 +3,45 @@
 # Importing External Packages:
 import bonobo
 import requests
-import pandas as pd
-import json
+import threading
 
-def web_api_json_load(df, url, **kwargs):
+# Importing the shared Pipeline services:
+from ETL_pipelines.sqlite_sink import SQLiteSink
+from ETL_pipelines.http_session import PooledHTTPSession
+from ETL_pipelines.http_cache import HTTPCache
+from ETL_pipelines.web_api_sink import WebAPISink
+from ETL_pipelines.metrics import PipelineMetrics
+
+# The Bonobo argument parser, built once per process by `get_bonobo_parser()`:
+_bonobo_parser = None
+_bonobo_parser_lock = threading.Lock()
+
+def get_bonobo_parser():
+    """Method returns the Bonobo argument parser used to read the command line
+    options of a run, building it the first time it is called so that it is not
+    rebuilt for every pipeline executed by the same process.
+
+    Returns:
+        argparse.ArgumentParser: The Bonobo argument parser.
+
+    """
+    global _bonobo_parser
+
+    with _bonobo_parser_lock:
+        if _bonobo_parser is None:
+            _bonobo_parser = bonobo.get_argument_parser()
+
+    return _bonobo_parser
+
+def web_api_json_load(df, url, session=None, sink=None, **kwargs):
     """The method that converts a pandas dataframe to
     a list of json objects and writes json to an online database.
 
     The method is meant to load data into an online database through
-    A REST API. The method seralizes the dataframe into a json format
-    and sends the data to a web API through a HTTP POST request via
-    the requests module.
+    A REST API. The dataframe is written in chunks of records, each sent
+    as a HTTP POST request by a WebAPISink (see `web_api_sink.WebAPISink`),
+    and the chunks that fail before being processed are retried. Rejected
+    rows raise a `web_api_sink.WebAPIWriteError`.
 
     If additional authentication is necessary such as an API key it
     can be passed into the method through the **kwargs argument. 
@@ -25,25 +53,31 @@ def web_api_json_load(df, url, **kwargs):
         url (str): The api end point that will be used to form the
             HTTP POST request to the web api.
 
+        session (requests.Session): The session used to make the requests if
+            no sink is passed. If None a new requests Session is used.
+
+        sink (WebAPISink): The sink the records are written with, normally the
+            pipeline's 'web_api_sink' service.
+
+    Returns:
+        dict: The report of the write with the accepted and rejected row counts.
+
     """
-    # Converting dataframe into a json object based on each record:
-    df_json = df.to_json(orient="records")
-    
-    # Creating dicts to configure request:
-    json_payload = json.loads(df_json)
-    headers = {"content-type":"application/json"}
+    headers = {}
 
     # Logic for passing API Key to post request:
     if "API_Key" in kwargs:
         key = kwargs["API_Key"]
         headers["Authorization"] = f"Token {key}"
 
-    # Making the Post Request to the Web API:
-    post_response = requests.post(
-        url, 
-        json=json_payload,
-        headers=headers
-        )
+    # Making the Post Requests to the Web API:
+    if sink is None:
+        sink = WebAPISink(session if session is not None else requests.Session())
+
+    report = sink.post(url, df, headers=headers)
+    print(f"Wrote {report['rows']} rows to {url}: {report['accepted']} accepted, {report['rejected']} rejected")
+
+    return report
 
 
 class Pipeline(object):
@@ -61,13 +95,55 @@ class Pipeline(object):
 
     The methods that can but do not need to be overwritten:
     - build_graph()
-    - get_services()
+    - build_services()
+
+    The services built by `build_services()` are created once per run, passed
+    to Bonobo through `get_services()` and can be retrieved inside any node
+    through `get_service()`. Services are closed at the end of the run. The
+    services that are built by default are:
+
+    - sqlite_sink: A SQLiteSink writing to the dbpath database (if a dbpath is set).
+    - http: A PooledHTTPSession used for every HTTP request made by the nodes.
+        Its `cached_get()` method goes through a persistent on-disk HTTPCache
+        configured by `http_cache_params` (None disables the cache).
+    - web_api_sink: A WebAPISink writing chunked JSON records to the
+        Web APIs through the 'http' session, configured by `web_api_sink_params`.
+
+    Every node of the graph is wrapped by `instrument_graph()` before the graph
+    is executed, recording its calls, rows in and out, bytes fetched over HTTP,
+    wall and CPU time and a latency histogram. After a run the metrics are
+    available through the `metrics` param and can be exported as JSON or in the
+    Prometheus text format (see `export_metrics()`).
+
+    `execute_pipeline()` reads the Bonobo options from the command line and
+    executes a single run. Long-lived processes (see `scheduler.PipelineScheduler`)
+    construct the pipeline once and call `run()` for each run instead, passing
+    `resident=True` so that only the `per_run_services` are closed after the run
+    and the other services (eg: the pooled 'http' session) are reused by the next one.
 
     Arguments:
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
     
     """
+    # Keyword arguments passed to the SQLiteSink service:
+    sqlite_sink_params = {}
+
+    # Keyword arguments passed to the PooledHTTPSession service:
+    http_session_params = {}
+
+    # Keyword arguments passed to the HTTPCache used by `cached_get()`, None disables the cache:
+    http_cache_params = {}
+
+    # Keyword arguments passed to the WebAPISink service:
+    web_api_sink_params = {}
+
+    # If set, the path the run metrics are exported to after each run:
+    metrics_path = None
+
+    # The services closed after every run of a resident pipeline, flushing their buffered writes:
+    per_run_services = ("sqlite_sink",)
+
     def __init__(self, dbpath):
 
         # Declaring instance variables:
@@ -94,14 +170,159 @@ class Pipeline(object):
 
         return self.graph
 
+    def instrument_graph(self, graph):
+        """Method wraps every node of a Bonobo graph with the metrics
+        instrumentation and resets the `metrics` param for a new run.
+
+        Nodes are replaced in place so that the edges of the graph, which
+        reference nodes by position, are unchanged. Nodes that share a name 
+        are numbered so that they are reported seperately.
+
+        Arguments:
+            graph (bonobo.Graph): The graph built by `build_graph()`.
+
+        Returns:
+            bonobo.Graph: The instrumented graph.
+
+        """
+        self.metrics = PipelineMetrics(type(self).__name__)
+
+        node_names = [getattr(node, "__name__", repr(node)) for node in graph.nodes]
+        for idx, node in enumerate(graph.nodes):
+            name = node_names[idx]
+            if node_names.count(name) > 1:
+                name = f"{name}_{node_names[:idx].count(name)}"
+
+            graph.nodes[idx] = self.metrics.instrument(node, name=name)
+
+        return graph
+
+    def export_metrics(self, path, format=None):
+        """Method writes the metrics of the last run to a file.
+
+        Arguments:
+            path (str): The path of the file the metrics are written to.
+
+            format (str): Either 'json' or 'prometheus'. If None the format is
+                picked from the file extension ('.prom' files are written in the
+                Prometheus text format, anything else as JSON).
+
+        """
+        if format is None:
+            format = "prometheus" if path.endswith(".prom") else "json"
+
+        if format == "prometheus":
+            self.metrics.to_prometheus(path)
+        elif format == "json":
+            self.metrics.to_json(path)
+        else:
+            raise ValueError(f"Unknown metrics format {format}, expected 'json' or 'prometheus'")
+
+    def build_services(self, **options):
+        """Method creates the services shared by the nodes of the pipeline.
+
+        Pipelines that need additional services should extend the dict returned
+        by this method instead of overwriting `get_services()`.
+
+        Returns:
+            dict: A dict mapping each service name to the service object.
+
+        """
+        services = {}
+
+        # Pipelines that write to the Web API have no database path:
+        if getattr(self, "dbpath", None) is not None:
+            services["sqlite_sink"] = SQLiteSink(self.dbpath, **self.sqlite_sink_params)
+
+        http_cache = HTTPCache(**self.http_cache_params) if self.http_cache_params is not None else None
+        services["http"] = PooledHTTPSession(cache=http_cache, **self.http_session_params)
+
+        services["web_api_sink"] = WebAPISink(services["http"], **self.web_api_sink_params)
+
+        # Recording the bytes fetched by each node (in the metrics of the current run):
+        if getattr(self, "metrics", None) is not None:
+            services["http"].hooks["response"].append(self._record_response)
+
+        return services
+
+    def _record_response(self, response, *args, **kwargs):
+        "Internal hook passing the responses of the 'http' service to the metrics of the current run."
+        return self.metrics.response_hook(response, *args, **kwargs)
+
     def get_services(self, **options):
-        return {}
+        """Method returns the services dict passed to Bonobo, building
+        the services the first time it is called during a run.
+
+        Returns:
+            dict: A dict mapping each service name to the service object.
+
+        """
+        if getattr(self, "_services", None) is None:
+            self._services = self.build_services(**options)
+
+        return self._services
+
+    def get_service(self, name):
+        """Method returns a single service by name so that it can be used
+        inside the Bonobo ETL methods.
+
+        Arguments:
+            name (str): The name of the service, eg: 'sqlite_sink'.
+
+        Returns:
+            object: The service object.
+
+        """
+        return self.get_services()[name]
+
+    def close_services(self):
+        """Method closes every service that exposes a `close()` method
+        (flushing any buffered writes) and discards the services so that
+        the next run builds new ones."""
+        services = getattr(self, "_services", None) or {}
+        self._services = None
+
+        for service in services.values():
+            if hasattr(service, "close"):
+                service.close()
         
+    def release_services(self):
+        """Method ends a run of a resident pipeline by closing only the
+        `per_run_services` (flushing their buffered writes). The other services
+        stay open and are reused by the next run until `close_services()` is called."""
+        services = getattr(self, "_services", None) or {}
+
+        for name in self.per_run_services:
+            if hasattr(services.get(name), "close"):
+                services[name].close()
+
+    def run(self, resident=False, **options):
+        """Method builds, instruments and executes the Bonobo graph with
+        options that have already been parsed.
+
+        Arguments:
+            resident (bool): If True the services outlive the run (see
+                `release_services()`), otherwise they are closed. Defaults to False.
+
+            options: The Bonobo options passed to `build_graph()` and `get_services()`.
+
+        """
+        try:
+            bonobo.run(
+                self.instrument_graph(self.build_graph(**options)),
+                services=self.get_services(**options))
+        finally:
+            if resident:
+                self.release_services()
+            else:
+                self.close_services()
+
+            if self.metrics_path is not None:
+                self.export_metrics(self.metrics_path)
+
     # Executon method:
     def execute_pipeline(self):
         
-        self.bonobo_parser = bonobo.get_argument_parser()
+        self.bonobo_parser = get_bonobo_parser()
         with bonobo.parse_args(self.bonobo_parser) as options:
-            bonobo.run(
-                self.build_graph(**options),
-                services=self.get_services(**options))
+            self.run(**options)
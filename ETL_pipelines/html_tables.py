@@ -0,0 +1,203 @@
+"Script containing the lxml based html table extractor used by the composition Pipeline APIs"
+
+# Importing External Packages:
+import re
+from lxml import etree, html as lxml_html
+from pandas.io.parsers import TextParser
+
+# Compiled selectors locating tables in a parsed page:
+TABLE_BY_ID = etree.XPath("//table[@id = $table_id]")
+TABLE_BY_CLASS_TOKEN = etree.XPath(
+    "//table[contains(concat(' ', normalize-space(@class), ' '), concat(' ', $class_token, ' '))]")
+TABLE_BY_CLASS_VALUE = etree.XPath("//table[normalize-space(@class) = $class_value]")
+
+# Compiled selectors for the rows and cells of a table (the same rows pandas.read_html reads):
+THEAD_ROWS = etree.XPath(".//thead//tr")
+TBODY_ROWS = etree.XPath(".//tbody//tr | ./tr")
+TFOOT_ROWS = etree.XPath(".//tfoot//tr")
+ROW_CELLS = etree.XPath("./td | ./th")
+STYLED_ELEMENTS = etree.XPath(".//*[@style]")
+
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+def parse_html(html):
+    """Method parses an html page once with lxml so that every table of the
+    page can be read from the same tree.
+
+    Arguments:
+        html (str|bytes): The html content of the page, eg: `response.text`.
+
+    Returns:
+        lxml.html.HtmlElement: The root element of the page.
+
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+
+    return lxml_html.fromstring(html, parser=lxml_html.HTMLParser(encoding="utf-8", recover=True))
+
+def find_table(document, table_id=None, table_class=None, index=0):
+    """Method locates a table in a parsed page with a compiled XPath selector.
+
+    Tables are matched by their id or by their class. A single class name matches
+    every table with that class, a space seperated list of classes matches the
+    tables whose class attribute is exactly that list (as BeautifulSoup does).
+
+    Arguments:
+        document (lxml.html.HtmlElement): The page parsed by `parse_html()`.
+
+        table_id (str): The id of the table.
+
+        table_class (str): The class of the table, used if no table_id is given.
+
+        index (int): The position of the table among the matching tables. Defaults to 0.
+
+    Returns:
+        lxml.html.HtmlElement: The table element.
+
+    """
+    if table_id is not None:
+        tables = TABLE_BY_ID(document, table_id=table_id)
+    elif table_class is not None and len(table_class.split()) == 1:
+        tables = TABLE_BY_CLASS_TOKEN(document, class_token=table_class)
+    elif table_class is not None:
+        tables = TABLE_BY_CLASS_VALUE(document, class_value=" ".join(table_class.split()))
+    else:
+        raise ValueError("Either a table_id or a table_class must be given to locate a table")
+
+    if len(tables) <= index:
+        raise ValueError(f"No table found with id={table_id} class={table_class} at position {index}")
+
+    return tables[index]
+
+def _cell_text(cell):
+    "Internal method returning the whitespace normalized text of a cell."
+    return _RE_WHITESPACE.sub(" ", cell.text_content().strip())
+
+def _expand_rows(rows):
+    """Internal method converting table rows into lists of cell texts,
+    repeating the text of cells spanning several columns (colspan) or
+    rows (rowspan) in each position they cover.
+
+    Arguments:
+        rows (list): The tr elements.
+
+    Returns:
+        list: The list of cell texts of each row.
+
+    """
+    all_texts = []
+    remainder = [] # The (position, text, rows left) of the cells spanning into the next row.
+
+    for row in rows:
+        texts = []
+        next_remainder = []
+        position = 0
+
+        for cell in ROW_CELLS(row):
+            # Cells spanning down from the previous rows that come before this cell:
+            while remainder and remainder[0][0] <= position:
+                prev_position, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_position, prev_text, prev_rowspan - 1))
+                position += 1
+
+            text = _cell_text(cell)
+            rowspan = int(cell.get("rowspan") or 1)
+            colspan = int(cell.get("colspan") or 1)
+
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((position, text, rowspan - 1))
+                position += 1
+
+        # Cells spanning down into the end of the row:
+        for prev_position, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_position, prev_text, prev_rowspan - 1))
+
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    # Rows only made of cells spanning down from the last rows:
+    while remainder:
+        next_remainder = []
+        texts = []
+        for prev_position, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_position, prev_text, prev_rowspan - 1))
+
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    return all_texts
+
+def table_to_frame(table):
+    """Method builds a dataframe straight from a parsed table element.
+
+    The table is read the way `pandas.read_html` reads it, so the columns and
+    dtypes are the same: hidden elements (display:none) are ignored, the thead
+    rows (or the leading rows made only of th cells) are the header, spanning
+    cells are repeated and the values are converted by the pandas TextParser
+    (with ',' as the thousands seperator).
+
+    Arguments:
+        table (lxml.html.HtmlElement): The table element. Hidden elements are
+            removed from it.
+
+    Returns:
+        pandas.DataFrame: The table.
+
+    """
+    # Removing the hidden elements (eg: sort keys) as pandas.read_html does:
+    for element in STYLED_ELEMENTS(table):
+        if "display:none" in element.attrib.get("style", "").replace(" ", ""):
+            element.drop_tree()
+
+    header_rows = THEAD_ROWS(table)
+    body_rows = TBODY_ROWS(table)
+    footer_rows = TFOOT_ROWS(table)
+
+    # Tables without a thead use their leading rows of th cells as the header:
+    if not header_rows:
+        while body_rows and all(cell.tag == "th" for cell in ROW_CELLS(body_rows[0])):
+            header_rows.append(body_rows.pop(0))
+
+    head = _expand_rows(header_rows)
+    body = head + _expand_rows(body_rows) + _expand_rows(footer_rows)
+
+    header = None
+    if head:
+        header = 0 if len(head) == 1 else [idx for idx, row in enumerate(head) if any(text for text in row)]
+
+    # Padding ragged rows to the width of the widest row:
+    width = max((len(row) for row in body), default=0)
+    body = [row + [""] * (width - len(row)) for row in body]
+
+    return TextParser(body, header=header, thousands=",").read()
+
+def read_html_table(html, table_id=None, table_class=None, index=0):
+    """Method extracts a single table from an html page into a dataframe,
+    parsing the page only once (see `find_table()` and `table_to_frame()`).
+
+    Example:
+        components_df = read_html_table(response.text, table_id="constituents")
+
+    Arguments:
+        html (str|bytes): The html content of the page.
+
+        table_id (str): The id of the table.
+
+        table_class (str): The class of the table, used if no table_id is given.
+
+        index (int): The position of the table among the matching tables. Defaults to 0.
+
+    Returns:
+        pandas.DataFrame: The table.
+
+    """
+    return table_to_frame(find_table(parse_html(html), table_id=table_id, table_class=table_class, index=index))
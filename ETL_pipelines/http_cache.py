@@ -0,0 +1,301 @@
+"Script containing the persistent on-disk HTTP response cache used by the extract layer of the Pipeline APIs"
+
+# Importing External Packages:
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Default location of the cache on disk:
+DEFAULT_HTTP_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "etl_pipelines", "http")
+
+# Urls whose content never changes once published. SEC EDGAR archive urls point
+# to a specific accession (filing) so their content is never revised:
+IMMUTABLE_URL_PATTERNS = (
+    r"^https?://(www\.)?sec\.gov/Archives/edgar/data/",
+)
+
+# Response headers kept with a cached body:
+_STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+class HTTPCache(object):
+    """A persistent, size-bounded cache of HTTP GET responses stored on
+    disk and keyed on the request url.
+
+    Each cached response is stored as two files in `cache_dir`: the response
+    body and a small JSON file with its status, encoding, ETag and Last-Modified
+    headers. When a cached url is requested again:
+
+    - If the url matches one of the immutable url patterns the cached response
+      is returned without making a request.
+    - If the response was stored less than `max_age` seconds ago it is returned
+      without making a request.
+    - Otherwise a conditional GET is made with the If-None-Match/If-Modified-Since
+      headers. A '304 Not Modified' response returns the cached body, anything
+      else replaces the cache entry.
+
+    When the cache grows past `max_bytes` the least recently used entries are
+    removed. Hit, miss, revalidation and eviction counters are available through
+    `stats()`.
+
+    The cache is used through the `cached_get()` method of the PooledHTTPSession:
+
+        response = self.get_service("http").cached_get(url)
+
+    Arguments:
+        cache_dir (str): The directory the cache is stored in.
+
+        max_bytes (int): The maximum size of the cache on disk. Defaults to 1GB.
+
+        max_age (float): The number of seconds a response is used without being
+            revalidated. Defaults to 0 (always revalidate).
+
+        immutable_patterns (tuple): Regex patterns of urls that never expire.
+
+    """
+    def __init__(self, cache_dir=DEFAULT_HTTP_CACHE_DIR, max_bytes=1024**3, max_age=0,
+        immutable_patterns=IMMUTABLE_URL_PATTERNS):
+
+        # Declaring instance params:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.immutable_patterns = [re.compile(pattern) for pattern in immutable_patterns]
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def stats(self):
+        """Method returns the counters of the cache.
+
+        Returns:
+            dict: The hits (including revalidated hits), misses, revalidations,
+                evictions and current size in bytes of the cache.
+
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "size_bytes": self._cache_size(),
+            }
+
+    def is_immutable(self, url):
+        "Method returns True if the url matches one of the immutable url patterns."
+        return any(pattern.match(url) for pattern in self.immutable_patterns)
+
+    def _paths(self, url):
+        "Internal method returning the body and metadata file paths of a url."
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.body"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_entry(self, url):
+        "Internal method reading a cache entry, returning (metadata, body) or None."
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "rt") as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+        except (OSError, ValueError):
+            return None
+
+        # Guarding against the (unlikely) collision of two urls:
+        if meta.get("url") != url:
+            return None
+
+        # Marking the entry as recently used for the eviction policy:
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return meta, body
+
+    def _atomic_write(self, path, content):
+        "Internal method writing a file through a temporary file and os.replace."
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_entry(self, url, response):
+        "Internal method storing a response in the cache."
+        body_path, meta_path = self._paths(url)
+        body = response.content
+        meta = {
+            "url": url,
+            "status_code": response.status_code,
+            "encoding": response.encoding,
+            "headers": {header: response.headers[header] for header in _STORED_HEADERS if header in response.headers},
+            "stored_at": time.time(),
+        }
+
+        with self._lock:
+            self._cache_size() # Making sure the size is known before the entry changes it.
+
+        previous_size = self._entry_size(url)
+        meta_content = json.dumps(meta).encode("utf-8")
+
+        # The body is written first so that a metadata file always has a complete body:
+        self._atomic_write(body_path, body)
+        self._atomic_write(meta_path, meta_content)
+
+        with self._lock:
+            self._total_bytes += len(body) + len(meta_content) - previous_size
+
+        self._evict()
+
+    def _touch_entry(self, url, meta):
+        "Internal method updating the stored_at time of a revalidated entry."
+        _, meta_path = self._paths(url)
+        meta["stored_at"] = time.time()
+        self._atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _entry_size(self, url):
+        "Internal method returning the size on disk of a cache entry."
+        size = 0
+        for path in self._paths(url):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+
+        return size
+
+    def _cache_size(self):
+        "Internal method returning the size of the cache, scanning the directory once."
+        if self._total_bytes is None:
+            self._total_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and not entry.name.endswith(".tmp"))
+
+        return self._total_bytes
+
+    def _evict(self):
+        """Internal method removing the least recently used entries until the
+        cache is back under 90% of `max_bytes`."""
+        with self._lock:
+            if self._cache_size() <= self.max_bytes:
+                return
+
+            # Ordering entries by the last time they were used (the mtime of the metadata file):
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".json"):
+                    key = entry.name[:-len(".json")]
+                    body_path = os.path.join(self.cache_dir, f"{key}.body")
+                    try:
+                        size = entry.stat().st_size + os.path.getsize(body_path)
+                    except OSError:
+                        size = entry.stat().st_size
+                    entries.append((entry.stat().st_mtime, entry.path, body_path, size))
+
+            entries.sort()
+            target = 0.9 * self.max_bytes
+
+            for _, meta_path, body_path, size in entries:
+                if self._total_bytes <= target:
+                    break
+
+                for path in (meta_path, body_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def _build_response(self, url, meta, body):
+        "Internal method building a requests Response from a cache entry."
+        response = requests.Response()
+        response.status_code = meta["status_code"]
+        response._content = body
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = meta["encoding"]
+        response.url = url
+        response.from_cache = True
+
+        return response
+
+    def get(self, session, url, rate_limiter=None, **kwargs):
+        """Method performs a cached HTTP GET request.
+
+        Arguments:
+            session (requests.Session): The session used to make any request.
+
+            url (str): The url being requested.
+
+            rate_limiter (TokenBucket): A limiter a token is taken from before the
+                request is made, when the response cannot be served from the cache
+                without one (a miss or a revalidation).
+
+            kwargs: Keyword arguments passed to `session.get()`.
+
+        Returns:
+            requests.Response: The response, either fetched or rebuilt from the cache.
+                Responses rebuilt from the cache have a `from_cache` attribute set to True.
+
+        """
+        entry = self._read_entry(url)
+
+        if entry is not None:
+            meta, body = entry
+            fresh = self.is_immutable(url) or (time.time() - meta["stored_at"]) < self.max_age
+
+            if fresh:
+                with self._lock:
+                    self.hits += 1
+                return self._build_response(url, meta, body)
+
+            # Making a conditional request to revalidate the entry:
+            headers = dict(kwargs.pop("headers", None) or {})
+            if "ETag" in meta["headers"]:
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if "Last-Modified" in meta["headers"]:
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            response = session.get(url, headers=headers, **kwargs)
+
+            if response.status_code == 304:
+                self._touch_entry(url, meta)
+                with self._lock:
+                    self.hits += 1
+                    self.revalidations += 1
+                return self._build_response(url, meta, body)
+
+        else:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            response = session.get(url, **kwargs)
+
+        with self._lock:
+            self.misses += 1
+
+        # Only complete, successful responses that allow it are cached:
+        if response.status_code == 200 and "no-store" not in response.headers.get("Cache-Control", ""):
+            self._write_entry(url, response)
+
+        return response
@@ -0,0 +1,110 @@
+"Script containing the connection-pooled HTTP session shared by the Pipeline APIs"
+
+# Importing External Packages:
+import requests
+from requests.adapters import HTTPAdapter
+
+class PooledHTTPSession(requests.Session):
+    """A requests Session that keeps a pool of persistent connections
+    open for every host it talks to.
+
+    The Pipeline APIs make many requests to the same few hosts (Wikipedia,
+    SEC EDGAR and the velkozz Web API). Using a single pooled session means
+    that each host only pays for the TCP and TLS handshake once per pooled
+    connection instead of once per request. The session is shared by all of
+    the nodes of a pipeline through the Bonobo services dict under the name
+    'http' and is used exactly like the requests module:
+
+        response = self.get_service("http").get(url)
+
+    Every request made without an explicit `timeout` uses the session default.
+
+    Arguments:
+        pool_connections (int): The number of per-host connection pools that are
+            cached. Defaults to 10.
+
+        pool_maxsize (int): The maximum number of connections kept open per host.
+            This should be at least the number of threads making requests to the
+            same host at once. Defaults to 10.
+
+        timeout (float|tuple): The default (connect, read) timeout in seconds.
+            Defaults to (10, 60).
+
+        keep_alive (bool): If connections are kept open between requests.
+            Defaults to True.
+
+        compress (bool): If gzip/deflate compressed responses are requested.
+            Defaults to True.
+
+        max_retries (int): The number of times failed connections are retried by
+            the connection pool. Defaults to 0.
+
+        headers (dict): Additional headers sent with every request, eg: a
+            'User-Agent' declaring a contact as SEC EDGAR requires.
+
+        cache (HTTPCache): The on-disk response cache used by `cached_get()`.
+            If None `cached_get()` makes a normal request.
+
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=(10, 60), keep_alive=True,
+        compress=True, max_retries=0, headers=None, cache=None):
+
+        # Initalizing the requests Session:
+        super(PooledHTTPSession, self).__init__()
+        self.timeout = timeout
+        self.cache = cache
+
+        # Mounting a pooled adapter for both http and https hosts:
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=False)
+
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+        # Configuring default headers:
+        self.headers["Connection"] = "keep-alive" if keep_alive else "close"
+        if compress:
+            self.headers["Accept-Encoding"] = "gzip, deflate"
+        else:
+            self.headers["Accept-Encoding"] = "identity"
+
+        if headers is not None:
+            self.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        """Method overwrites the requests Session `request()` method to apply
+        the session's default timeout to requests made without one."""
+        kwargs.setdefault("timeout", self.timeout)
+
+        return super(PooledHTTPSession, self).request(method, url, **kwargs)
+
+    def cached_get(self, url, rate_limiter=None, **kwargs):
+        """Method performs a GET request through the session's on-disk
+        HTTPCache, revalidating cached responses with conditional requests.
+
+        It is intended for the pages scraped in the extract layer (Wikipedia
+        pages, SEC EDGAR pages and documents). Requests to the Web APIs should
+        use `get()` so that they are never served from the cache.
+
+        Arguments:
+            url (str): The url being requested.
+
+            rate_limiter (TokenBucket): A limiter a token is taken from before every
+                request actually sent over the network. Responses served from the
+                cache without a request do not take a token.
+
+            kwargs: Keyword arguments passed to `get()`.
+
+        Returns:
+            requests.Response: The response, either fetched or rebuilt from the cache.
+
+        """
+        if self.cache is None:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            return self.get(url, **kwargs)
+
+        return self.cache.get(self, url, rate_limiter=rate_limiter, **kwargs)
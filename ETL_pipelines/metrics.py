@@ -0,0 +1,367 @@
+"Script containing the per-node metrics instrumentation used by the base Pipeline"
+
+# Importing External Packages:
+import functools
+import inspect
+import json
+import threading
+import time
+import pandas as pd
+
+# Upper bounds (in seconds) of the node latency histogram buckets:
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+def count_rows(obj):
+    """Method counts the number of data rows contained in an object passed
+    between Bonobo nodes.
+
+    Dataframes, series and dicts count their length, tuples count the rows of
+    the dataframes and dicts they contain (eg: (ticker, dataframe)) and any
+    other object (eg: an HTTP response) counts as a single row.
+
+    Arguments:
+        obj (object): The object passed into or generated by a node.
+
+    Returns:
+        int: The number of rows.
+
+    """
+    if obj is None:
+        return 0
+    elif isinstance(obj, (pd.DataFrame, pd.Series, dict)):
+        return len(obj)
+    elif isinstance(obj, tuple):
+        return max(1, sum(count_rows(element) for element in obj if isinstance(element, (pd.DataFrame, dict))))
+    else:
+        return 1
+
+
+class NodeMetrics(object):
+    """An object holding the counters of a single pipeline node.
+
+    Arguments:
+        buckets (tuple): The upper bounds of the latency histogram buckets.
+
+    """
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.calls = 0
+        self.errors = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_fetched = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.latency_sum = 0.0
+
+    def observe_latency(self, seconds):
+        "Method records the latency of a single node call in the histogram."
+        self.latency_sum += seconds
+        for position, upper_bound in enumerate(self.buckets):
+            if seconds <= upper_bound:
+                self.bucket_counts[position] += 1
+                break
+
+    def to_dict(self):
+        "Method returns the counters as a json serializable dict."
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "bytes_fetched": self.bytes_fetched,
+            "wall_time_s": self.wall_time,
+            "cpu_time_s": self.cpu_time,
+            "latency_histogram": {
+                "buckets": list(self.buckets),
+                "counts": list(self.bucket_counts),
+                "sum": self.latency_sum,
+                "count": self.calls,
+            },
+        }
+
+
+class PipelineMetrics(object):
+    """An object that wraps the nodes of a Bonobo graph to collect metrics
+    about where the time of a pipeline run goes.
+
+    For every node the following is recorded:
+
+    - calls and errors
+    - rows in (passed into the node) and rows out (generated by the node)
+    - bytes fetched over HTTP while the node was running
+    - wall and CPU time
+    - a histogram of the latency of each call
+
+    The time spent waiting on the nodes downstream of a generator node is not
+    counted towards it, only the time spent producing each value. Because Bonobo
+    runs every node in its own thread, the CPU time is measured per thread.
+
+    Example:
+        metrics = PipelineMetrics("OHLCPipeline")
+        graph.nodes[:] = [metrics.instrument(node) for node in graph.nodes]
+        ...
+        print(metrics.to_prometheus())
+
+    Arguments:
+        pipeline_name (str): The name of the pipeline the metrics belong to.
+
+        buckets (tuple): The upper bounds of the latency histogram buckets.
+
+    """
+    def __init__(self, pipeline_name, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.pipeline_name = pipeline_name
+        self.buckets = tuple(buckets)
+        self.nodes = {}
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _node_metrics(self, name):
+        "Internal method that returns the NodeMetrics of a node, creating it if needed."
+        with self._lock:
+            if name not in self.nodes:
+                self.nodes[name] = NodeMetrics(self.buckets)
+            return self.nodes[name]
+
+    def instrument(self, node, name=None):
+        """Method wraps a node so that every call to it is measured.
+
+        Nodes that return generators are wrapped in a generator so that only
+        the time spent producing each value is measured. Other return values
+        are passed through unchanged.
+
+        Arguments:
+            node (callable): The Bonobo node, eg: a bound Pipeline method.
+
+            name (str): The name the node is reported under. Defaults to the
+                name of the node.
+
+        Returns:
+            callable: The instrumented node.
+
+        """
+        name = name or getattr(node, "__name__", repr(node))
+        node_metrics = self._node_metrics(name)
+
+        @functools.wraps(node)
+        def instrumented_node(*args, **kwargs):
+            row_count = sum(count_rows(arg) for arg in args) if args else 0
+            latency = [0.0]
+
+            try:
+                with self._measure(name, node_metrics, latency):
+                    result = node(*args, **kwargs)
+            except Exception:
+                self._record_call(node_metrics, row_count, 0, latency[0])
+                raise
+
+            if inspect.isgenerator(result):
+                return self._drain(name, node_metrics, result, row_count, latency)
+
+            self._record_call(node_metrics, row_count, count_rows(result), latency[0])
+            return result
+
+        return instrumented_node
+
+    def _drain(self, name, node_metrics, generator, row_count, latency):
+        "Internal generator that measures each step of a node's generator."
+        rows_out = 0
+        try:
+            while True:
+                with self._measure(name, node_metrics, latency):
+                    try:
+                        value = next(generator)
+                    except StopIteration:
+                        return
+
+                rows_out += count_rows(value)
+                yield value
+
+        finally:
+            self._record_call(node_metrics, row_count, rows_out, latency[0])
+
+    def _measure(self, name, node_metrics, latency):
+        "Internal method returning the context manager that times a node step."
+        return _NodeStep(self, name, node_metrics, latency)
+
+    def _record_call(self, node_metrics, rows_in, rows_out, latency):
+        "Internal method that records a completed node call."
+        with self._lock:
+            node_metrics.calls += 1
+            node_metrics.rows_in += rows_in
+            node_metrics.rows_out += rows_out
+            node_metrics.observe_latency(latency)
+
+    def current_node(self):
+        "Method returns the name of the node running in the calling thread."
+        return getattr(self._local, "node", None)
+
+    def bind_current_node(self, func):
+        """Method wraps a function so that when it is called from another
+        thread (eg: a worker of a ThreadPoolExecutor started by a node) the
+        bytes it fetches are attributed to the node running in the calling thread.
+
+        Arguments:
+            func (callable): The function executed by the worker threads.
+
+        Returns:
+            callable: The wrapped function.
+
+        """
+        name = self.current_node()
+
+        @functools.wraps(func)
+        def bound_func(*args, **kwargs):
+            previous_node = getattr(self._local, "node", None)
+            self._local.node = name
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.node = previous_node
+
+        return bound_func
+
+    def record_bytes(self, n_bytes):
+        """Method adds fetched bytes to the node running in the calling thread.
+
+        Arguments:
+            n_bytes (int): The number of bytes fetched.
+
+        """
+        name = self.current_node()
+        if name is None:
+            return
+
+        node_metrics = self._node_metrics(name)
+        with self._lock:
+            node_metrics.bytes_fetched += n_bytes
+
+    def response_hook(self, response, *args, **kwargs):
+        """Method that can be registered as a requests response hook to
+        record the size of every response body fetched by a node.
+
+        The Content-Length header is used when present (the size on the wire,
+        before decompression), otherwise the length of the body is used.
+        """
+        content_length = response.headers.get("Content-Length")
+        if content_length is not None and content_length.isdigit():
+            self.record_bytes(int(content_length))
+        else:
+            self.record_bytes(len(response.content))
+
+        return response
+
+    def to_dict(self):
+        "Method returns all of the metrics as a json serializable dict."
+        with self._lock:
+            return {
+                "pipeline": self.pipeline_name,
+                "nodes": {name: node_metrics.to_dict() for name, node_metrics in self.nodes.items()},
+            }
+
+    def to_json(self, path=None):
+        """Method serializes the metrics to JSON.
+
+        Arguments:
+            path (str): If given, the path of the file the JSON is written to.
+
+        Returns:
+            str: The JSON string.
+
+        """
+        metrics_json = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "wt") as metrics_file:
+                metrics_file.write(metrics_json)
+
+        return metrics_json
+
+    def to_prometheus(self, path=None):
+        """Method serializes the metrics in the Prometheus text exposition
+        format, eg: for the node_exporter textfile collector.
+
+        Arguments:
+            path (str): If given, the path of the file the metrics are written to.
+
+        Returns:
+            str: The Prometheus metrics text.
+
+        """
+        metrics_dict = self.to_dict()
+        counters = [
+            ("etl_node_calls_total", "calls", "Number of times the pipeline node was called."),
+            ("etl_node_errors_total", "errors", "Number of node calls that raised an exception."),
+            ("etl_node_rows_in_total", "rows_in", "Number of rows passed into the node."),
+            ("etl_node_rows_out_total", "rows_out", "Number of rows generated by the node."),
+            ("etl_node_bytes_fetched_total", "bytes_fetched", "Number of bytes fetched over HTTP by the node."),
+            ("etl_node_wall_seconds_total", "wall_time_s", "Wall time spent running the node."),
+            ("etl_node_cpu_seconds_total", "cpu_time_s", "CPU time spent running the node."),
+        ]
+
+        lines = []
+        for metric_name, key, description in counters:
+            lines.append(f"# HELP {metric_name} {description}")
+            lines.append(f"# TYPE {metric_name} counter")
+            for node_name, node_dict in metrics_dict["nodes"].items():
+                lines.append(f"{metric_name}{{{self._labels(node_name)}}} {node_dict[key]}")
+
+        metric_name = "etl_node_latency_seconds"
+        lines.append(f"# HELP {metric_name} Latency of each call to the node.")
+        lines.append(f"# TYPE {metric_name} histogram")
+        for node_name, node_dict in metrics_dict["nodes"].items():
+            histogram = node_dict["latency_histogram"]
+            labels = self._labels(node_name)
+
+            cumulative_count = 0
+            for upper_bound, count in zip(histogram["buckets"], histogram["counts"]):
+                cumulative_count += count
+                lines.append(f'{metric_name}_bucket{{{labels},le="{upper_bound}"}} {cumulative_count}')
+
+            lines.append(f'{metric_name}_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{metric_name}_sum{{{labels}}} {histogram['sum']}")
+            lines.append(f"{metric_name}_count{{{labels}}} {histogram['count']}")
+
+        prometheus_text = "\n".join(lines) + "\n"
+        if path is not None:
+            with open(path, "wt") as metrics_file:
+                metrics_file.write(prometheus_text)
+
+        return prometheus_text
+
+    def _labels(self, node_name):
+        "Internal method that formats the Prometheus labels of a node."
+        escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"')
+        return f'pipeline="{escape(self.pipeline_name)}",node="{escape(node_name)}"'
+
+
+class _NodeStep(object):
+    """Internal context manager timing a single step of a node (the call
+    itself or producing one value of its generator) in the calling thread."""
+    def __init__(self, metrics, name, node_metrics, latency):
+        self.metrics = metrics
+        self.name = name
+        self.node_metrics = node_metrics
+        self.latency = latency
+
+    def __enter__(self):
+        self.previous_node = getattr(self.metrics._local, "node", None)
+        self.metrics._local.node = self.name
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.perf_counter() - self.wall_start
+        cpu_time = time.thread_time() - self.cpu_start
+        self.metrics._local.node = self.previous_node
+        self.latency[0] += wall_time
+
+        with self.metrics._lock:
+            self.node_metrics.wall_time += wall_time
+            self.node_metrics.cpu_time += cpu_time
+            if exc_type is not None:
+                self.node_metrics.errors += 1
+
+        return False
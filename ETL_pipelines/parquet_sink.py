@@ -0,0 +1,162 @@
+"Script containing the partitioned Parquet sink used to store OHLC history in a columnar format"
+
+# Importing External Packages:
+import os
+import shutil
+import tempfile
+import threading
+import pandas as pd
+
+# The price columns stored in every Parquet file, in a fixed order so that all
+# of the files of the dataset share the same schema:
+PARQUET_OHLC_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+def _import_pyarrow():
+    """Method imports pyarrow, which is an optional dependency only needed
+    by the Parquet sink and reader.
+
+    Returns:
+        tuple: The pyarrow and pyarrow.parquet modules.
+
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The Parquet OHLC sink requires pyarrow: pip install pyarrow") from e
+
+    return pa, pq
+
+def partition_path(root_dir, ticker, year=None):
+    """Method returns the hive-style directory of a ticker (and year) partition:
+    '{root_dir}/ticker={ticker}/year={year}'.
+
+    Arguments:
+        root_dir (str): The root directory of the Parquet dataset.
+
+        ticker (str): The ticker symbol.
+
+        year (int): The year of the partition. If None the ticker directory is returned.
+
+    Returns:
+        str: The partition directory.
+
+    """
+    ticker_dir = os.path.join(root_dir, f"ticker={ticker}")
+    if year is None:
+        return ticker_dir
+
+    return os.path.join(ticker_dir, f"year={int(year)}")
+
+
+class ParquetOHLCSink(object):
+    """A writer that stores OHLC price history as a Parquet dataset
+    partitioned by ticker and year:
+
+        {root_dir}/ticker=AAPL/year=2020/data.parquet
+
+    Each partition holds a single file containing the 'Date' column and the
+    price columns. Every file is written to a temporary file in the partition
+    directory first and moved into place with `os.replace()`, so readers never
+    see a partially written file and an interrupted run leaves the previous
+    file intact.
+
+    Writes are upserts: the bars of a year that are already stored are merged
+    with the incoming bars, the incoming bars winning on duplicate dates. Only
+    the partitions of the years present in the incoming dataframe are rewritten,
+    so a daily incremental run rewrites a single small file per ticker.
+
+    Like the other Pipeline services it is shared by the nodes of a pipeline
+    through the Bonobo services dict:
+
+        self.get_service("parquet_sink").write(ticker, price_df)
+
+    Arguments:
+        root_dir (str): The root directory of the Parquet dataset.
+
+        compression (str): The Parquet compression codec. Defaults to 'snappy'.
+
+    """
+    def __init__(self, root_dir, compression="snappy"):
+
+        # Declaring instance params:
+        self.root_dir = root_dir
+        self.compression = compression
+
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _ticker_lock(self, ticker):
+        "Internal method returning the lock serializing the writes of a ticker."
+        with self._locks_lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _to_frame(self, ohlc_df):
+        """Internal method converting an OHLC dataframe indexed by Date into
+        the fixed schema stored in the Parquet files."""
+        frame = ohlc_df.reindex(columns=list(PARQUET_OHLC_COLUMNS)).astype("float64")
+        frame.index = pd.DatetimeIndex(ohlc_df.index, name="Date")
+
+        return frame.reset_index()
+
+    def _write_file(self, path, frame):
+        "Internal method atomically writing a dataframe to a Parquet file."
+        pa, pq = _import_pyarrow()
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Files starting with '.' are skipped by pyarrow dataset readers scanning the directory:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            pq.write_table(table, tmp_path, compression=self.compression)
+            os.replace(tmp_path, path)
+
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def write(self, ticker, ohlc_df, replace=False):
+        """Method upserts a ticker's OHLC dataframe into its year partitions.
+
+        Arguments:
+            ticker (str): The ticker symbol.
+
+            ohlc_df (pandas.DataFrame): The OHLC dataframe indexed by Date.
+
+            replace (bool): If True every stored partition of the ticker is replaced
+                and the years missing from the dataframe are removed. Defaults to False.
+
+        """
+        _, pq = _import_pyarrow()
+        frame = self._to_frame(ohlc_df)
+        years = frame["Date"].dt.year
+
+        with self._ticker_lock(ticker):
+            for year, year_frame in frame.groupby(years):
+                path = os.path.join(partition_path(self.root_dir, ticker, year), "data.parquet")
+
+                # Merging the incoming bars with the bars already stored for the year:
+                if not replace and os.path.exists(path):
+                    stored_frame = pq.read_table(path).to_pandas()
+                    year_frame = pd.concat([stored_frame, year_frame], ignore_index=True)
+
+                year_frame = year_frame.drop_duplicates("Date", keep="last").sort_values("Date")
+                self._write_file(path, year_frame)
+
+            # Removing the partitions of years that are no longer in the history:
+            if replace:
+                ticker_dir = partition_path(self.root_dir, ticker)
+                kept = {f"year={int(year)}" for year in years.unique()}
+                for entry in os.listdir(ticker_dir):
+                    if entry.startswith("year=") and entry not in kept:
+                        shutil.rmtree(os.path.join(ticker_dir, entry))
+
+    def close(self):
+        "Method exists so that the sink can be closed like the other Pipeline services."
+        pass
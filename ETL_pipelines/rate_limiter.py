@@ -0,0 +1,87 @@
+"Script containing the token-bucket rate limiter used to pace requests made by the Pipeline APIs"
+
+# Importing External Packages:
+import threading
+import time
+
+class TokenBucket(object):
+    """A thread-safe token bucket that limits the rate at which requests
+    are made to a host, no matter how many threads are making them.
+
+    The bucket holds at most `capacity` tokens and is refilled at `rate` tokens
+    per second. Every request takes a token, blocking until one is available, so
+    in the long run requests are made at no more than `rate` per second while
+    short bursts of up to `capacity` requests are allowed.
+
+    Example:
+        limiter = TokenBucket(rate=10, capacity=1)
+        limiter.acquire() # Blocks until a request can be made.
+        response = session.get(url)
+
+    Arguments:
+        rate (float): The number of tokens added to the bucket per second.
+
+        capacity (float): The maximum number of tokens the bucket can hold (the
+            largest burst allowed). Defaults to `rate`.
+
+    """
+    def __init__(self, rate, capacity=None):
+
+        if rate <= 0:
+            raise ValueError(f"The rate of a TokenBucket must be positive, not {rate}")
+
+        # Declaring instance params:
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        "Internal method adding the tokens accumulated since the last refill."
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens=1):
+        """Method takes tokens from the bucket if they are available
+        without blocking.
+
+        Arguments:
+            tokens (float): The number of tokens taken.
+
+        Returns:
+            bool: True if the tokens were taken, False otherwise.
+
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+
+            return False
+
+    def acquire(self, tokens=1):
+        """Method takes tokens from the bucket, blocking the calling thread
+        until enough tokens are available.
+
+        Arguments:
+            tokens (float): The number of tokens taken.
+
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket with a capacity of {self.capacity}")
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                # Time until enough tokens have accumulated:
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
@@ -0,0 +1,430 @@
+"""Script containing the resident, in-process scheduler of the Pipeline APIs.
+
+Running each pipeline from cron starts a new interpreter for every run, which
+imports pandas, bonobo, yfinance and praw again, rebuilds the Bonobo argument
+parser and opens new HTTP connections and database sessions. A PipelineScheduler
+instead keeps a single process running:
+
+- Pipelines are constructed once, without being executed (eg: with `execute=False`),
+    when they are registered, so imports, praw clients and configuration are warm.
+- Every pipeline is run on its own cron-like cadence through `Pipeline.run()`
+    with the Bonobo options parsed once. Its services (the pooled 'http' session,
+    the HTTP cache, the rate limiters, ...) stay open between runs, only the
+    `per_run_services` such as the 'sqlite_sink' are flushed and closed after each run.
+- At most `max_concurrent_runs` pipelines run at once, each in a worker thread. A
+    pipeline whose previous run has not finished skips its next run.
+
+Example:
+    scheduler = PipelineScheduler(max_concurrent_runs=2)
+    scheduler.register("compositions", lambda: CompositionSuitePipeline("stocks.sqlite", execute=False), "0 6 * * 1-5")
+    scheduler.register("learnpython", lambda: RedditContentPipeline("reddit.sqlite", "learnpython", execute=False), "*/30 * * * *")
+    scheduler.run_forever()
+
+"""
+# Importing External Packages:
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Importing the Base Pipeline API Object:
+from ETL_pipelines.base_pipeline import Pipeline
+
+# Shorthands for common cron expressions:
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *"
+}
+
+# The name and range of values of each field of a cron expression (7 is also Sunday):
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7)
+)
+
+# The maximum number of seconds the scheduler sleeps before checking the clock again:
+MAX_SLEEP = 60.0
+
+def _parse_cron_field(field, name, low, high):
+    """Internal method parsing a single field of a cron expression, eg: '*/15',
+    '1-5' or '0,30', into the set of values it matches.
+
+    Returns:
+        frozenset: The values matched by the field.
+
+    """
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+            if step < 1:
+                raise ValueError(f"The step of the cron {name} field must be at least 1: '{field}'")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+
+        if not low <= start <= end <= high:
+            raise ValueError(f"The cron {name} field must be within {low}-{high}: '{field}'")
+
+        values.update(range(start, end + 1, step))
+
+    return frozenset(values)
+
+class CronSchedule(object):
+    """A cron-like cadence parsed from a standard five field cron expression
+    'minute hour day month weekday', eg: '*/15 * * * *' or '0 6 * * 1-5'.
+
+    Each field is either '*', a value, a range ('1-5'), a list ('0,30') or any of
+    these with a step ('*/15', '0-30/10'). Weekdays go from 0 (Sunday) to 6, 7 is
+    also Sunday. As in cron, when both the day and the weekday are restricted a
+    date matching either one of them matches. The aliases in CRON_ALIASES (eg:
+    '@daily') are also accepted. Times are in the local time of the process.
+
+    Arguments:
+        expression (str): The cron expression.
+
+    """
+    def __init__(self, expression):
+
+        # Declaring instance params:
+        self.expression = expression
+
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"A cron expression has {len(CRON_FIELDS)} fields, not {len(fields)}: '{expression}'")
+
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(field, name, low, high) for field, (name, low, high) in zip(fields, CRON_FIELDS))
+        self.weekdays = frozenset(weekday % 7 for weekday in weekdays)
+
+        self._day_restricted = not fields[2].startswith("*")
+        self._weekday_restricted = not fields[4].startswith("*")
+
+    def __repr__(self):
+        return f"CronSchedule('{self.expression}')"
+
+    def matches_date(self, moment):
+        "Method returns True if the date of a datetime matches the day, month and weekday fields."
+        if moment.month not in self.months:
+            return False
+
+        day_match = moment.day in self.days
+        weekday_match = moment.isoweekday() % 7 in self.weekdays
+
+        if self._day_restricted and self._weekday_restricted:
+            return day_match or weekday_match
+
+        return day_match and weekday_match
+
+    def next_after(self, moment):
+        """Method returns the first time matched by the schedule after a given time.
+
+        Arguments:
+            moment (datetime.datetime): The time after which the next run is due.
+
+        Returns:
+            datetime.datetime: The next matching minute, strictly after moment.
+
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+        # Every valid expression matches at least once within a leap year cycle:
+        limit = candidate + timedelta(days=366 * 4)
+
+        while candidate <= limit:
+            if not self.matches_date(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+
+        raise ValueError(f"The cron expression '{self.expression}' never matches a date")
+
+class ScheduledPipeline(object):
+    """A pipeline registered with a PipelineScheduler, along with its
+    schedule and the state of its runs.
+
+    Arguments:
+        name (str): The name the pipeline is registered under.
+
+        pipeline (Pipeline): The constructed pipeline.
+
+        schedule (CronSchedule): The cadence of the pipeline's runs.
+
+        next_run (datetime.datetime): The time of the next run.
+
+    """
+    def __init__(self, name, pipeline, schedule, next_run):
+
+        # Declaring instance params:
+        self.name = name
+        self.pipeline = pipeline
+        self.schedule = schedule
+        self.next_run = next_run
+
+        self.running = False
+        self.retired = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_started = None
+        self.last_finished = None
+        self.last_error = None
+
+    def status(self):
+        """Method returns the state of the pipeline's runs.
+
+        Returns:
+            dict: The schedule, the next run time, the number of runs, failures
+                and skipped runs and the time and error of the last run.
+
+        """
+        return {
+            "schedule": self.schedule.expression,
+            "next_run": self.next_run,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_error": repr(self.last_error) if self.last_error is not None else None
+        }
+
+class PipelineScheduler(object):
+    """A long-lived scheduler running registered pipelines on cron-like
+    cadences inside the current process (see the module documentation).
+
+    Runs are executed by a pool of `max_concurrent_runs` worker threads. A run
+    that fails is reported and counted, it does not stop the scheduler or the
+    next runs of the pipeline. Runs that were missed (eg: while the process was
+    suspended) are not caught up, the pipeline runs once and is rescheduled from
+    the current time.
+
+    Arguments:
+        max_concurrent_runs (int): The maximum number of pipelines running at
+            once. Defaults to 2.
+
+        options (dict): The Bonobo options passed to every run, instead of being
+            parsed from the command line for each run. Defaults to no options.
+
+    """
+    def __init__(self, max_concurrent_runs=2, options=None):
+
+        if max_concurrent_runs < 1:
+            raise ValueError(f"max_concurrent_runs must be at least 1, not {max_concurrent_runs}")
+
+        # Declaring instance params:
+        self.max_concurrent_runs = max_concurrent_runs
+        self.options = dict(options or {})
+
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_runs, thread_name_prefix="pipeline-run")
+
+    def register(self, name, pipeline, cron):
+        """Method registers a pipeline to be run on a cron-like cadence.
+
+        The pipeline is constructed once, when it is registered, and the same
+        object is run every time. It must be constructed without being executed,
+        eg: `SPYCompositionPipeline(dbpath, execute=False)`.
+
+        Arguments:
+            name (str): The unique name of the pipeline, eg: 'spy_composition'.
+
+            pipeline (Pipeline|callable): The pipeline, or a function without
+                arguments constructing it.
+
+            cron (str|CronSchedule): The cadence of the runs, eg: '0 6 * * 1-5'.
+
+        Returns:
+            ScheduledPipeline: The registered pipeline and the state of its runs.
+
+        """
+        if not isinstance(pipeline, Pipeline):
+            pipeline = pipeline()
+
+        schedule = cron if isinstance(cron, CronSchedule) else CronSchedule(cron)
+
+        with self._lock:
+            if name in self.jobs:
+                raise ValueError(f"A pipeline is already registered under the name {name}")
+
+            job = ScheduledPipeline(name, pipeline, schedule, schedule.next_after(datetime.now()))
+            self.jobs[name] = job
+
+        # Waking the scheduler up in case the new pipeline is due first:
+        self._wakeup.set()
+
+        return job
+
+    def unregister(self, name):
+        """Method removes a pipeline from the scheduler and closes its services.
+        A run in progress is completed before the services are closed.
+
+        Arguments:
+            name (str): The name the pipeline was registered under.
+
+        """
+        with self._lock:
+            job = self.jobs.pop(name)
+            job.retired = True
+            running = job.running
+
+        # A running pipeline closes its services once its run is done:
+        if not running:
+            job.pipeline.close_services()
+
+    def run_pending(self, now=None):
+        """Method starts a run of every pipeline that is due and reschedules it.
+
+        A pipeline that is still running its previous run skips the run.
+
+        Arguments:
+            now (datetime.datetime): The current time. Defaults to now.
+
+        Returns:
+            list: The futures of the runs that were started.
+
+        """
+        now = now or datetime.now()
+        futures = []
+
+        with self._lock:
+            for job in self.jobs.values():
+                if job.next_run > now:
+                    continue
+
+                job.next_run = job.schedule.next_after(now)
+
+                if job.running:
+                    job.skipped += 1
+                    print(f"Skipping the run of {job.name}, its previous run has not finished")
+                    continue
+
+                job.running = True
+                futures.append(self._executor.submit(self._run_job, job))
+
+        return futures
+
+    def run_now(self, name):
+        """Method starts a run of a pipeline immediately, outside of its schedule.
+
+        Arguments:
+            name (str): The name the pipeline was registered under.
+
+        Returns:
+            concurrent.futures.Future: The future of the run, None if the pipeline
+                is already running.
+
+        """
+        with self._lock:
+            job = self.jobs[name]
+            if job.running:
+                return None
+
+            job.running = True
+
+        return self._executor.submit(self._run_job, job)
+
+    def _run_job(self, job):
+        "Internal method executing a single run of a registered pipeline in a worker thread."
+        job.last_started = datetime.now()
+        try:
+            job.pipeline.run(resident=True, **self.options)
+
+        except Exception as e:
+            job.failures += 1
+            job.last_error = e
+            print(f"The run of {job.name} failed:")
+            traceback.print_exc()
+
+        else:
+            job.last_error = None
+
+        finally:
+            with self._lock:
+                job.runs += 1
+                job.running = False
+                job.last_finished = datetime.now()
+                retired = job.retired
+
+            if retired:
+                job.pipeline.close_services()
+
+    def seconds_until_next_run(self, now=None):
+        "Method returns the number of seconds until the next pipeline is due, None if none is registered."
+        now = now or datetime.now()
+        with self._lock:
+            next_runs = [job.next_run for job in self.jobs.values()]
+
+        if not next_runs:
+            return None
+
+        return max((min(next_runs) - now).total_seconds(), 0.0)
+
+    def status(self):
+        """Method returns the state of every registered pipeline.
+
+        Returns:
+            dict: A dict mapping each pipeline name to its `ScheduledPipeline.status()`.
+
+        """
+        with self._lock:
+            return {name: job.status() for name, job in self.jobs.items()}
+
+    def run_forever(self):
+        """Method runs the registered pipelines on their schedules until `stop()`
+        is called (or the process is interrupted), then waits for the runs in
+        progress and closes the services of every pipeline."""
+        try:
+            while not self._stopped.is_set():
+                self.run_pending()
+
+                # Sleeping until the next run is due, a pipeline is registered or the scheduler is stopped:
+                timeout = self.seconds_until_next_run()
+                self._wakeup.wait(MAX_SLEEP if timeout is None else min(timeout, MAX_SLEEP))
+                self._wakeup.clear()
+
+        except KeyboardInterrupt:
+            print("Stopping the pipeline scheduler")
+
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        "Method stops `run_forever()` once the scheduler wakes up, which it does immediately."
+        self._stopped.set()
+        self._wakeup.set()
+
+    def shutdown(self):
+        """Method waits for the runs in progress and closes the services of every
+        registered pipeline. The scheduler cannot be used after it is shut down."""
+        self._stopped.set()
+        self._executor.shutdown(wait=True)
+
+        with self._lock:
+            jobs = list(self.jobs.values())
+
+        for job in jobs:
+            job.pipeline.close_services()
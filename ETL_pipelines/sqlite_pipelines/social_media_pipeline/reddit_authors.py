@@ -0,0 +1,265 @@
+"Script containing the cached, batched enrichment of Reddit post authors used by the Reddit Pipeline APIs"
+
+# Importing Data Manipulation packages:
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# The Redditor attributes added to every post, in the order of the post dataframe columns:
+AUTHOR_ATTRIBUTES = ("is_gold", "is_mod", "has_verified_email", "created_utc", "comment_karma")
+
+# The attributes stored as sqlite 0/1 integers that are read back from the cache as booleans:
+BOOLEAN_AUTHOR_ATTRIBUTES = ("is_gold", "is_mod", "has_verified_email")
+
+# Default location of the author cache on disk:
+DEFAULT_AUTHOR_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "etl_pipelines", "reddit_authors.sqlite")
+
+class RedditAuthorCache(object):
+    """A persistent cache of Redditor account attributes stored in a small
+    sqlite database and keyed on the author name.
+
+    Reading `is_gold`, `is_mod`, etc. from a lazy PRAW Redditor makes a blocking
+    request to the Reddit API. These attributes change slowly and the same
+    authors post in a subreddit day after day, so they are cached for `ttl`
+    seconds and shared by every Reddit pipeline (and every run) using the cache.
+
+    Like the other Pipeline services it is shared by the nodes of a pipeline
+    through the Bonobo services dict under the name 'reddit_author_cache'.
+
+    Arguments:
+        path (str): The path to the sqlite database the cache is stored in.
+
+        ttl (float): The number of seconds the attributes of an author are used
+            before being fetched again. Defaults to 7 days.
+
+    """
+    def __init__(self, path=DEFAULT_AUTHOR_CACHE_PATH, ttl=7 * 24 * 3600):
+
+        # Declaring instance params:
+        self.path = path
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""CREATE TABLE IF NOT EXISTS authors (
+            name TEXT PRIMARY KEY,
+            is_gold INTEGER,
+            is_mod INTEGER,
+            has_verified_email INTEGER,
+            created_utc REAL,
+            comment_karma INTEGER,
+            fetched_at REAL NOT NULL
+        )""")
+        self._con.commit()
+
+    def get_many(self, names):
+        """Method reads the cached attributes of the authors that were fetched
+        less than `ttl` seconds ago.
+
+        Arguments:
+            names (list): The author names.
+
+        Returns:
+            dict: A dict mapping each cached author name to the list of its
+                AUTHOR_ATTRIBUTES values.
+
+        """
+        names = list(names)
+        cached = {}
+        oldest = time.time() - self.ttl
+
+        with self._lock:
+            for position in range(0, len(names), 500):
+                batch = names[position:position + 500]
+                rows = self._con.execute(
+                    "SELECT name, {} FROM authors WHERE fetched_at >= ? AND name IN ({})".format(
+                        ", ".join(AUTHOR_ATTRIBUTES), ", ".join("?" for _ in batch)),
+                    [oldest] + batch).fetchall()
+
+                cached.update((row[0], self._row_values(row[1:])) for row in rows)
+
+            self.hits += len(cached)
+            self.misses += len(names) - len(cached)
+
+        return cached
+
+    def _row_values(self, row):
+        "Internal method converting the stored attributes of an author back to the types PRAW returns."
+        return [
+            bool(value) if attribute in BOOLEAN_AUTHOR_ATTRIBUTES and value is not None else value
+            for attribute, value in zip(AUTHOR_ATTRIBUTES, row)]
+
+    def put_many(self, authors):
+        """Method stores the attributes of fetched authors in the cache.
+
+        Arguments:
+            authors (dict): A dict mapping each author name to the list of its
+                AUTHOR_ATTRIBUTES values.
+
+        """
+        if not authors:
+            return
+
+        now = time.time()
+        with self._lock:
+            with self._con:
+                self._con.executemany(
+                    "INSERT OR REPLACE INTO authors (name, {}, fetched_at) VALUES (?, {}, ?)".format(
+                        ", ".join(AUTHOR_ATTRIBUTES), ", ".join("?" for _ in AUTHOR_ATTRIBUTES)),
+                    [(name, *values, now) for name, values in authors.items()])
+
+    def stats(self):
+        "Method returns the hit and miss counters of the cache."
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        "Method closes the cache's sqlite connection."
+        with self._lock:
+            self._con.close()
+
+
+class RedditClientPool(object):
+    """A pool of praw.Reddit clients built from the same credentials.
+
+    PRAW clients are not thread-safe: their requestor, authorizer and rate limit
+    state are shared by every object they create. Threads making PRAW requests
+    at the same time each borrow a client of their own from the pool, which
+    builds clients on demand and keeps them to be reused by later requests
+    (and later runs of a resident pipeline).
+
+    Like the other Pipeline services it is shared by the nodes of a pipeline
+    through the Bonobo services dict under the name 'reddit_clients':
+
+        with self.get_service("reddit_clients").client() as reddit:
+            posts = list(reddit.subreddit("learnpython").rising())
+
+    Arguments:
+        factory (callable): A function without arguments building a new praw.Reddit.
+
+    """
+    def __init__(self, factory):
+
+        # Declaring instance params:
+        self.factory = factory
+
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def client(self):
+        """Method lends a client to the calling thread, which is the only thread
+        using it until the block exits.
+
+        Yields:
+            praw.Reddit: The borrowed client.
+
+        """
+        with self._lock:
+            reddit = self._idle.pop() if self._idle else None
+
+        if reddit is None:
+            reddit = self.factory()
+
+        try:
+            yield reddit
+        finally:
+            with self._lock:
+                self._idle.append(reddit)
+
+
+def fetch_author_attributes(redditor):
+    """Method fetches the AUTHOR_ATTRIBUTES of a single lazy PRAW Redditor.
+
+    Arguments:
+        redditor (praw.models.Redditor): The post author.
+
+    Returns:
+        list: The list of attribute values, or None if the account could not be
+            fetched (eg: it was deleted or suspended).
+
+    """
+    try:
+        return [getattr(redditor, attribute) for attribute in AUTHOR_ATTRIBUTES]
+    except Exception:
+        return None
+
+def enrich_authors(redditors, cache=None, max_workers=8, wrap=None, clients=None):
+    """Method looks up the account attributes of the authors of a batch of
+    posts.
+
+    Authors are deduplicated by name so every author is fetched at most once per
+    batch, cached authors are read from the cache with a few bulk queries and
+    the remaining authors are fetched concurrently by `max_workers` threads
+    before being written back to the cache.
+
+    The Redditor objects of the posts are bound to the PRAW client that listed
+    them, which is not thread-safe. The worker threads therefore fetch each author
+    by name through a client borrowed from `clients`. Without a client pool the
+    authors are fetched one after another in the calling thread.
+
+    The Reddit API has no bulk endpoint that returns the gold, moderator and
+    verified email status of accounts, so authors missing from the cache are still
+    fetched one request each. Deduplicating and caching them is what removes
+    the N+1 requests from a daily run.
+
+    Arguments:
+        redditors (list): The lazy PRAW Redditor objects of the posts (None for
+            deleted authors).
+
+        cache (RedditAuthorCache): The persistent cache. If None every author is fetched.
+
+        max_workers (int): The number of threads fetching authors concurrently.
+
+        wrap (callable): An optional function wrapping the fetch function before it
+            is passed to the worker threads, eg: `PipelineMetrics.bind_current_node`.
+            The wrapped function is called with the author name.
+
+        clients (RedditClientPool): The clients used by the worker threads. If None
+            the authors are fetched serially.
+
+    Returns:
+        dict: A dict mapping each author name to the list of its AUTHOR_ATTRIBUTES
+            values. Authors that could not be fetched are left out.
+
+    """
+    # Deduplicating the authors of the batch by name:
+    unique_redditors = {str(redditor): redditor for redditor in redditors if redditor is not None}
+
+    authors = cache.get_many(unique_redditors.keys()) if cache is not None else {}
+    missing = [name for name in unique_redditors if name not in authors]
+
+    if missing:
+        if clients is None:
+            fetch_author = lambda name: fetch_author_attributes(unique_redditors[name])
+        else:
+            def fetch_author(name):
+                with clients.client() as reddit:
+                    return fetch_author_attributes(reddit.redditor(name))
+
+        fetch = wrap(fetch_author) if wrap is not None else fetch_author
+
+        if clients is None:
+            # The Redditors share the single client that listed them:
+            fetched = {name: fetch(name) for name in missing}
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched = dict(zip(missing, executor.map(fetch, missing)))
+
+        fetched = {name: values for name, values in fetched.items() if values is not None}
+        if cache is not None:
+            cache.put_many(fetched)
+
+        authors.update(fetched)
+
+    return authors
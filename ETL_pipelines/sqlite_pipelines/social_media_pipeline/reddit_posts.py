@@ -1,14 +1,24 @@
 # Importing Data Manipulation packages:
 import pandas as pd
-import sqlite3
 import bonobo
+import sqlite3
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Python Reddit API Wrapper:
 import praw
 
 # Importing the Base Pipeline API Object:
 from ETL_pipelines.base_pipeline import Pipeline
+from ETL_pipelines.rate_limiter import TokenBucket
+from ETL_pipelines.sqlite_pipelines.social_media_pipeline.reddit_authors import RedditAuthorCache, RedditClientPool, enrich_authors
+
+# The maximum number of post ids checked by each dedup query, kept below
+# sqlite's default limit of 999 bound parameters per statement:
+DEDUP_BATCH_SIZE = 500
+
+# The number of submissions returned by each page of a Reddit listing request:
+LISTING_PAGE_SIZE = 100
 
 class RedditContentPipeline(Pipeline):
     """An object that contains all the logic and methods
@@ -27,6 +37,12 @@ class RedditContentPipeline(Pipeline):
     See graphviz plots of the bonobo graph for a structure outline of how data flows.
     Once again all credit goes to Bonobo and Pandas for the actual heavy lifting.
 
+    The account attributes of post authors are looked up once per author per
+    batch, read from a persistent 'reddit_author_cache' service when they were
+    fetched recently and otherwise fetched concurrently by `author_fetch_workers`
+    threads (see `reddit_authors.enrich_authors()`). Every thread uses its own PRAW
+    client, borrowed from the 'reddit_clients' service.
+
     Example:
         test_pipeline = EDGARFilingsPipeline("test.sqlite", "learnpython")
  
@@ -36,27 +52,32 @@ class RedditContentPipeline(Pipeline):
 
         subreddit (str): The string that indicates the specific subreddit
             that the data is to be scraped from.
+
+        execute (bool): If the pipeline is executed when it is constructed. Defaults to True.
     """
-    def __init__(self, dbpath, subreddit_name, **kwargs):
+    # Keyword arguments passed to the RedditAuthorCache service, None disables the cache:
+    author_cache_params = {}
+
+    # The number of threads fetching uncached authors:
+    author_fetch_workers = 8
+
+    def __init__(self, dbpath, subreddit_name, execute=True, **kwargs):
 
         # Initalizing the parent Pipeline object:
         super(RedditContentPipeline, self).__init__(dbpath)
         self.subreddit_name = subreddit_name
 
         # Creating a reddit praw instance based on specified subreddit:
-        # TODO: Add logic to extract praw config from KWARGS instead of env params.
-        self.reddit = praw.Reddit(
-            client_id = os.environ["CLIENT_ID"],
-            client_secret= os.environ["CLIENT_SECRET"],
-            user_agent = os.environ["USER_AGENT"]
-        )
+        self.reddit = self._new_reddit_client()
 
         self.subreddit = self.reddit.subreddit(self.subreddit_name)
 
         print(f"Reddit Instance Initalized with Read Status:{self.reddit.read_only}")
 
-        # Execuring all of the ETL functions mapped in the graph:
-        self.execute_pipeline()
+        # Execuring all of the ETL functions mapped in the graph, unless the pipeline
+        # is constructed to be run later (eg: by a scheduler):
+        if execute:
+            self.execute_pipeline()
 
     def extract_rising_posts(self):
         """Method extracts the current rising reddit submissions from a subreddit
@@ -82,27 +103,9 @@ class RedditContentPipeline(Pipeline):
                 }
 
         """
-        posts_dict = {}
-
-        # Iterating through the rising posts constructing and generating dicts:
-        for post in self.subreddit.rising():
-
-            # Building the single dict key-value pair:
-            post_content_lst = [
-                post.title,
-                post.selftext,
-                post.upvote_ratio,
-                post.score,
-                post.num_comments,
-                post.created_utc,
-                post.stickied,
-                post.over_18,
-                post.spoiler,
-                post.permalink,
-                post.author
-            ]
-
-            posts_dict[post.id] = post_content_lst
+        # The extraction legs run in seperate threads, each using its own client:
+        with self.get_service("reddit_clients").client() as reddit:
+            posts_dict = self._build_posts_dict(reddit.subreddit(self.subreddit_name).rising())
 
         yield posts_dict
 
@@ -130,33 +133,69 @@ class RedditContentPipeline(Pipeline):
                 }
 
         """
-        posts_dict = {}
+        # The extraction legs run in seperate threads, each using its own client:
+        with self.get_service("reddit_clients").client() as reddit:
+            posts_dict = self._build_posts_dict(reddit.subreddit(self.subreddit_name).top("day"))
 
-        # Iterating through the rising posts constructing and generating dicts:
-        for post in self.subreddit.top("day"):
+        yield posts_dict
 
-            # Building the single dict key-value pair:
-            post_content_lst = [
-                post.title,
-                post.selftext,
-                post.upvote_ratio,
-                post.score,
-                post.num_comments,
-                post.created_utc,
-                post.stickied,
-                post.over_18,
-                post.spoiler,
-                post.permalink,
-                post.author
-            ]
+    def extract_posts(self):
+        """Method runs every extraction leg of the pipeline (see `post_extraction_legs()`)
+        concurrently and yields the union of their posts once.
 
-            posts_dict[post.id] = post_content_lst
+        A post listed in both the top and rising tabs is only looked up, enriched
+        and written once. If a leg raises the error is raised by this node and no
+        posts are written.
 
-        yield posts_dict
+        Yields: Dict
+            The merged dict of posts, in the format yielded by the extraction methods.
+
+        """
+        legs = self.post_extraction_legs()
+        metrics = getattr(self, "metrics", None)
+
+        def run_leg(extract_method):
+            return list(extract_method())
+
+        run_leg = metrics.bind_current_node(run_leg) if metrics is not None else run_leg
+
+        with ThreadPoolExecutor(max_workers=len(legs)) as executor:
+            legs_output = list(executor.map(run_leg, legs))
+
+        yield self.merge_posts(legs_output)
+
+    def merge_posts(self, legs_output):
+        """Method unions the post dicts yielded by the extraction legs by post id.
+        A post seen by more than one leg keeps the content of the first leg.
+
+        Arguments:
+            legs_output (list): For each leg of `post_extraction_legs()`, in order,
+                the list of the post dicts it yielded.
+
+        Returns:
+            dict: The merged dict of posts.
+
+        """
+        legs = self.post_extraction_legs()
+        if len(legs_output) != len(legs):
+            raise ValueError(f"Expected the posts of {len(legs)} extraction legs, got {len(legs_output)}")
+
+        merged_posts = {}
+        for extract_method, leg_output in zip(legs, legs_output):
+
+            # A leg yielding nothing means its posts would silently be missing from the run:
+            if len(leg_output) == 0:
+                raise ValueError(f"The extraction leg {extract_method.__name__} yielded no posts dict")
+
+            for posts_dict in leg_output:
+                for post_id, content_lst in posts_dict.items():
+                    merged_posts.setdefault(post_id, content_lst)
+
+        return merged_posts
 
     def transform_posts(self, *args):
-        """The method recieves a length 1 tuple containing a dict of reddit posts generated 
-        from the extraction methods and performs transformation on the dict to convert it 
+        """The method recieves a length 1 tuple containing the dict of reddit posts merged
+        from the extraction methods by `extract_posts()` and performs transformation on the dict to convert it 
         into a dataframe of elements that are not already stored in the database.
 
         The dictionary recieved from the extraction methods are in the format:
@@ -166,9 +205,8 @@ class RedditContentPipeline(Pipeline):
             idn: [title, content, upvote_ratio, score, num_comments, created_on, stickied, over_18, spoiler, permalink, author]
         }
                     
-        The transformation method queries the database for existing posts posted on the
-        day that the pipeline is executed. It compares the index of the database data 
-        and the index of the data recieved from the extraction methods. Only unique
+        The transformation method queries the database for the ids of the extracted
+        posts that are already stored (see `_existing_post_ids()`). Only unique
         elements not already in the database are passed into the load method.
 
         When converting a dictionary to a unique elements Dataframe the method unpacks
@@ -186,27 +224,39 @@ class RedditContentPipeline(Pipeline):
         """
         # Unpacking Args Tuple:
         posts_dict = args[0]
-        
-        # Querying existing posts from the database during current day:
-        con = sqlite3.connect(self.dbpath)
 
-        # TODO: Refine SQL Query to only extract data from database from the current day:
-        existing_posts_id = []
-        try:
-            existing_posts = pd.read_sql_query(f"SELECT * FROM {self.subreddit_name}_posts", con, index_col="id")
-            existing_posts_id = existing_posts.index
-        except:
-            pass
+        yield self._build_posts_df(posts_dict, self.subreddit_name)
+
+    def _build_posts_df(self, posts_dict, subreddit_name):
+        """Internal method converting a dict of extracted posts into the dataframe
+        of the posts that are not already stored for a subreddit, as described in
+        `transform_posts()`.
+
+        Arguments:
+            posts_dict (dict): The dict of extracted posts {id: [title, ..., author]}.
+
+            subreddit_name (str): The subreddit the posts were extracted from.
+
+        Returns:
+            DataFrame: The dataframe of unique posts indexed by id.
+
+        """
+        # Querying the database for the extracted post ids that are already stored:
+        existing_posts_id = self._existing_post_ids(list(posts_dict.keys()), subreddit_name)
 
         # Extracting unqiue keys from the posts_dict.keys() that are not present in the existing_post_id:
-        unique_id_keys = list(set(posts_dict.keys()) - set(existing_posts_id))
+        unique_id_keys = set(posts_dict.keys()) - set(existing_posts_id)
+
+        # Looking up the account attributes of every distinct author of the unique posts at once:
+        author_attributes = self._enrich_post_authors(
+            [content_lst[-1] for post_id, content_lst in posts_dict.items() if post_id in unique_id_keys])
 
         # Unpacking the "Author" parameter and extending Author derived params to the end of the content
         #  list for each dict key-value pair that is unique (not in the database):
         unique_posts_dict = {
 
             # Unpacking list for faster appending:
-            post_id:self._transform_post_content_lst(content_lst) for post_id, content_lst 
+            post_id:self._transform_post_content_lst(content_lst, author_attributes) for post_id, content_lst 
             in posts_dict.items() if post_id in unique_id_keys
             
             }
@@ -225,11 +275,11 @@ class RedditContentPipeline(Pipeline):
         # Converting 'author' column data type to string:
         posts_df['author'] = posts_df.author.astype(str)
 
-        yield posts_df
+        return posts_df
          
     def load_posts(self, *args):
         """Method writes the reddit posts dataframe into
-        the sqlite database. 
+        the sqlite database through the shared sqlite_sink service. 
         
         The reddit posts dataframe that is wrtiten to the database is in the following
         format:
@@ -247,20 +297,31 @@ class RedditContentPipeline(Pipeline):
         """
         posts_df = args[0]
 
-        # Creating connection to the database:
-        con = sqlite3.connect(self.dbpath)
+        self._write_posts_df(posts_df, self.subreddit_name)
 
-        # Writing the data to the database via pandas API:
-        posts_df.to_sql(f"{self.subreddit_name}_posts", con, if_exists="append", index_label="id")
+    def _write_posts_df(self, posts_df, subreddit_name):
+        "Internal method buffering a posts dataframe in the sqlite sink for the `{subreddit}_posts` table."
+        # Writing the data to the database via the shared sqlite sink. New tables are
+        # keyed on the post id and posts stored by a concurrent run are skipped:
+        self.get_service("sqlite_sink").write(
+            f"{subreddit_name}_posts",
+            posts_df,
+            if_exists="append",
+            index_label="id",
+            primary_key=["id"],
+            on_conflict="ignore")
 
     def build_graph(self, **options):
         """The method that is used to construct a Bonobo ETL pipeline
         DAG that schedules the following ETL methods:
 
-        - Extraction: extract_daily_top_posts, extract_rising_posts
+        - Extraction: extract_posts (running extract_daily_top_posts and extract_rising_posts)
         - Transformation: transform_posts
         - Loading: load_posts
 
+        Both extraction legs are merged by extract_posts so that the posts of a run are
+        deduplicated, enriched and written once instead of once per leg.
+
         Returns: 
             bonobo.Graph: The Bonobo Graph that is declared as an instance
                 parameter and that will be executed by the self.execute_pipeline method.
@@ -271,26 +332,183 @@ class RedditContentPipeline(Pipeline):
 
         # Creating the main method chain for the graph:
         self.graph.add_chain(
+            self.extract_posts,
             self.transform_posts,
-            self.load_posts,
-            _input=None # Input set to None so self.transform_posts does not stat untill params are passed.
-        ) 
+            self.load_posts)
 
-        # Adding the first leg that extracts the top posts for the day:    
-        self.graph.add_chain(
-            self.extract_daily_top_posts, 
-            _output=self.transform_posts # Output of this extraction method is fed into self.transform_posts.
-        )
+        return self.graph
 
-        # Adding the second leg that extracts the current rising posts:
-        self.graph.add_chain(
-            self.extract_rising_posts,
-            _output= self.transform_posts
+    def post_extraction_legs(self):
+        """Method returns the extraction methods whose posts are merged by
+        `extract_posts()` in a single run.
+
+        Returns:
+            tuple: The bound extraction methods.
+
+        """
+        return (self.extract_daily_top_posts, self.extract_rising_posts)
+
+    def build_services(self, **options):
+        """Method extends the base Pipeline services with the 'reddit_clients'
+        pool and the persistent 'reddit_author_cache' service.
+
+        Returns:
+            dict: A dict mapping each service name to the service object.
+
+        """
+        services = super(RedditContentPipeline, self).build_services(**options)
+
+        # The PRAW clients borrowed by the threads making requests at the same time:
+        services["reddit_clients"] = RedditClientPool(self._new_reddit_client)
+
+        if self.author_cache_params is not None:
+            services["reddit_author_cache"] = RedditAuthorCache(**self.author_cache_params)
+
+        return services
+
+    def _enrich_post_authors(self, authors):
+        """Internal method looking up the account attributes of the authors of
+        a batch of posts through the author cache service.
+
+        Arguments:
+            authors (list): The lazy PRAW Redditor objects of the posts.
+
+        Returns:
+            dict: A dict mapping each author name to the list of its attributes.
+
+        """
+        metrics = getattr(self, "metrics", None)
+
+        return enrich_authors(
+            authors,
+            cache=self.get_services().get("reddit_author_cache"),
+            max_workers=self.author_fetch_workers,
+            wrap=metrics.bind_current_node if metrics is not None else None,
+            clients=self.get_service("reddit_clients"))
+
+    def _new_reddit_client(self):
+        """Internal method building a new praw.Reddit client from the credentials
+        in the CLIENT_ID, CLIENT_SECRET and USER_AGENT environment variables.
+
+        Returns:
+            praw.Reddit: The new client.
+
+        """
+        # TODO: Add logic to extract praw config from KWARGS instead of env params.
+        return praw.Reddit(
+            client_id = os.environ["CLIENT_ID"],
+            client_secret= os.environ["CLIENT_SECRET"],
+            user_agent = os.environ["USER_AGENT"]
         )
 
-        return self.graph
+    def _build_posts_dict(self, posts):
+        """Internal method building the dict of extracted posts described in the
+        extraction methods from a PRAW listing.
+
+        Arguments:
+            posts (iterable): The PRAW submissions of a listing, eg: subreddit.rising().
 
-    def _transform_post_content_lst(self, lst):
+        Returns:
+            dict: The dict {id: [title, content, ..., permalink, author]}.
+
+        """
+        posts_dict = {}
+
+        # Iterating through the posts constructing the dict:
+        for post in posts:
+
+            # Building the single dict key-value pair:
+            post_content_lst = [
+                post.title,
+                post.selftext,
+                post.upvote_ratio,
+                post.score,
+                post.num_comments,
+                post.created_utc,
+                post.stickied,
+                post.over_18,
+                post.spoiler,
+                post.permalink,
+                post.author
+            ]
+
+            posts_dict[post.id] = post_content_lst
+
+        return posts_dict
+
+    def _existing_post_ids(self, candidate_ids, subreddit_name):
+        """Internal method returning the candidate post ids that are already
+        stored in the `{subreddit}_posts` table.
+
+        Only the candidate ids are looked up, with `id IN (...)` queries of at most
+        DEDUP_BATCH_SIZE ids answered from the index on `id`, so the cost of
+        the dedup depends on the number of extracted posts and not on the size of
+        the table. Tables created before the id was a primary key are given an
+        index on their first run (see `_ensure_unique_id_index()`).
+
+        Arguments:
+            candidate_ids (list): The ids of the extracted posts.
+
+            subreddit_name (str): The subreddit whose posts table is checked.
+
+        Returns:
+            set: The ids that are already in the database.
+
+        """
+        con = self.get_service("sqlite_sink").connection()
+        tbl_name = f"{subreddit_name}_posts"
+
+        if not self._ensure_unique_id_index(con, tbl_name):
+            return set()
+
+        existing_ids = set()
+        for position in range(0, len(candidate_ids), DEDUP_BATCH_SIZE):
+            batch = candidate_ids[position:position + DEDUP_BATCH_SIZE]
+            rows = con.execute(
+                'SELECT id FROM "{}" WHERE id IN ({})'.format(tbl_name, ", ".join("?" for _ in batch)),
+                batch).fetchall()
+
+            existing_ids.update(row[0] for row in rows)
+
+        return existing_ids
+
+    def _ensure_unique_id_index(self, con, tbl_name):
+        """Internal method creating a unique index on the `id` column of a posts
+        table that was created without a primary key.
+
+        Nothing is built if the table already has an index on `id` (its primary
+        key, or an index created by an earlier run). Tables that already hold
+        duplicate ids cannot be given a unique index, so they are given a plain
+        index on `id` instead, which the following runs find and use.
+
+        Arguments:
+            con (sqlite3.Connection): The sink connection of the calling thread.
+
+            tbl_name (str): The name of the posts table.
+
+        Returns:
+            bool: False if the table does not exist yet, True otherwise.
+
+        """
+        if con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tbl_name,)).fetchone() is None:
+            return False
+
+        # Checking for an existing index whose leading column is the post id:
+        for index in con.execute(f'PRAGMA index_list("{tbl_name}")').fetchall():
+            index_columns = [row[2] for row in con.execute(f'PRAGMA index_info("{index[1]}")')]
+            if index_columns[:1] == ["id"]:
+                return True
+
+        try:
+            con.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{tbl_name}_id" ON "{tbl_name}" (id)')
+
+        except sqlite3.IntegrityError:
+            # The table already holds duplicate ids (written by the concurrent legs of older runs):
+            con.execute(f'CREATE INDEX IF NOT EXISTS "ix_{tbl_name}_id" ON "{tbl_name}" (id)')
+
+        return True
+
+    def _transform_post_content_lst(self, lst, author_attributes=None):
         """Internal method is used to transform the base list of reddit 
         post submissions recived from the extraction methods into a full
         list of params assocaited with the reddit post.
@@ -317,12 +535,20 @@ class RedditContentPipeline(Pipeline):
         Arguments:
             list (list): A list contaiing all the extracted reddit data in the order described above.
 
+            author_attributes (dict): The author attributes of the batch, by author name, looked
+                up by `_enrich_post_authors()`. If None the attributes are read from the Redditor.
+
         Returns:
             list: The transformed list with full feature extraction and error-catching as described 
                 above.
 
         """
 
+        # Using the attributes looked up for the whole batch by `_enrich_post_authors()`:
+        if author_attributes is not None:
+            attributes = author_attributes.get(str(lst[-1])) if lst[-1] is not None else None
+            return [*lst, *(attributes if attributes is not None else ["NaN", "NaN", "NaN", "NaN", "NaN"])]
+
         # TODO: For Gods sake this is the laziest error-catching I have ever written please make this less horrible:
         try:
             transformed_lst = [
@@ -338,3 +564,190 @@ class RedditContentPipeline(Pipeline):
             transformed_lst = [*lst,"NaN", "NaN", "NaN","NaN","NaN"]
         
         return transformed_lst
+
+
+class MultiSubredditContentPipeline(RedditContentPipeline):
+    """An object that contains the logic to construct a single ETL pipeline
+    that ingests the daily top and rising posts of many subreddits in one
+    process.
+
+    Instead of building one RedditContentPipeline (and one sqlite sink and author
+    cache) per subreddit, every subreddit is scraped through the shared Pipeline
+    services. The listings of `max_workers` subreddits are requested concurrently
+    and the posts of each subreddit are transformed and written to its own
+    `{subreddit}_posts` table as soon as they arrive.
+
+    All the requests are paced by a single 'reddit_rate_limiter' service (a
+    TokenBucket) shared by the listing and author fetching threads, so adding
+    subreddits or workers never raises the request rate above `requests_per_second`.
+    PRAW clients are not thread-safe, so every thread borrows a client of its own
+    (built from the same credentials) from the 'reddit_clients' service.
+
+    Example:
+        test_pipeline = MultiSubredditContentPipeline("test.sqlite", ["learnpython", "python"])
+
+    Arguments:
+        dbpath (str): The relative or absoloute database URL pointing to
+            the database where the posts should be written.
+
+        subreddit_names (list): The names of the subreddits to scrape.
+
+        execute (bool): If the pipeline is executed when it is constructed. Defaults to True.
+
+    """
+    # The number of subreddits whose listings are requested concurrently:
+    max_workers = 4
+
+    # The request budget shared by every thread. Reddit allows 100 requests per
+    # minute to an OAuth client:
+    requests_per_second = 1.5
+
+    def __init__(self, dbpath, subreddit_names, execute=True, **kwargs):
+
+        # Initalizing the base Pipeline object directly, no single subreddit is being scraped:
+        Pipeline.__init__(self, dbpath)
+        self.subreddit_names = list(dict.fromkeys(subreddit_names))
+
+        # Creating a reddit praw instance checking the credentials, the threads use the 'reddit_clients' pool:
+        self.reddit = self._new_reddit_client()
+
+        print(f"Reddit Instance Initalized with Read Status:{self.reddit.read_only}")
+
+        # Execuring all of the ETL functions mapped in the graph, unless the pipeline
+        # is constructed to be run later (eg: by a scheduler):
+        if execute:
+            self.execute_pipeline()
+
+    def extract_subreddit_posts(self):
+        """Method extracts the daily top and current rising posts of every
+        subreddit, requesting the listings of `max_workers` subreddits at once.
+
+        The top and rising posts of a subreddit are merged into a single dict in
+        the format described in `extract_rising_posts()`. A post listed in both
+        tabs is only kept once.
+
+        Yields: Tuple
+            A (subreddit_name, posts_dict) tuple for each subreddit, in the order
+                the subreddits finish downloading.
+
+        """
+        metrics = getattr(self, "metrics", None)
+        scrape = metrics.bind_current_node(self._scrape_subreddit) if metrics is not None else self._scrape_subreddit
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(scrape, subreddit_name): subreddit_name for subreddit_name in self.subreddit_names}
+
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _scrape_subreddit(self, subreddit_name):
+        "Internal method building the merged dict of the top and rising posts of one subreddit."
+        # Using a client no other thread is using for the lazy listings:
+        with self.get_service("reddit_clients").client() as reddit:
+            subreddit = reddit.subreddit(subreddit_name)
+
+            posts_dict = self._build_posts_dict(self._rate_limited(subreddit.top("day")))
+            for post_id, content_lst in self._build_posts_dict(self._rate_limited(subreddit.rising())).items():
+                posts_dict.setdefault(post_id, content_lst)
+
+        return posts_dict
+
+    def _rate_limited(self, listing):
+        """Internal method taking a token from the shared rate limiter before
+        each page of a PRAW listing is requested.
+
+        Arguments:
+            listing (praw.models.ListingGenerator): The lazy listing.
+
+        Yields:
+            praw.models.Submission: The submissions of the listing.
+
+        """
+        limiter = self.get_service("reddit_rate_limiter")
+
+        limiter.acquire()
+        for count, post in enumerate(listing, start=1):
+            yield post
+
+            if count % LISTING_PAGE_SIZE == 0:
+                limiter.acquire()
+
+    def transform_subreddit_posts(self, subreddit_name, posts_dict):
+        """Method converts the merged posts dict of a subreddit into the
+        dataframe of its posts that are not already stored, as described in
+        `RedditContentPipeline.transform_posts()`.
+
+        Yields: Tuple
+            A (subreddit_name, posts_df) tuple.
+
+        """
+        yield subreddit_name, self._build_posts_df(posts_dict, subreddit_name)
+
+    def load_subreddit_posts(self, subreddit_name, posts_df):
+        "Method writes the posts dataframe of a subreddit into its `{subreddit}_posts` table."
+        self._write_posts_df(posts_df, subreddit_name)
+
+    def build_graph(self, **options):
+        """The method that is used to construct a Bonobo ETL pipeline
+        DAG that schedules the following ETL methods:
+
+        - Extraction: extract_subreddit_posts
+        - Transformation: transform_subreddit_posts
+        - Loading: load_subreddit_posts
+
+        Returns:
+            bonobo.Graph: The Bonobo Graph that is declared as an instance
+                parameter and that will be executed by the self.execute_pipeline method.
+
+        """
+        self.graph = bonobo.Graph()
+
+        self.graph.add_chain(
+            self.extract_subreddit_posts,
+            self.transform_subreddit_posts,
+            self.load_subreddit_posts
+        )
+
+        return self.graph
+
+    def build_services(self, **options):
+        """Method extends the Reddit pipeline services with the
+        'reddit_rate_limiter' shared by every request thread.
+
+        Returns:
+            dict: A dict mapping each service name to the service object.
+
+        """
+        services = super(MultiSubredditContentPipeline, self).build_services(**options)
+        services["reddit_rate_limiter"] = TokenBucket(rate=self.requests_per_second, capacity=1)
+
+        return services
+
+    def _enrich_post_authors(self, authors):
+        """Internal method looking up the account attributes of the authors of
+        a batch of posts, taking a token from the shared rate limiter before
+        each uncached author is fetched.
+
+        Arguments:
+            authors (list): The lazy PRAW Redditor objects of the posts.
+
+        Returns:
+            dict: A dict mapping each author name to the list of its attributes.
+
+        """
+        limiter = self.get_service("reddit_rate_limiter")
+        metrics = getattr(self, "metrics", None)
+
+        def wrap(fetch):
+            def rate_limited_fetch(name):
+                limiter.acquire()
+                return fetch(name)
+
+            return metrics.bind_current_node(rate_limited_fetch) if metrics is not None else rate_limited_fetch
+
+        return enrich_authors(
+            authors,
+            cache=self.get_services().get("reddit_author_cache"),
+            max_workers=self.author_fetch_workers,
+            wrap=wrap,
+            clients=self.get_service("reddit_clients"))
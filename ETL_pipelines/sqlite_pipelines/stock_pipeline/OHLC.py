@@ -6,6 +6,8 @@ import sqlite3
 
 # Importing the Base Pipeline API Object:
 from ETL_pipelines.base_pipeline import Pipeline
+from ETL_pipelines.parquet_sink import ParquetOHLCSink
+from ETL_pipelines.sqlite_pipelines.stock_pipeline import ohlc_storage
 
 class OHLCPipeline(Pipeline):
     """An object that wraps all the logic necessary to create
@@ -21,17 +23,54 @@ class OHLCPipeline(Pipeline):
         example_pipeline.read_ticker_lst('example_tickers.txt')
         example_pipeline.execute_pipeline()
 
+    By default the pipeline runs incrementally. It reads the last stored
+    `Date` of each `{ticker}_ohlc` table, downloads only the bars after that
+    date (minus a small overlap window so that revised bars are re-written)
+    and upserts them. A full re-download and rewrite of every table only
+    happens when `full_refresh` is set.
+
+    Bars are stored in one of two layouts, selected by `storage_layout`:
+
+    - 'per_ticker': One `{ticker}_ohlc` table per ticker symbol (the original layout).
+    - 'long': A single `ohlc` table keyed on (ticker, Date), see `ohlc_storage`.
+        Existing per-ticker databases can be converted with the migration tool in
+        `ohlc_storage`.
+
+    If a `parquet_dir` is given every bar is also written to a Parquet dataset
+    partitioned by ticker and year (see `ParquetOHLCSink`) that can be read with
+    `StockData.get_ohlc_parquet()`. This requires pyarrow.
+
     Arguments:
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
+
+        full_refresh (bool): If True the entire price history is downloaded
+            and every `{ticker}_ohlc` table is replaced. Defaults to False.
+
+        overlap_days (int): The number of days before each ticker's last stored
+            date that are re-downloaded during an incremental run to catch
+            revisions to recent bars. Defaults to 5.
+
+        storage_layout (str): Either 'per_ticker' or 'long'. Defaults to 'per_ticker'.
+
+        parquet_dir (str): The root directory of the optional Parquet dataset.
+            Defaults to None (no Parquet files are written).
     """
-    def __init__(self, dbpath):
+    def __init__(self, dbpath, full_refresh=False, overlap_days=5, storage_layout="per_ticker",
+        parquet_dir=None):
+
+        if storage_layout not in ("per_ticker", "long"):
+            raise ValueError(f"storage_layout must be 'per_ticker' or 'long', not {storage_layout}")
 
         # Initalizing the parent method:
         super(OHLCPipeline, self).__init__(dbpath)
 
         # Declaring instance params:
         self.ticker_lst = []
+        self.full_refresh = full_refresh
+        self.overlap_days = overlap_days
+        self.storage_layout = storage_layout
+        self.parquet_dir = parquet_dir
     
     def read_ticker_lst(self, file_path):
         """The method that opens the file containing ticker
@@ -58,6 +97,77 @@ class OHLCPipeline(Pipeline):
         
         ticker_file.close()
     
+    def _read_high_water_marks(self):
+        """Method queries the database for the most recent `Date` stored
+        for each ticker, either in its `{ticker}_ohlc` table or in the single
+        `ohlc` table (one grouped query over the primary key).
+
+        Tickers that do not have a table yet (or whose table is empty) are
+        not included in the returned dict and are downloaded in full.
+
+        Returns:
+            dict: A dict mapping each ticker symbol to the pandas Timestamp of
+                its most recently stored bar {ticker: Timestamp}.
+
+        """
+        con = self.get_service("sqlite_sink").connection()
+        high_water_marks = {}
+
+        if self.storage_layout == "long":
+            try:
+                rows = con.execute(
+                    f"SELECT ticker, MAX(Date) FROM {ohlc_storage.OHLC_TABLE} GROUP BY ticker").fetchall()
+            except sqlite3.OperationalError:
+                # The ohlc table does not exist yet:
+                rows = []
+
+            tickers = set(self.ticker_lst)
+            return {ticker: pd.Timestamp(last_date) for ticker, last_date in rows
+                if ticker in tickers and last_date is not None}
+
+        for ticker in self.ticker_lst:
+            try:
+                last_date = con.execute(f'SELECT MAX(Date) FROM "{ticker}_ohlc"').fetchone()[0]
+            except sqlite3.OperationalError:
+                # The table for the ticker does not exist yet:
+                last_date = None
+
+            if last_date is not None:
+                high_water_marks[ticker] = pd.Timestamp(last_date)
+
+        return high_water_marks
+
+    def _build_download_groups(self):
+        """Method groups the tickers in the ticker_lst param by the date that
+        their price history download should start from.
+
+        Tickers are grouped so that a single yfinance download is made for every
+        distinct start date instead of one download per ticker. In a daily run
+        almost every ticker shares the same high-water mark so this is usually
+        one or two downloads. A start date of None means a full (period='max')
+        download.
+
+        Returns:
+            dict: A dict mapping the start date string (or None) to the list of
+                tickers downloaded from that date {start: [ticker, ...]}.
+
+        """
+        # A full refresh downloads all tickers from the start of their history:
+        if self.full_refresh:
+            return {None: list(self.ticker_lst)}
+
+        high_water_marks = self._read_high_water_marks()
+        overlap = pd.Timedelta(days=self.overlap_days)
+
+        download_groups = {}
+        for ticker in self.ticker_lst:
+            last_date = high_water_marks.get(ticker)
+            start = None if last_date is None else (last_date - overlap).strftime("%Y-%m-%d")
+
+            download_groups.setdefault(start, []).append(ticker)
+
+        return download_groups
+
     # <-----------Bonobo ETL Methods----------->
     def extract(self):
         """Method initalizes the yfinance ticker object to download
@@ -68,6 +178,10 @@ class OHLCPipeline(Pipeline):
         each into dataframes for the ohlc of their specific tickers.
         Each ticker ohlc is then generated and passed into the transform method.
 
+        Unless the pipeline is running a full refresh only the bars after each
+        ticker's last stored date (minus the overlap window) are downloaded. See
+        `_build_download_groups()`.
+
         Yields: 
         
             tuple: A tuple containing the ticker symbol string and the dataframe 
@@ -75,18 +189,31 @@ class OHLCPipeline(Pipeline):
                 (str, dataframe)
 
         """
-        # Converting the list of tickers into a single string:
-        tickers = " ".join(self.ticker_lst)
-
-        # Performing the price history download from yfinance:
-        stock_price_data = yf.download(
-            tickers, 
-            period='max',
-            group_by ='ticker')
-        
-        # Iterating Through the multi-index dataframe generating individual OHLC dataframe:
-        for ticker in self.ticker_lst:
-            yield (ticker, stock_price_data[ticker])
+        for start, group_tickers in self._build_download_groups().items():
+
+            # Converting the list of tickers into a single string:
+            tickers = " ".join(group_tickers)
+
+            # Performing the price history download from yfinance:
+            if start is None:
+                stock_price_data = yf.download(
+                    tickers, 
+                    period='max',
+                    group_by ='ticker')
+            else:
+                stock_price_data = yf.download(
+                    tickers,
+                    start=start,
+                    group_by ='ticker')
+
+            # Iterating Through the multi-index dataframe generating individual OHLC dataframe:
+            for ticker in group_tickers:
+
+                # yfinance only returns a multi-index dataframe when more than one ticker is downloaded:
+                if isinstance(stock_price_data.columns, pd.MultiIndex):
+                    yield (ticker, stock_price_data[ticker])
+                else:
+                    yield (ticker, stock_price_data)
     
     def transform(self, *args):
         """Method that ingests the dataframe from the 
@@ -109,9 +236,22 @@ class OHLCPipeline(Pipeline):
         yield (ticker, ohlc)
     
     def load(self, *args):
-        """Method that uses the pandas.to_sql method to
+        """Method that uses the shared sqlite_sink service to
         wrtie each OHLC dataframe to a database.
 
+        During a full refresh the `{ticker}_ohlc` table is replaced. Otherwise
+        the dataframe is upserted: every stored row from the first incoming
+        date onwards is deleted and the incoming rows are appended in the same
+        transaction, so bars in the overlap window are overwritten rather than
+        duplicated.
+
+        In the 'long' layout the same is done to the ticker's rows of the `ohlc`
+        table (all of them during a full refresh).
+
+        Every `{ticker}_ohlc` table is created with an `ix_{ticker}_ohlc_Date`
+        index on its Date column, which serves both the overlap delete and the
+        date range queries made by `StockData`.
+
         Arguments:
             args (tuple): The arguments passed into the load method by the transform method
                 containing the dataframe and its associated ticker symbol. 
@@ -119,9 +259,67 @@ class OHLCPipeline(Pipeline):
         """
         # Unpacking argument tuple:
         ticker, price_df = args[0], args[1]
+        tbl_name = f"{ticker}_ohlc"
+
+        # No new bars were downloaded for the ticker:
+        if price_df.empty:
+            return
+
+        # Writing the bars to the columnar Parquet dataset alongside the database:
+        if self.parquet_dir is not None:
+            self.get_service("parquet_sink").write(ticker, price_df, replace=self.full_refresh)
 
-        # Creating sqlite connection here, ensuring con object is in same thread:
-        self._con = sqlite3.connect(self.dbpath)
+        sink = self.get_service("sqlite_sink")
+
+        if self.storage_layout == "long":
+            self._load_long(sink, ticker, price_df)
+            return
 
         # Writing price data to the database:
-        price_df.to_sql(f"{ticker}_ohlc", self._con, if_exists='replace')
\ No newline at end of file
+        if self.full_refresh:
+            sink.write(tbl_name, price_df, if_exists='replace')
+
+        else:
+            # Making sure the table exists before the overlapping rows are deleted:
+            sink.create_table(tbl_name, price_df)
+
+            first_date = price_df.index.min().strftime("%Y-%m-%d %H:%M:%S")
+            sink.execute(f'DELETE FROM "{tbl_name}" WHERE Date >= ?', (first_date,))
+
+            # The delete and the insert are committed in the same sink transaction:
+            sink.write(tbl_name, price_df, if_exists='append')
+
+    def build_services(self, **options):
+        """Method extends the base Pipeline services with the 'parquet_sink'
+        service when a parquet_dir is set.
+
+        Returns:
+            dict: A dict mapping each service name to the service object.
+
+        """
+        services = super(OHLCPipeline, self).build_services(**options)
+
+        if self.parquet_dir is not None:
+            services["parquet_sink"] = ParquetOHLCSink(self.parquet_dir)
+
+        return services
+
+    def _load_long(self, sink, ticker, price_df):
+        """Method upserts a ticker's OHLC dataframe into the long-format
+        `ohlc` table, see `load()`."""
+        ohlc_storage.create_ohlc_table(sink)
+
+        if self.full_refresh:
+            sink.execute(f"DELETE FROM {ohlc_storage.OHLC_TABLE} WHERE ticker = ?", (ticker,))
+        else:
+            first_date = price_df.index.min().strftime("%Y-%m-%d %H:%M:%S")
+            sink.execute(
+                f"DELETE FROM {ohlc_storage.OHLC_TABLE} WHERE ticker = ? AND Date >= ?", (ticker, first_date))
+
+        # Any row left over from a concurrent run is overwritten rather than violating the primary key:
+        sink.write(
+            ohlc_storage.OHLC_TABLE,
+            ohlc_storage.to_long_format(ticker, price_df),
+            if_exists="append",
+            index=False,
+            on_conflict="replace")
@@ -0,0 +1,175 @@
+"""Script containing the change-detected, slowly changing (type 2) history of
+the index composition tables written by the composition Pipeline APIs.
+
+Instead of replacing a `{index}_components` table on every run, each constituent
+row is stored once in a `{index}_components_history` table with the date it
+joined the index (`valid_from`) and the date it left it (`valid_to`, NULL while it
+is a member). `{index}_components` becomes a view of the current members with the
+same columns as the table it replaces, so existing readers are unchanged.
+
+A hash of every loaded table is kept in `_table_hashes`. When the incoming table
+hashes the same as the last one nothing is written at all. Otherwise only the
+rows that were added (new `valid_from` rows) and removed (`valid_to` set) are
+written. Rows are compared by a hash of all of their values, so a constituent
+whose details change (eg: its sector) is recorded as removed and re-added.
+
+"""
+# Importing external libraries:
+import hashlib
+import sqlite3
+from datetime import datetime
+
+# Importing the sqlite sink helpers:
+from ETL_pipelines.sqlite_sink import quote_identifier
+
+# The suffix of the history tables:
+HISTORY_SUFFIX = "_history"
+
+# The table holding the hash of the last table loaded under each name:
+TABLE_HASHES_TABLE = "_table_hashes"
+
+TABLE_HASHES_DDL = f"""CREATE TABLE IF NOT EXISTS {TABLE_HASHES_TABLE} (
+    name TEXT PRIMARY KEY,
+    table_hash TEXT NOT NULL,
+    loaded_at TEXT NOT NULL
+)"""
+
+TABLE_HASHES_UPSERT = f"""INSERT INTO {TABLE_HASHES_TABLE} (name, table_hash, loaded_at) VALUES (?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET table_hash = excluded.table_hash, loaded_at = excluded.loaded_at"""
+
+# The maximum number of row hashes bound to each statement closing removed rows:
+CLOSE_BATCH_SIZE = 500
+
+def row_hashes(component_df):
+    """Method hashes every row of a composition dataframe.
+
+    The column names are part of every hash, so a change of the table's columns
+    changes the hash of every row.
+
+    Arguments:
+        component_df (pandas.DataFrame): The composition dataframe.
+
+    Returns:
+        list: The hex sha1 digest of each row, in order.
+
+    """
+    header = "\x1f".join(str(col) for col in component_df.columns)
+
+    return [
+        hashlib.sha1("\x1e".join((header, "\x1f".join(row))).encode("utf-8")).hexdigest()
+        for row in component_df.astype(str).itertuples(index=False, name=None)]
+
+def table_hash(hashes):
+    """Method hashes a whole composition table from the hashes of its rows,
+    ignoring the order of the rows.
+
+    Arguments:
+        hashes (list): The row hashes built by `row_hashes()`.
+
+    Returns:
+        str: The hex sha1 digest of the table.
+
+    """
+    return hashlib.sha1("\n".join(sorted(hashes)).encode("utf-8")).hexdigest()
+
+def _stored_table_hash(con, tbl_name):
+    "Internal method reading the hash of the last table loaded under a name, None if there is none."
+    try:
+        row = con.execute(f"SELECT table_hash FROM {TABLE_HASHES_TABLE} WHERE name = ?", (tbl_name,)).fetchone()
+    except sqlite3.OperationalError:
+        # No table has been loaded yet:
+        return None
+
+    return row[0] if row is not None else None
+
+def _current_row_hashes(con, history_tbl):
+    "Internal method reading the row hashes of the current members, an empty set if there is no history."
+    try:
+        rows = con.execute(f"SELECT row_hash FROM {quote_identifier(history_tbl)} WHERE valid_to IS NULL").fetchall()
+    except sqlite3.OperationalError:
+        # The history table has not been created yet:
+        return set()
+
+    return {row[0] for row in rows}
+
+def load_composition_history(sink, tbl_name, component_df, as_of=None):
+    """Method buffers the change-detected load of a composition dataframe in
+    a SQLiteSink.
+
+    The stored hash, history and schema are read through the sink connection of
+    the calling thread and the changes are buffered in order, so they are committed
+    in the sink's next transaction together with the table hash.
+
+    Arguments:
+        sink (SQLiteSink): The sink the changes are written with.
+
+        tbl_name (str): The name of the composition table, eg: 'SPY_components'.
+            The history is stored in `{tbl_name}_history`.
+
+        component_df (pandas.DataFrame): The current composition of the index.
+
+        as_of (str): The 'YYYY-MM-DD HH:MM:SS' time the added rows are valid from
+            and the removed rows are valid to. Defaults to now.
+
+    Returns:
+        dict: The 'changed' flag and the number of 'added' and 'removed' rows.
+
+    """
+    con = sink.connection()
+    history_tbl = f"{tbl_name}{HISTORY_SUFFIX}"
+
+    hashes = row_hashes(component_df)
+    new_table_hash = table_hash(hashes)
+
+    # Skipping the write entirely when the table is unchanged:
+    if _stored_table_hash(con, tbl_name) == new_table_hash:
+        return {"changed": False, "added": 0, "removed": 0}
+
+    as_of = as_of or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    current_hashes = _current_row_hashes(con, history_tbl)
+
+    incoming_hashes = set(hashes)
+    removed_hashes = sorted(current_hashes - incoming_hashes)
+    added_mask = [row_hash not in current_hashes for row_hash in hashes]
+
+    # Replacing the table (written by previous versions of the pipeline) or the view named tbl_name:
+    existing = con.execute("SELECT type FROM sqlite_master WHERE name = ?", (tbl_name,)).fetchone()
+    if existing is not None and existing[0] == "table":
+        sink.execute(f"DROP TABLE {quote_identifier(tbl_name)}")
+    elif existing is not None:
+        sink.execute(f"DROP VIEW {quote_identifier(tbl_name)}")
+
+    # Adding the columns that appeared since the history table was created:
+    history_columns = [row[1] for row in con.execute(f"PRAGMA table_info({quote_identifier(history_tbl)})")]
+    if history_columns:
+        for col in component_df.columns:
+            if str(col) not in history_columns:
+                sink.execute(f"ALTER TABLE {quote_identifier(history_tbl)} ADD COLUMN {quote_identifier(col)}")
+
+    # Closing the rows of the constituents that left the index:
+    for position in range(0, len(removed_hashes), CLOSE_BATCH_SIZE):
+        batch = removed_hashes[position:position + CLOSE_BATCH_SIZE]
+        sink.execute(
+            "UPDATE {} SET valid_to = ? WHERE valid_to IS NULL AND row_hash IN ({})".format(
+                quote_identifier(history_tbl), ", ".join("?" for _ in batch)),
+            [as_of] + batch,
+            tables=[history_tbl])
+
+    # Inserting the rows of the constituents that joined the index:
+    added_df = component_df[added_mask].copy()
+    added_df["row_hash"] = [row_hash for row_hash, added in zip(hashes, added_mask) if added]
+    added_df["valid_from"] = as_of
+    added_df["valid_to"] = None
+
+    sink.write(history_tbl, added_df, if_exists="append", index=False)
+
+    # Re-creating the view of the current members with the columns of the incoming table:
+    column_sql = ", ".join(quote_identifier(col) for col in component_df.columns)
+    sink.execute(
+        f"CREATE VIEW {quote_identifier(tbl_name)} AS SELECT {column_sql} FROM {quote_identifier(history_tbl)} WHERE valid_to IS NULL",
+        tables=[tbl_name])
+
+    sink.execute(TABLE_HASHES_DDL)
+    sink.execute(TABLE_HASHES_UPSERT, (tbl_name, new_table_hash, as_of))
+
+    return {"changed": True, "added": int(sum(added_mask)), "removed": len(removed_hashes)}
@@ -1,17 +1,13 @@
 # Importing data management libraries:
-import pandas as pd
 import yfinance as yf
-import sqlite3
 
 # Importing ETL libraries:
 import bonobo
 
-# Importing webscraping packages:
-import requests 
-from bs4 import BeautifulSoup 
-
-# Importing the Base Pipeline API Object:
+# Importing the Base Pipeline API Object and the html table extractor:
 from ETL_pipelines.base_pipeline import Pipeline
+from ETL_pipelines.html_tables import read_html_table
+from ETL_pipelines.sqlite_pipelines.stock_pipeline.composition_history import load_composition_history
 
 class SPYCompositionPipeline(Pipeline):
     """A method that contains the logic necessary for constructing
@@ -31,21 +27,28 @@ class SPYCompositionPipeline(Pipeline):
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
 
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
     """
-    def __init__(self, dbpath):
+    # The table the components are written to:
+    components_table = "SPY_components"
+
+    def __init__(self, dbpath, execute=True):
         # Initalizing the parent method:
         super(SPYCompositionPipeline, self).__init__(dbpath)
 
         # Hard Coded URL for S&P 500 Index Contents:
         self.spy_comp_url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
 
-        # Calling the main `execute_pipeline` to execute all ETL functions:
-        self.execute_pipeline() 
+        # Calling the main `execute_pipeline` to execute all ETL functions (unless the
+        # pipeline is run as part of a CompositionSuitePipeline):
+        if execute:
+            self.execute_pipeline()
 
     # <-----------Bonobo ETL Methods----------->
     def extract(self):
-        """Method that makes use of the requests python package
-        to extract the table containing the S&P 500 Component Stocks 
+        """Method that makes use of the pipeline's pooled http session
+        and on-disk response cache to extract the table containing the S&P 500 Component Stocks 
         from Wikipedia.
 
         Yields: 
@@ -56,7 +59,7 @@ class SPYCompositionPipeline(Pipeline):
 
         """
         # Perfroming HTTP request to extract a response object:
-        response = requests.get(self.spy_comp_url)
+        response = self.get_service("http").cached_get(self.spy_comp_url)
 
         # Conditional logic to only generate values if valid response:
         if response.status_code == 200:
@@ -69,8 +72,8 @@ class SPYCompositionPipeline(Pipeline):
         """Method that parses the response object generated from the
         extract method into a dataframe.
 
-        It makes uses of BeautifulSoup and pandas libraries to parse the 
-        html contents of the HTTP response object and transform it into a
+        It parses the html contents of the HTTP response object once with lxml
+        (see `html_tables.read_html_table()`) and transforms the table into a
         dataframe containing all SPY components.
 
         Arguments:
@@ -85,13 +88,8 @@ class SPYCompositionPipeline(Pipeline):
         # Unpacking args tuple:
         response = args[0]
 
-        # Converting raw html content into bs4 object and parsing for table:
-        soup = BeautifulSoup(response.text, "html.parser")
-        table_content = soup.find("table", {"id":"constituents"}) # <table id='constituents'>
-
-        # Converting the HTML content to pandas Dataframe:
-        components_df_lst = pd.read_html(str(table_content))
-        components_df = pd.DataFrame(components_df_lst[0])
+        # Parsing the html content once with lxml and converting the table to a Dataframe:
+        components_df = read_html_table(response.text, table_id="constituents") # <table id='constituents'>
 
         # Performing data formatting:
         components_df.drop(columns=["SEC filings"], inplace=True)
@@ -100,9 +98,13 @@ class SPYCompositionPipeline(Pipeline):
         yield components_df
 
     def load(self, *args):
-        """Method uses the pandas method to write the dataframe 
+        """Method uses the sqlite_sink service to write the dataframe 
         generated by the transform method to a database.
 
+        The table is only written when it changed since the last run, and then
+        only the constituents that were added or removed are recorded (see
+        `composition_history.load_composition_history()`).
+
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
                 dataframe of components generted by the transform method
@@ -110,11 +112,8 @@ class SPYCompositionPipeline(Pipeline):
         """
         component_df = args[0]
 
-        # Creating a connection to the database:
-        self._con = sqlite3.connect(self.dbpath)
-        
-        # Writing data to the database:
-        component_df.to_sql("SPY_components", self._con, if_exists="replace", index=False)  
+        # Writing only the constituent changes to the history behind the components view:
+        load_composition_history(self.get_service("sqlite_sink"), self.components_table, component_df)
 
 class DJIACompositionPipeline(Pipeline):
     """A method that contains the logic necessary for constructing
@@ -134,20 +133,27 @@ class DJIACompositionPipeline(Pipeline):
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
 
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
     """
-    def __init__(self, dbpath):
+    # The table the components are written to:
+    components_table = "DJIA_components"
+
+    def __init__(self, dbpath, execute=True):
         # Initalizing the parent method:
         super(DJIACompositionPipeline, self).__init__(dbpath)
 
         # Hard Coded URL for S&P 500 Index Contents:
         self.djia_comp_url = "https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average"
 
-        # Calling the main `execute_pipeline` to execute all ETL functions:
-        self.execute_pipeline() 
+        # Calling the main `execute_pipeline` to execute all ETL functions (unless the
+        # pipeline is run as part of a CompositionSuitePipeline):
+        if execute:
+            self.execute_pipeline()
 
     def extract(self):
-        """Method that makes use of the requests python package
-        to extract the table containing the Dow Jones Industrial Average 
+        """Method that makes use of the pipeline's pooled http session
+        and on-disk response cache to extract the table containing the Dow Jones Industrial Average 
         Component Stocks from Wikipedia.
 
         Yields: 
@@ -157,7 +163,7 @@ class DJIACompositionPipeline(Pipeline):
 
         """
         # Performing HTTP requests:
-        response = requests.get(self.djia_comp_url)
+        response = self.get_service("http").cached_get(self.djia_comp_url)
         if response.status_code == 200:
             yield response
 
@@ -169,8 +175,8 @@ class DJIACompositionPipeline(Pipeline):
         extract method.
 
         It extracts the html content from the response object and through 
-        BeautifulSoup and pandas converts the html table into a pandas 
-        dataframe.
+        the lxml table extractor (see `html_tables.read_html_table()`) converts
+        the html table into a pandas dataframe.
 
         Arguments:
             args (tuple): A length-1 tuple containing the response object
@@ -206,21 +212,20 @@ class DJIACompositionPipeline(Pipeline):
             """
             return ticker_str.replace("NYSE:", "")
 
-        # Converting the HTML content into a BeautifulSoup object and parsing:
-        soup = BeautifulSoup(html_content, "html.parser")
-        table_content = soup.find("table", {"id":"constituents"}) # <table id='constituents'>
-
-        # Converting Soup table object to HTML to be converted to pandas Dataframe:
-        component_df_lst = pd.read_html(str(table_content))
-        component_df = pd.DataFrame(component_df_lst[0])                
+        # Parsing the html content once with lxml and converting the table to a Dataframe:
+        component_df = read_html_table(html_content, table_id="constituents") # <table id='constituents'>
         component_df["Symbol"] = component_df["Symbol"].apply(_format_listings_symbol_str)
             
         yield component_df
 
     def load(self, *args):
-        """Method uses the pandas method to write the dataframe 
+        """Method uses the sqlite_sink service to write the dataframe 
         generated by the transform method to a database.
 
+        The table is only written when it changed since the last run, and then
+        only the constituents that were added or removed are recorded (see
+        `composition_history.load_composition_history()`).
+
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
                 dataframe of components generted by the transform method
@@ -228,11 +233,8 @@ class DJIACompositionPipeline(Pipeline):
         """
         component_df = args[0]
 
-        # Creating a connection to the database:
-        self._con = sqlite3.connect(self.dbpath)
-
-        # Writing data to the database:
-        component_df.to_sql("DJIA_components", self._con, if_exists="replace", index=False)  
+        # Writing only the constituent changes to the history behind the components view:
+        load_composition_history(self.get_service("sqlite_sink"), self.components_table, component_df)
 
 class SPTSXCompositionPipeline(Pipeline):
     """A method that contains the logic necessary for constructing
@@ -252,20 +254,27 @@ class SPTSXCompositionPipeline(Pipeline):
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
 
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
     """
-    def __init__(self, dbpath):
+    # The table the components are written to:
+    components_table = "SPTSX_components"
+
+    def __init__(self, dbpath, execute=True):
         # Initalizing parent method:
         super(SPTSXCompositionPipeline, self).__init__(dbpath)
 
         # Hard Coded URL:
         self.sptsx_composite_url = "https://en.wikipedia.org/wiki/S%26P/TSX_Composite_Index"   
 
-        # Calling the main `execute_pipeline` to execute all ETL functions:
-        self.execute_pipeline() 
+        # Calling the main `execute_pipeline` to execute all ETL functions (unless the
+        # pipeline is run as part of a CompositionSuitePipeline):
+        if execute:
+            self.execute_pipeline()
 
     def extract(self):
-        """Method that makes use of the requests python package
-        to extract the table containing the P/TSX Composite Index 
+        """Method that makes use of the pipeline's pooled http session
+        and on-disk response cache to extract the table containing the P/TSX Composite Index 
         Component Stocks from Wikipedia.
 
         Yields: 
@@ -275,7 +284,7 @@ class SPTSXCompositionPipeline(Pipeline):
 
         """
         # Performing HTTP requests:
-        response = requests.get(self.sptsx_composite_url)
+        response = self.get_service("http").cached_get(self.sptsx_composite_url)
         if response.status_code == 200:
             yield response
 
@@ -287,8 +296,8 @@ class SPTSXCompositionPipeline(Pipeline):
         extract method.
 
         It extracts the html content from the response object and through 
-        BeautifulSoup and pandas converts the html table into a pandas 
-        dataframe.
+        the lxml table extractor (see `html_tables.read_html_table()`) converts
+        the html table into a pandas dataframe.
 
         Arguments:
             args (tuple): A length-1 tuple containing the response object
@@ -301,24 +310,19 @@ class SPTSXCompositionPipeline(Pipeline):
         """
         html_content = args[0].text
 
-        # Converting html content into a BeautifulSoup object and parsing for table:
-        soup = BeautifulSoup(html_content, "html.parser")
-        # Second table on the Wikipedia page:
-        table_content = soup.find_all('table', {"class": "wikitable"})[1] # <table class="wikitable sortable jquery-tablesorter">
-        
-        # Converting Soup table object to HTML to be converted to pandas Dataframe:
-        component_df_lst = pd.read_html(str(table_content))
-        component_df = pd.DataFrame(component_df_lst[0])   
+        # Parsing the html content once with lxml and converting the second 'wikitable' on the page to a Dataframe:
+        component_df = read_html_table(html_content, table_class="wikitable", index=1) # <table class="wikitable sortable jquery-tablesorter">
 
         yield component_df             
 
-
-        print(len(table_content))
-
     def load(self, *args):
-        """Method uses the pandas method to write the dataframe 
+        """Method uses the sqlite_sink service to write the dataframe 
         generated by the transform method to a database.
 
+        The table is only written when it changed since the last run, and then
+        only the constituents that were added or removed are recorded (see
+        `composition_history.load_composition_history()`).
+
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
                 dataframe of components generted by the transform method
@@ -326,11 +330,8 @@ class SPTSXCompositionPipeline(Pipeline):
         """
         component_df = args[0]
 
-        # Creating a connection to the database:
-        self._con = sqlite3.connect(self.dbpath)
-
-        # Writing data to the database:
-        component_df.to_sql("SPTSX_components", self._con, if_exists="replace", index=False)  
+        # Writing only the constituent changes to the history behind the components view:
+        load_composition_history(self.get_service("sqlite_sink"), self.components_table, component_df)
 
 class FTSECompositionPipeline(Pipeline):
     """A method that contains the logic necessary for constructing
@@ -350,20 +351,27 @@ class FTSECompositionPipeline(Pipeline):
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
 
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
     """
-    def __init__(self, dbpath):
+    # The table the components are written to:
+    components_table = "FTSE_components"
+
+    def __init__(self, dbpath, execute=True):
         # Initalizing parent method:
         super(FTSECompositionPipeline, self).__init__(dbpath)
 
         # Hard Coded URL:
         self.ftse_market_index_url = "https://en.wikipedia.org/wiki/FTSE_100_Index"   
 
-        # Calling the main `execute_pipeline` to execute all ETL functions:
-        self.execute_pipeline() 
+        # Calling the main `execute_pipeline` to execute all ETL functions (unless the
+        # pipeline is run as part of a CompositionSuitePipeline):
+        if execute:
+            self.execute_pipeline()
 
     def extract(self):
-        """Method that makes use of the requests python package
-        to extract the table containing the SP/TSX Composite Index 
+        """Method that makes use of the pipeline's pooled http session
+        and on-disk response cache to extract the table containing the SP/TSX Composite Index 
         Component Stocks from Wikipedia.
 
         Yields: 
@@ -373,7 +381,7 @@ class FTSECompositionPipeline(Pipeline):
 
         """
         # Performing HTTP requests:
-        response = requests.get(self.ftse_market_index_url)
+        response = self.get_service("http").cached_get(self.ftse_market_index_url)
         if response.status_code == 200:
             yield response
 
@@ -385,8 +393,8 @@ class FTSECompositionPipeline(Pipeline):
         extract method.
 
         It extracts the html content from the response object and through 
-        BeautifulSoup and pandas converts the html table into a pandas 
-        dataframe.
+        the lxml table extractor (see `html_tables.read_html_table()`) converts
+        the html table into a pandas dataframe.
 
         Arguments:
             args (tuple): A length-1 tuple containing the response object
@@ -399,20 +407,19 @@ class FTSECompositionPipeline(Pipeline):
         """
         html_content = args[0].text
 
-        # Converting html content into a BeautifulSoup object and parsing for table:
-        soup = BeautifulSoup(html_content, "html.parser")
-        table_content = soup.find_all('table', {"id": "constituents"}) # <table id="constituents">
-        
-        # Converting Soup table object to HTML to be converted to pandas Dataframe:
-        component_df_lst = pd.read_html(str(table_content))
-        component_df = pd.DataFrame(component_df_lst[0])   
+        # Parsing the html content once with lxml and converting the table to a Dataframe:
+        component_df = read_html_table(html_content, table_id="constituents") # <table id="constituents">
 
         yield component_df             
 
     def load(self, *args):
-        """Method uses the pandas method to write the dataframe 
+        """Method uses the sqlite_sink service to write the dataframe 
         generated by the transform method to a database.
 
+        The table is only written when it changed since the last run, and then
+        only the constituents that were added or removed are recorded (see
+        `composition_history.load_composition_history()`).
+
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
                 dataframe of components generted by the transform method
@@ -420,11 +427,8 @@ class FTSECompositionPipeline(Pipeline):
         """
         component_df = args[0]
 
-        # Creating a connection to the database:
-        self._con = sqlite3.connect(self.dbpath)
-
-        # Writing data to the database:
-        component_df.to_sql("FTSE_components", self._con, if_exists="replace", index=False)  
+        # Writing only the constituent changes to the history behind the components view:
+        load_composition_history(self.get_service("sqlite_sink"), self.components_table, component_df)
 
 class SMICompositionPipeline(Pipeline):
     """A method that contains the logic necessary for constructing
@@ -444,20 +448,27 @@ class SMICompositionPipeline(Pipeline):
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
 
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
     """
-    def __init__(self, dbpath):
+    # The table the components are written to:
+    components_table = "SMI_components"
+
+    def __init__(self, dbpath, execute=True):
         # Initalizing parent method:
         super(SMICompositionPipeline, self).__init__(dbpath)
 
         # Hard Coded URL:
         self.smi_composition_url = "https://en.wikipedia.org/wiki/Swiss_Market_Index"   
         
-        # Calling the main `execute_pipeline` to execute all ETL functions:
-        self.execute_pipeline() 
+        # Calling the main `execute_pipeline` to execute all ETL functions (unless the
+        # pipeline is run as part of a CompositionSuitePipeline):
+        if execute:
+            self.execute_pipeline()
 
     def extract(self):
-        """Method that makes use of the requests python package
-        to extract the table containing the Swiss Market Index 
+        """Method that makes use of the pipeline's pooled http session
+        and on-disk response cache to extract the table containing the Swiss Market Index 
         Component Stocks from Wikipedia.
 
         Yields: 
@@ -467,7 +478,7 @@ class SMICompositionPipeline(Pipeline):
 
         """
         # Performing HTTP requests:
-        response = requests.get(self.smi_composition_url)
+        response = self.get_service("http").cached_get(self.smi_composition_url)
         if response.status_code == 200:
             yield response
 
@@ -479,8 +490,8 @@ class SMICompositionPipeline(Pipeline):
         extract method.
 
         It extracts the html content from the response object and through 
-        BeautifulSoup and pandas converts the html table into a pandas 
-        dataframe.
+        the lxml table extractor (see `html_tables.read_html_table()`) converts
+        the html table into a pandas dataframe.
 
         Arguments:
             args (tuple): A length-1 tuple containing the response object
@@ -493,20 +504,19 @@ class SMICompositionPipeline(Pipeline):
         """
         html_content = args[0].text
 
-        # Converting html content into a BeautifulSoup object and parsing for table:
-        soup = BeautifulSoup(html_content, "html.parser")
-        table_content = soup.find_all('table', {"class": "wikitable sortable"}) # <table class="wikitable sortable">
-        
-        # Converting Soup table object to HTML to be converted to pandas Dataframe:
-        component_df_lst = pd.read_html(str(table_content))
-        component_df = pd.DataFrame(component_df_lst[0])   
+        # Parsing the html content once with lxml and converting the table to a Dataframe:
+        component_df = read_html_table(html_content, table_class="wikitable sortable") # <table class="wikitable sortable">
 
         yield component_df             
 
     def load(self, *args):
-        """Method uses the pandas method to write the dataframe 
+        """Method uses the sqlite_sink service to write the dataframe 
         generated by the transform method to a database.
 
+        The table is only written when it changed since the last run, and then
+        only the constituents that were added or removed are recorded (see
+        `composition_history.load_composition_history()`).
+
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
                 dataframe of components generted by the transform method
@@ -514,11 +524,8 @@ class SMICompositionPipeline(Pipeline):
         """
         component_df = args[0]
 
-        # Creating a connection to the database:
-        self._con = sqlite3.connect(self.dbpath)
-
-        # Writing data to the database:
-        component_df.to_sql("SMI_components", self._con, if_exists="replace", index=False)  
+        # Writing only the constituent changes to the history behind the components view:
+        load_composition_history(self.get_service("sqlite_sink"), self.components_table, component_df)
 
 class SPICompositionPipeline(Pipeline):
     """A method that contains the logic necessary for constructing
@@ -538,20 +545,27 @@ class SPICompositionPipeline(Pipeline):
         dbpath (str): The relative or absoloute database URL pointing to
             the database where stock price data should be written.
 
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
     """
-    def __init__(self, dbpath):
+    # The table the components are written to:
+    components_table = "SPI_components"
+
+    def __init__(self, dbpath, execute=True):
         # Initalizing parent method:
         super(SPICompositionPipeline, self).__init__(dbpath)
 
         # Hard Coded URL:
         self.spi_composition_url = "https://en.wikipedia.org/wiki/Swiss_Performance_Index"   
         
-        # Calling the main `execute_pipeline` to execute all ETL functions:
-        self.execute_pipeline() 
+        # Calling the main `execute_pipeline` to execute all ETL functions (unless the
+        # pipeline is run as part of a CompositionSuitePipeline):
+        if execute:
+            self.execute_pipeline()
 
     def extract(self):
-        """Method that makes use of the requests python package
-        to extract the table containing the Swiss Performance Index 
+        """Method that makes use of the pipeline's pooled http session
+        and on-disk response cache to extract the table containing the Swiss Performance Index 
         Component Stocks from Wikipedia.
 
         Yields: 
@@ -561,7 +575,7 @@ class SPICompositionPipeline(Pipeline):
 
         """
         # Performing HTTP requests:
-        response = requests.get(self.spi_composition_url)
+        response = self.get_service("http").cached_get(self.spi_composition_url)
         if response.status_code == 200:
             yield response
 
@@ -573,8 +587,8 @@ class SPICompositionPipeline(Pipeline):
         extract method.
 
         It extracts the html content from the response object and through 
-        BeautifulSoup and pandas converts the html table into a pandas 
-        dataframe.
+        the lxml table extractor (see `html_tables.read_html_table()`) converts
+        the html table into a pandas dataframe.
 
         Arguments:
             args (tuple): A length-1 tuple containing the response object
@@ -587,20 +601,19 @@ class SPICompositionPipeline(Pipeline):
         """
         html_content = args[0].text
 
-        # Converting html content into a BeautifulSoup object and parsing for table:
-        soup = BeautifulSoup(html_content, "html.parser")
-        table_content = soup.find_all('table', {"class": "wikitable sortable"}) # <table class="wikitable sortable">
-        
-        # Converting Soup table object to HTML to be converted to pandas Dataframe:
-        component_df_lst = pd.read_html(str(table_content))
-        component_df = pd.DataFrame(component_df_lst[0])   
+        # Parsing the html content once with lxml and converting the table to a Dataframe:
+        component_df = read_html_table(html_content, table_class="wikitable sortable") # <table class="wikitable sortable">
 
         yield component_df             
 
     def load(self, *args):
-        """Method uses the pandas method to write the dataframe 
+        """Method uses the sqlite_sink service to write the dataframe 
         generated by the transform method to a database.
 
+        The table is only written when it changed since the last run, and then
+        only the constituents that were added or removed are recorded (see
+        `composition_history.load_composition_history()`).
+
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
                 dataframe of components generted by the transform method
@@ -608,8 +621,114 @@ class SPICompositionPipeline(Pipeline):
         """
         component_df = args[0]
 
-        # Creating a connection to the database:
-        self._con = sqlite3.connect(self.dbpath)
+        # Writing only the constituent changes to the history behind the components view:
+        load_composition_history(self.get_service("sqlite_sink"), self.components_table, component_df)
+class CompositionSuitePipeline(Pipeline):
+    """A method that contains the logic necessary for refreshing the
+    composition tables of every index in a single ETL pipeline run.
+
+    Instead of executing the six composition pipelines one after another, each
+    with its own Bonobo graph, executor and connections, the suite builds a single
+    graph containing the extract -> transform chain of every composition pipeline
+    (see `composition_pipelines`). Bonobo runs every node in its own thread so the
+    six pages are fetched in parallel through the suite's pooled http session.
+
+    The chains all feed a single load node. The suite's sqlite sink only commits
+    when the run ends, so every component table is written in one transaction.
+
+    Example:
+        test = CompositionSuitePipeline('test.sqlite')
+
+    Arguments:
+        dbpath (str): The relative or absoloute database URL pointing to
+            the database where the composition data should be written.
+
+        execute (bool): If the pipeline is executed by the constructor. Defaults to True.
+
+    """
+    # The composition pipelines refreshed by the suite:
+    composition_pipelines = (
+        SPYCompositionPipeline,
+        DJIACompositionPipeline,
+        SPTSXCompositionPipeline,
+        FTSECompositionPipeline,
+        SMICompositionPipeline,
+        SPICompositionPipeline
+    )
+
+    # Buffered writes are only committed when the run ends, in a single transaction:
+    sqlite_sink_params = {"batch_size": None, "flush_interval": None}
+
+    def __init__(self, dbpath, execute=True):
+        # Initalizing the parent method:
+        super(CompositionSuitePipeline, self).__init__(dbpath)
+
+        # Building the member pipelines without executing them. They use the suite's services:
+        self.members = [pipeline_cls(dbpath, execute=False) for pipeline_cls in self.composition_pipelines]
+        for member in self.members:
+            member.get_services = self.get_services
+
+        # Calling the main `execute_pipeline` to execute all ETL functions:
+        if execute:
+            self.execute_pipeline()
+
+    def _member_transform(self, member):
+        """Internal method building the transform node of a member pipeline's
+        chain, which tags each dataframe with the member that produced it.
 
-        # Writing data to the database:
-        component_df.to_sql("SPI_components", self._con, if_exists="replace", index=False)  
\ No newline at end of file
+        Arguments:
+            member (Pipeline): The member composition pipeline.
+
+        Returns:
+            function: The transform node yielding (member, component_df) tuples.
+
+        """
+        def transform(*args):
+            for component_df in member.transform(*args):
+                yield member, component_df
+
+        transform.__name__ = f"transform_{member.components_table}"
+
+        return transform
+
+    def load(self, *args):
+        """Method writes the dataframe of a member pipeline through the
+        member's own load method, which buffers it in the shared sqlite sink.
+
+        Arguments:
+            args (tuple): A length-2 tuple containing the member pipeline and the
+                dataframe of components generated by its transform method.
+
+        """
+        member, component_df = args[0], args[1]
+
+        member.load(component_df)
+
+    def build_graph(self, **options):
+        """The method that is used to construct a Bonobo ETL pipeline
+        DAG containing the extract and transform methods of every member
+        pipeline feeding the single suite load method.
+
+        Returns: 
+            bonobo.Graph: The Bonobo Graph that is declared as an instance
+                parameter and that will be executed by the self.execute_pipeline method.
+
+        """
+        # Building the Graph:
+        self.graph = bonobo.Graph()
+
+        # Creating the shared load node:
+        self.graph.add_chain(
+            self.load,
+            _input=None # Input set to None so self.load does not start untill params are passed.
+        )
+
+        # Adding the extract -> transform chain of every member pipeline:
+        for member in self.members:
+            self.graph.add_chain(
+                member.extract,
+                self._member_transform(member),
+                _output=self.load
+            )
+
+        return self.graph
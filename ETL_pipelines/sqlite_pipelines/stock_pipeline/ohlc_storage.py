@@ -0,0 +1,189 @@
+"""Script containing the long-format OHLC storage layout and the tool that
+migrates databases from one `{ticker}_ohlc` table per symbol into it.
+
+In the long layout every bar of every ticker is stored in a single `ohlc`
+table keyed on (ticker, Date). The table is declared WITHOUT ROWID so the rows
+are stored clustered in primary key order: all the bars of a ticker are next
+to each other on disk, ordered by date. A covering index on (Date, ticker, ...)
+answers cross-sectional queries (every ticker on a date range) from the index
+alone.
+
+Example (from the root of the repository):
+    python -m ETL_pipelines.sqlite_pipelines.stock_pipeline.ohlc_storage test.sqlite --drop-tables
+
+"""
+# Importing external libraries:
+import argparse
+import sqlite3
+
+# Importing the sqlite sink helpers:
+from ETL_pipelines.sqlite_sink import quote_identifier, TABLE_VERSIONS_DDL, TABLE_VERSIONS_UPSERT
+
+# The name of the long-format table and its price columns (in the order yfinance returns them):
+OHLC_TABLE = "ohlc"
+OHLC_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+# The suffix of the per-ticker tables created by the OHLCPipeline:
+PER_TICKER_SUFFIX = "_ohlc"
+
+OHLC_TABLE_DDL = f"""CREATE TABLE IF NOT EXISTS {OHLC_TABLE} (
+    ticker TEXT NOT NULL,
+    Date TIMESTAMP NOT NULL,
+    Open REAL,
+    High REAL,
+    Low REAL,
+    Close REAL,
+    "Adj Close" REAL,
+    Volume INTEGER,
+    PRIMARY KEY (ticker, Date)
+) WITHOUT ROWID"""
+
+OHLC_INDEX_DDL = f"""CREATE INDEX IF NOT EXISTS ix_{OHLC_TABLE}_date_ticker
+    ON {OHLC_TABLE} (Date, ticker, Close, "Adj Close", Volume)"""
+
+def create_ohlc_table(sink):
+    """Method buffers the statements that create the long-format `ohlc`
+    table and its covering index in a SQLiteSink (or executes them directly
+    on a sqlite3 connection).
+
+    Arguments:
+        sink (SQLiteSink|sqlite3.Connection): The sink or connection the
+            statements are executed with.
+
+    """
+    sink.execute(OHLC_TABLE_DDL)
+    sink.execute(OHLC_INDEX_DDL)
+
+def to_long_format(ticker, ohlc_df):
+    """Method converts a single ticker's OHLC dataframe (indexed by Date) into
+    the rows of the long-format `ohlc` table.
+
+    Price columns missing from the dataframe (eg: 'Adj Close' when yfinance
+    auto-adjusts prices) are written as NULL and unknown columns are dropped.
+
+    Arguments:
+        ticker (str): The ticker symbol of the dataframe.
+
+        ohlc_df (pandas.DataFrame): The OHLC dataframe indexed by Date.
+
+    Returns:
+        pandas.DataFrame: The dataframe with 'ticker', 'Date' and the OHLC_COLUMNS.
+
+    """
+    long_df = ohlc_df.reindex(columns=list(OHLC_COLUMNS))
+    long_df.index.name = "Date"
+    long_df = long_df.reset_index()
+    long_df.insert(0, "ticker", ticker)
+
+    return long_df
+
+def detect_layout(con):
+    """Method determines which OHLC storage layouts a database contains.
+
+    Arguments:
+        con (sqlite3.Connection): The connection to the database.
+
+    Returns:
+        dict: A dict with a boolean for the 'long' layout (an `ohlc` table exists)
+            and the 'per_ticker' layout (at least one `{ticker}_ohlc` table exists).
+
+    """
+    table_names = [row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    return {
+        "long": OHLC_TABLE in table_names,
+        "per_ticker": any(name.endswith(PER_TICKER_SUFFIX) for name in table_names),
+    }
+
+def per_ticker_tables(con):
+    """Method lists the per-ticker OHLC tables of a database.
+
+    Returns:
+        dict: A dict mapping each ticker symbol to the name of its `{ticker}_ohlc` table.
+
+    """
+    table_names = con.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ESCAPE '\\'",
+        ("%\\" + PER_TICKER_SUFFIX,)).fetchall()
+
+    return {name[:-len(PER_TICKER_SUFFIX)]: name for (name,) in table_names}
+
+def migrate_per_ticker_tables(dbpath, drop_tables=False, verbose=False):
+    """Method copies every `{ticker}_ohlc` table of a database into the
+    long-format `ohlc` table.
+
+    Each table is copied with a single INSERT ... SELECT statement inside its own
+    transaction, so the data never passes through python and an interrupted
+    migration can be resumed: rows already copied are replaced, not duplicated.
+
+    Arguments:
+        dbpath (str): The path to the sqlite database being migrated.
+
+        drop_tables (bool): If the per-ticker tables are dropped once copied.
+
+        verbose (bool): If the progress of the migration is printed.
+
+    Returns:
+        dict: A dict mapping each migrated ticker to the number of rows copied.
+
+    """
+    con = sqlite3.connect(dbpath, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    create_ohlc_table(con)
+    con.execute(TABLE_VERSIONS_DDL)
+
+    migrated = {}
+    try:
+        for ticker, table in per_ticker_tables(con).items():
+
+            # Only the price columns the table actually has are copied:
+            table_columns = [row[1] for row in con.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+            if "Date" not in table_columns:
+                continue
+
+            columns = ["Date"] + [col for col in OHLC_COLUMNS if col in table_columns]
+            column_sql = ", ".join(quote_identifier(col) for col in columns)
+
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = con.execute(
+                    f"INSERT OR REPLACE INTO {OHLC_TABLE} (ticker, {column_sql}) "
+                    f"SELECT ?, {column_sql} FROM {quote_identifier(table)} WHERE Date IS NOT NULL",
+                    (ticker,))
+                migrated[ticker] = cursor.rowcount
+
+                if drop_tables:
+                    con.execute(f"DROP TABLE {quote_identifier(table)}")
+
+                # Letting cached readers of either table know that it changed:
+                con.executemany(TABLE_VERSIONS_UPSERT, [(OHLC_TABLE,), (table,)])
+
+                con.execute("COMMIT")
+
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+
+            if verbose:
+                print(f"{table} -> {OHLC_TABLE}: {migrated[ticker]} rows")
+
+        con.execute("ANALYZE")
+
+    finally:
+        con.close()
+
+    return migrated
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migrate the per-ticker '{ticker}_ohlc' tables of a database into a single 'ohlc' table.")
+    parser.add_argument("dbpath", help="The path to the sqlite database.")
+    parser.add_argument("--drop-tables", action="store_true",
+        help="Drop each per-ticker table once it has been copied.")
+    options = parser.parse_args(argv)
+
+    migrated = migrate_per_ticker_tables(options.dbpath, drop_tables=options.drop_tables, verbose=True)
+    print(f"Migrated {len(migrated)} tickers, {sum(migrated.values())} rows.")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 # Importing external libraries:
 import pandas as pd
 import yfinance as yf
-import requests
 import bonobo
 from bs4 import BeautifulSoup
-import sqlite3
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Importing the Base Pipeline API Object:
 from ETL_pipelines.base_pipeline import Pipeline
+from ETL_pipelines.rate_limiter import TokenBucket
+
+# SEC EDGAR allows at most 10 requests per second from a single host. The limiter
+# is shared by every EDGARFilingsPipeline in the process so that pipelines running
+# at the same time stay within the limit together:
+SEC_RATE_LIMITER = TokenBucket(rate=10, capacity=1)
 
 class EDGARFilingsPipeline(Pipeline):
     """An object that contains all the logic and methods
@@ -31,13 +35,26 @@ class EDGARFilingsPipeline(Pipeline):
         filings_type (str): The string that indicates the type of SEC
             EDGAR filings that are extracted by the pipeline. This string
             is passed into the url string used to make the request.
+
+    Filing Detail pages and filing documents are fetched concurrently by
+    `max_workers` threads. Every request to SEC EDGAR is paced by the shared
+    SEC_RATE_LIMITER token bucket, registered as the 'sec_rate_limiter' service.
+    Responses served from the HTTP cache without a request do not use up tokens.
     """
+    # The number of threads fetching filings at once:
+    max_workers = 8
+
+    # Keeping enough pooled connections to SEC EDGAR open for every worker:
+    http_session_params = {"pool_maxsize": 8}
+
     def __init__(self, dbpath, filings_type):
+
+        # Initalizing the parent Pipeline object:
+        super(EDGARFilingsPipeline, self).__init__(dbpath)
         
         # Declaring instance params:
         self.ticker_lst = []
         self.base_sec_url = "https://www.sec.gov"
-        self.dbpath = dbpath
         self.filings_type = filings_type
         
     def extract_all_filings(self):
@@ -72,7 +89,7 @@ class EDGARFilingsPipeline(Pipeline):
                 of filings data from the 'EDGAR Search Results' page. (str, dataframe)
 
         """
-        con = sqlite3.connect(self.dbpath)
+        con = self.get_service("sqlite_sink").connection()
         
         # Performing a query to the local database for the CIK:
         SPY_df = pd.read_sql_query("SELECT * FROM SPY_components", con)
@@ -94,7 +111,8 @@ class EDGARFilingsPipeline(Pipeline):
                 
                 # Performing Request to SEC EDGAR:
                 edgar_result_url = self._build_edgar_url(cik=ticker_cik, filings_type=self.filings_type)
-                edgar_result_response = requests.get(edgar_result_url)
+                edgar_result_response = self.get_service("http").cached_get(
+                    edgar_result_url, rate_limiter=self.get_service("sec_rate_limiter"))
                 
                 # Adding conditonal statements to catch response error:
                 if edgar_result_response.status_code != 200:
@@ -135,7 +153,8 @@ class EDGARFilingsPipeline(Pipeline):
 
         The additional column "Content" is created by passing the url in the "Format" column into
         the _extract_individual_filings() method. The method takes the url and extracts the actual
-        html content of the filings itself.    
+        html content of the filings itself. The filings are extracted concurrently by a pool of 
+        `max_workers` threads, the order of the rows is unchanged.    
 
         The dataframe built is as follows:
 
@@ -158,8 +177,14 @@ class EDGARFilingsPipeline(Pipeline):
         # Unpacking tuple:
         ticker, filings_df = args[0], args[1]
 
+        # Attributing the bytes fetched by the worker threads to this node's metrics:
+        extract_filing = self._extract_individual_filing
+        if getattr(self, "metrics", None) is not None:
+            extract_filing = self.metrics.bind_current_node(extract_filing)
+
         # Performing extraction of individual filings for each row in the dataframe:
-        filings_df["Content"] = filings_df["Format"].map(lambda url: self._extract_individual_filing(url))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            filings_df["Content"] = list(executor.map(extract_filing, filings_df["Format"]))
 
         # Formatting the dataframe to be written to the database:
         filings_df.rename(columns={"Format":"Filings_Url", "Filing Date":"Filing_Date"}, inplace=True)
@@ -168,7 +193,7 @@ class EDGARFilingsPipeline(Pipeline):
 
     def load(self, *args):
         """Method writes the complete filings dataframe into
-        the sqlite database.
+        the sqlite database through the shared sqlite_sink service.
 
         Arguments:
             args (tuple): The arguments passed into the load method by the transform method
@@ -177,12 +202,9 @@ class EDGARFilingsPipeline(Pipeline):
         """     
         # Unpacking arguments:
         ticker, filings_df = args[0], args[1]
-        
-        # Creating SQL Connection:
-        con = sqlite3.connect(self.dbpath)
 
         # Writing the dataframe to the database:
-        filings_df.to_sql(f"{ticker}_sec_filings", con, if_exists="append")
+        self.get_service("sqlite_sink").write(f"{ticker}_sec_filings", filings_df, if_exists="append")
 
     def build_ticker_lst(self, filepath):
         """The method that opens the file containing ticker
@@ -259,8 +281,8 @@ class EDGARFilingsPipeline(Pipeline):
                 database table query.
                 
         """
-        # Declaring localized connection:
-        con = sqlite3.connect(self.dbpath)
+        # Using the connection of the current worker thread:
+        con = self.get_service("sqlite_sink").connection()
 
         # Querying database for data table:
         tbl_name = f"{ticker}_sec_filings"
@@ -294,7 +316,9 @@ class EDGARFilingsPipeline(Pipeline):
 
         This is the method that is used to build a dataframe column of
         full filing document content by mapping it to another dataframe
-        column containing "Filing Detail" urls.
+        column containing "Filing Detail" urls. It is called from several
+        threads at once, both requests it makes wait on the shared rate limiter
+        unless they are served from the HTTP cache.
 
         Arguments:
             url (str): The url to a SEC EDGAR Filing Detail page.
@@ -303,9 +327,11 @@ class EDGARFilingsPipeline(Pipeline):
             str: A large string containing all the HTML content of a filing
                 document. 
         """
+        http = self.get_service("http")
+        rate_limiter = self.get_service("sec_rate_limiter")
+
         # Performing request to the Filing Detail Page:
-        response = requests.get(url)
-        time.sleep(5)
+        response = http.cached_get(url, rate_limiter=rate_limiter)
 
         # Converting the html content to the soup object and parsing:
         if response.status_code == 200:
@@ -322,7 +348,7 @@ class EDGARFilingsPipeline(Pipeline):
                 document_url = f"{self.base_sec_url}{document_href}"
 
                 # Performing the Request to the document_url for filing content:
-                filing_content = requests.get(document_url).text
+                filing_content = http.cached_get(document_url, rate_limiter=rate_limiter).text
 
                 return filing_content
 
@@ -332,6 +358,19 @@ class EDGARFilingsPipeline(Pipeline):
         else:
             raise ValueError(f"Response Status Code for {url} is {response.status_code}")
     
+    def build_services(self, **options):
+        """Method extends the base Pipeline services with the shared
+        SEC EDGAR rate limiter.
+
+        Returns:
+            dict: A dict mapping each service name to the service object.
+
+        """
+        services = super(EDGARFilingsPipeline, self).build_services(**options)
+        services["sec_rate_limiter"] = SEC_RATE_LIMITER
+
+        return services
+
     def build_graph(self, **options):
         """The method that is used to construct a Bonobo ETL pipeline
         DAG that schedules the following ETL methods:
@@ -0,0 +1,484 @@
+"Script containing the shared, batched sqlite sink used by the sqlite Pipeline APIs"
+
+# Importing External Packages:
+import sqlite3
+import threading
+import time
+import pandas as pd
+
+# Pragmas applied to every connection opened by the sink:
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64000, # Negative values are KiB, ~64MB page cache.
+}
+
+# The table holding a modification counter for every table written by the sink.
+# Readers (eg: the StockData query cache) compare counters to find out which
+# tables changed since they last read them:
+TABLE_VERSIONS_TABLE = "_table_versions"
+
+TABLE_VERSIONS_DDL = f"""CREATE TABLE IF NOT EXISTS {TABLE_VERSIONS_TABLE} (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    modified_at TEXT NOT NULL
+)"""
+
+TABLE_VERSIONS_UPSERT = f"""INSERT INTO {TABLE_VERSIONS_TABLE} (name, version, modified_at)
+    VALUES (?, 1, datetime('now'))
+    ON CONFLICT(name) DO UPDATE SET version = version + 1, modified_at = excluded.modified_at"""
+
+def quote_identifier(name):
+    """Method wraps a table or column name in double quotes so that names
+    containing spaces or symbols (eg: 'Adj Close', 'File/Film Number') can
+    be used in raw SQL statements.
+
+    Arguments:
+        name (str): The table or column name.
+
+    Returns:
+        str: The quoted identifier.
+
+    """
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+def _sql_type(dtype):
+    """Method maps a pandas dtype to the sqlite column type that pandas.to_sql
+    would have used for it, so tables created by the sink match the tables
+    previously created by pandas.
+
+    Arguments:
+        dtype (numpy.dtype): The dtype of the dataframe column.
+
+    Returns:
+        str: The sqlite column type.
+
+    """
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    elif pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    else:
+        return "TEXT"
+
+def _frame_to_rows(df, index=True, index_label=None):
+    """Method converts a dataframe into the column names and list of row
+    tuples that are passed to `executemany`.
+
+    Datetime values are written as 'YYYY-MM-DD HH:MM:SS' strings (the same
+    format pandas.to_sql produces) and missing values are written as NULL.
+
+    Arguments:
+        df (pandas.DataFrame): The dataframe being converted.
+
+        index (bool): If the dataframe index is written as a column.
+
+        index_label (str): The column name used for the index. Defaults to the
+            name of the index or 'index' if the index is unnamed.
+
+    Returns:
+        tuple: A tuple of the list of column names, the list of column sql types
+            and the list of row tuples (columns, types, rows).
+
+    """
+    if index:
+        label = index_label or df.index.name or "index"
+        df = df.reset_index()
+        df.rename(columns={df.columns[0]: label}, inplace=True)
+
+    columns = [str(col) for col in df.columns]
+    types = [_sql_type(dtype) for dtype in df.dtypes]
+
+    # Formatting datetime columns and converting numpy scalars into python objects:
+    converted = {}
+    for position, col in enumerate(df.columns):
+        values = df.iloc[:, position]
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            values = values.dt.strftime("%Y-%m-%d %H:%M:%S")
+        values = values.astype(object)
+        converted[position] = values.where(pd.notnull(values), None)
+
+    rows = list(zip(*(converted[position] for position in range(len(columns)))))
+
+    return columns, types, rows
+
+
+class _ThreadState(object):
+    """Internal object holding the connection and buffered operations
+    belonging to a single worker thread."""
+    def __init__(self, con):
+        self.con = con
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_rows = 0
+        self.tables = set()
+        self.last_flush = time.monotonic()
+        self.failures = 0
+
+
+class SQLiteSink(object):
+    """A reusable sqlite writer that is shared by all of the nodes of a
+    Pipeline through the Bonobo services dict.
+
+    Bonobo runs every node of a graph in its own thread and sqlite connections
+    cannot be shared between threads, so the sink opens one connection per
+    worker thread the first time that thread uses it. Every connection is put
+    in WAL mode with relaxed synchronous settings so that overlapping pipelines
+    do not block each other's readers and a busy timeout is set so that
+    concurrent writers wait instead of failing with "database is locked".
+
+    Writes are not executed immediately. Each dataframe passed to `write()` is
+    converted to rows and buffered as `executemany` batches. The buffer of a thread
+    is written inside a single explicit transaction once it holds `batch_size`
+    rows or `flush_interval` seconds have passed since its last commit. The
+    remaining buffers are written when `flush_all()` or `close()` is called at
+    the end of the pipeline run.
+
+    Unless `track_table_versions` is disabled, every transaction also increments
+    the counter of each table it wrote to in the `_table_versions` table.
+
+    A transaction that fails is rolled back and its buffer is kept, so that the
+    next flush retries it. Once a buffer has failed `max_retries` more times it
+    is dropped from the buffer and kept as a failed batch instead (see
+    `failed_batches()`), so that a batch that can never be written (eg: rows
+    that do not match the table schema) does not fail every later flush.
+    `flush_all()` and `close()` retry a failed buffer straight away, so no failed
+    buffer outlives the run that wrote it.
+
+    Example:
+        sink = SQLiteSink("test.sqlite")
+        sink.write("SPY_components", components_df, if_exists="replace", index=False)
+        sink.close()
+
+    Arguments:
+        dbpath (str): The relative or absoloute database URL pointing to
+            the database the sink writes to.
+
+        batch_size (int|None): The number of buffered rows that triggers a commit.
+            If None the buffer is only written on an explicit flush. Defaults to 5000.
+
+        flush_interval (float|None): The number of seconds after which a buffer
+            is committed on the next write regardless of its size. Defaults to 5.
+
+        timeout (float): The number of seconds a connection waits on a locked
+            database before raising. Defaults to 30.
+
+        pragmas (dict): Pragmas that overwrite or extend DEFAULT_PRAGMAS.
+
+        track_table_versions (bool): If the modification counters of the tables
+            written to are maintained. Defaults to True.
+
+        max_retries (int): The number of times a failed buffer is retried before
+            it is dropped as a failed batch. Defaults to 1.
+
+    """
+    def __init__(self, dbpath, batch_size=5000, flush_interval=5.0, timeout=30.0, pragmas=None,
+        track_table_versions=True, max_retries=1):
+
+        # Declaring instance params:
+        self.dbpath = dbpath
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.track_table_versions = track_table_versions
+        self.max_retries = max_retries
+
+        self._local = threading.local()
+        self._states = []
+        self._states_lock = threading.Lock()
+        self._failed_batches = []
+
+    def _open_connection(self):
+        """Method opens a new sqlite connection configured for the sink.
+
+        The connection is opened in autocommit mode (isolation_level=None)
+        so that transactions are controlled explicitly by `flush()`.
+
+        Returns:
+            sqlite3.Connection: The configured connection.
+
+        """
+        con = sqlite3.connect(
+            self.dbpath,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False) # Buffers are flushed from the main thread by close().
+
+        for pragma, value in self.pragmas.items():
+            con.execute(f"PRAGMA {pragma}={value}")
+
+        return con
+
+    def _state(self):
+        """Method returns the _ThreadState of the calling thread, opening
+        a new connection if the thread has not used the sink before."""
+        state = getattr(self._local, "state", None)
+        if state is None:
+            state = _ThreadState(self._open_connection())
+            self._local.state = state
+
+            with self._states_lock:
+                self._states.append(state)
+
+        return state
+
+    def connection(self):
+        """Method returns the connection belonging to the calling thread.
+
+        The connection is intended for reads made by pipeline nodes. Writes
+        buffered by the same thread are not visible until they are flushed.
+
+        Returns:
+            sqlite3.Connection: The thread's connection.
+
+        """
+        return self._state().con
+
+    def execute(self, sql, params=(), tables=None):
+        """Method buffers a single sql statement so that it is executed,
+        in order, inside the next transaction of the calling thread.
+
+        Arguments:
+            sql (str): The sql statement.
+
+            params (tuple): The parameters bound to the statement.
+
+            tables (list|None): The tables modified by the statement, whose
+                modification counters are incremented with the transaction.
+
+        """
+        state = self._state()
+        with state.lock:
+            state.pending.append((sql, params, False))
+            state.tables.update(tables or ())
+
+    def create_table(self, table, df, index=True, index_label=None, primary_key=None, if_exists="append"):
+        """Method buffers the statements that create a table whose schema
+        matches the dataframe.
+
+        Arguments:
+            table (str): The name of the table.
+
+            df (pandas.DataFrame): The dataframe whose columns and dtypes are
+                used to build the table schema.
+
+            index (bool): If the dataframe index is written as a column. When True
+                an index on that column is created, as pandas.to_sql does.
+
+            index_label (str): The column name used for the dataframe index.
+
+            primary_key (list|None): The columns that make up the table's primary key.
+
+            if_exists (str): If 'replace' the existing table is dropped first,
+                otherwise the table is only created if it does not exist.
+
+        """
+        columns, types, _ = _frame_to_rows(df.iloc[:0], index=index, index_label=index_label)
+        self._create_table(table, columns, types, index, primary_key, if_exists)
+
+    def _create_table(self, table, columns, types, index, primary_key, if_exists):
+        """Internal method that buffers the create statements for a table
+        given its already resolved columns and column types."""
+        column_defs = [f"{quote_identifier(col)} {sql_type}" for col, sql_type in zip(columns, types)]
+        if primary_key:
+            column_defs.append("PRIMARY KEY ({})".format(", ".join(quote_identifier(col) for col in primary_key)))
+
+        if if_exists == "replace":
+            self.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+
+        self.execute("CREATE TABLE IF NOT EXISTS {} ({})".format(quote_identifier(table), ", ".join(column_defs)))
+
+        # Matching the index pandas.to_sql creates on the dataframe index column:
+        if index and not primary_key:
+            self.execute("CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                quote_identifier(f"ix_{table}_{columns[0]}"), quote_identifier(table), quote_identifier(columns[0])))
+
+    def write(self, table, df, if_exists="append", index=True, index_label=None, primary_key=None,
+        on_conflict=None):
+        """Method buffers a dataframe to be inserted into a table.
+
+        The table is created from the dataframe schema if it does not exist.
+        Mirroring pandas.to_sql, `if_exists='replace'` drops and recreates the table
+        and `if_exists='append'` inserts into the existing table.
+
+        Arguments:
+            table (str): The name of the table being written to.
+
+            df (pandas.DataFrame): The dataframe being written.
+
+            if_exists (str): Either 'append' or 'replace'. Defaults to 'append'.
+
+            index (bool): If the dataframe index is written as a column.
+
+            index_label (str): The column name used for the dataframe index.
+
+            primary_key (list|None): The primary key columns used if the table
+                is created by this write.
+
+            on_conflict (str|None): The sqlite conflict resolution used for rows that
+                violate a primary key or unique index. 'replace' overwrites the stored
+                row (an upsert), 'ignore' keeps it and None raises. Defaults to None.
+
+        """
+        if if_exists not in ("append", "replace"):
+            raise ValueError(f"if_exists must be 'append' or 'replace', not {if_exists}")
+        if on_conflict not in (None, "replace", "ignore"):
+            raise ValueError(f"on_conflict must be None, 'replace' or 'ignore', not {on_conflict}")
+
+        columns, types, rows = _frame_to_rows(df, index=index, index_label=index_label)
+        self._create_table(table, columns, types, index, primary_key, if_exists)
+
+        # Building the parameterized insert statement for executemany:
+        insert_sql = "INSERT {}INTO {} ({}) VALUES ({})".format(
+            f"OR {on_conflict.upper()} " if on_conflict is not None else "",
+            quote_identifier(table),
+            ", ".join(quote_identifier(col) for col in columns),
+            ", ".join("?" for _ in columns))
+
+        state = self._state()
+        with state.lock:
+            state.pending.append((insert_sql, rows, True))
+            state.pending_rows += len(rows)
+            state.tables.add(table)
+
+        # Committing the buffer if either the size or the time threshold is reached:
+        if self.batch_size is not None and state.pending_rows >= self.batch_size:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - state.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _flush_state(self, state):
+        """Internal method that writes the buffered operations of a thread
+        inside a single transaction. If the transaction fails it is rolled
+        back and the operations stay buffered for the next flush, unless they
+        have already failed `max_retries` times (see `_drop_failed_batch()`)."""
+        with state.lock:
+            if not state.pending:
+                return
+
+            con = state.con
+            try:
+                con.execute("BEGIN IMMEDIATE")
+                for sql, params, many in state.pending:
+                    if many:
+                        con.executemany(sql, params)
+                    else:
+                        con.execute(sql, params)
+
+                # Bumping the counters of the written tables in the same transaction:
+                if self.track_table_versions and state.tables:
+                    con.execute(TABLE_VERSIONS_DDL)
+                    con.executemany(TABLE_VERSIONS_UPSERT, [(table,) for table in sorted(state.tables)])
+
+                con.execute("COMMIT")
+
+            except Exception as e:
+                # Keeping the buffer so that the batch can be retried, until it has failed too often:
+                if con.in_transaction:
+                    con.execute("ROLLBACK")
+                state.failures += 1
+                if state.failures > self.max_retries:
+                    self._drop_failed_batch(state, e)
+                raise
+
+            # Clearing the buffer only once it has been committed:
+            self._clear_state(state)
+
+    def _clear_state(self, state):
+        "Internal method emptying the buffer of a thread."
+        state.pending = []
+        state.pending_rows = 0
+        state.tables = set()
+        state.failures = 0
+        state.last_flush = time.monotonic()
+
+    def _drop_failed_batch(self, state, error):
+        """Internal method moving the buffer of a thread that failed more than
+        `max_retries` times to the failed batches, reporting it."""
+        batch = {
+            "tables": sorted(state.tables),
+            "rows": state.pending_rows,
+            "statements": state.pending,
+            "error": error,
+            "attempts": state.failures,
+            "failed_at": time.time()}
+
+        with self._states_lock:
+            self._failed_batches.append(batch)
+
+        print(f"Dropped a batch of {batch['rows']} rows for {', '.join(batch['tables']) or self.dbpath} after {batch['attempts']} failed attempts: {error!r}")
+        self._clear_state(state)
+
+    def failed_batches(self):
+        """Method returns the batches that were dropped after failing more than
+        `max_retries` times.
+
+        Returns:
+            list: A dict per batch with the 'tables' it wrote to, its number of 'rows',
+                its buffered 'statements' as (sql, params, executemany) tuples, the last
+                'error', the number of 'attempts' and the time it 'failed_at'.
+
+        """
+        with self._states_lock:
+            return list(self._failed_batches)
+
+    def discard_failed_batches(self):
+        """Method discards the failed batches.
+
+        Returns:
+            list: The discarded batches, see `failed_batches()`.
+
+        """
+        with self._states_lock:
+            batches, self._failed_batches = self._failed_batches, []
+
+        return batches
+
+    def flush(self):
+        """Method commits the buffered operations of the calling thread."""
+        self._flush_state(self._state())
+
+    def flush_all(self):
+        """Method commits the buffered operations of every thread that has
+        used the sink. Every buffer is flushed even if an earlier one fails,
+        a failing buffer being retried until it is dropped as a failed batch,
+        then the first error is raised."""
+        with self._states_lock:
+            states = list(self._states)
+
+        errors = []
+        for state in states:
+            while True:
+                try:
+                    self._flush_state(state)
+                    break
+                except Exception as e:
+                    if not state.pending:
+                        errors.append(e)
+                        break
+
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Method commits all buffered operations and closes every connection
+        opened by the sink. The sink can be used again after being closed.
+
+        Buffers that still fail once retried are dropped as failed batches (see
+        `failed_batches()`) and the first error is raised."""
+        try:
+            self.flush_all()
+
+        finally:
+            with self._states_lock:
+                states = [state for state in self._states if not state.pending]
+                self._states = [state for state in self._states if state.pending]
+
+            for state in states:
+                state.con.close()
+
+            self._local = threading.local()
@@ -1,11 +1,8 @@
 # Importing Data Manipulation packages:
 import pandas as pd
-import sqlite3
-import bonobo
 import os
-import json
-import requests
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
 from pytz import timezone
 
 # Python Reddit API Wrapper:
@@ -13,8 +10,12 @@ import praw
 
 # Importing the Sqlite Reddit Pipeline Object
 from ETL_pipelines.base_pipeline import web_api_json_load
+from ETL_pipelines.async_runner import web_api_json_load_async
 from ETL_pipelines.sqlite_pipelines.social_media_pipeline.reddit_posts import RedditContentPipeline
 
+# The maximum number of post ids sent in the query string of each dedup request:
+WEB_DEDUP_BATCH_SIZE = 100
+
 class RedditContentWebAPIPipeline(RedditContentPipeline):
     """An object that contains all the logic and methods
     necessary to construct a ETL pipeline for extracting
@@ -39,7 +40,18 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
         subreddit (str): The string that indicates the specific subreddit
             that the data is to be scraped from.
     """
-    def __init__(self, api_endpoint, subreddit_name, **kwargs):
+    # The query parameter filtering the endpoint on a comma seperated list of post ids,
+    # None to dedup against the posts created in the last `dedup_window` instead:
+    dedup_id_filter = "id__in"
+
+    # Set once the endpoint has returned posts that were not asked for by the id filter:
+    _dedup_id_filter_ignored = False
+
+    # The query parameter filtering the endpoint on the post creation time:
+    dedup_since_filter = "created_on__gte"
+    dedup_window = timedelta(days=2)
+
+    def __init__(self, api_endpoint, subreddit_name, execute=True, **kwargs):
 
         # Declaring Instance Parameters:
         self.api_endpoint = api_endpoint
@@ -58,13 +70,16 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
 
         print(f"Reddit Instance Initalized with Read Status:{self.reddit.read_only}")
 
-        # Execuring all of the ETL functions mapped in the graph:
-        self.execute_pipeline()
+        # Execuring all of the ETL functions mapped in the graph, unless the pipeline
+        # is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     def transform_posts(self, *args):
-        """The method recieves a length 1 tuple containing a dict of reddit posts generated 
-        from the extraction methods and performs transformation on the dict to convert it 
-        into a dataframe of elements that are not already stored in the database.
+        """The method recieves a length 1 tuple containing the dict of reddit posts merged
+        from the extraction methods by `extract_posts()` and performs transformation on the dict to convert it 
+        into a dataframe of elements that are not already stored in the database. In the asyncio
+        execution mode the tuple also contains the set of post ids already stored by the Web API.
 
         The dictionary recieved from the extraction methods are in the format:
 
@@ -73,9 +88,8 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
             idn: [title, content, upvote_ratio, score, num_comments, created_on, stickied, over_18, spoiler, permalink, author]
         }
                     
-        The transformation method queries the Web API for existing posts posted on the
-        day that the pipeline is executed. It compares the index of the database data 
-        and the index of the data recieved from the extraction methods. Only unique
+        The transformation method queries the Web API for the ids of the extracted
+        posts that are already stored (see `_existing_post_ids()`). Only unique
         elements not already in the database are passed into the load method.
 
         When converting a dictionary to a unique elements Dataframe the method unpacks
@@ -94,29 +108,13 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
         # Unpacking Args Tuple:
         posts_dict = args[0]
         
-        # Querying the Web API for all subreddit posts:
-        key = self.kwargs["API_Key"]
-        existing_posts_response = requests.get(self.api_endpoint, headers={"Authorization":f"Token {key}"})
-        print(f"Made Request to the Database for {self.subreddit_name} posts with status code {existing_posts_response.status_code}")
-
-        # Conditional that ensures correct get request status code:  
-        if existing_posts_response.status_code != 200:
-            raise ValueError(f"Response from Web API Request w/ Status Code {existing_posts_responses.status_code}")
-        
-        # Converting the json response object to a dataframe:
-        existing_posts_json = existing_posts_response.json()
-        
-        # If database contains no entry do not attempt to create df:
-        if len(existing_posts_json) > 0:
-            existing_posts = pd.DataFrame.from_dict(existing_posts_json)
-            existing_posts.set_index("id", inplace=True)
+        # Querying the Web API for the extracted post ids that are already stored, unless
+        # they were already queried by the asyncio execution mode (see `extract_async()`):
+        if len(args) > 1:
+            existing_posts_id = args[1]
+        else:
+            existing_posts_id = self._existing_post_ids(list(posts_dict.keys()), self.subreddit_name)
 
-        existing_posts_id = []
-        try:
-            existing_posts_id = existing_posts.index
-        except:
-            pass
-            
         # Extracting unqiue keys from the posts_dict.keys() that are not present in the existing_post_id:
         unique_id_keys = list(set(posts_dict.keys()) - set(existing_posts_id))
         
@@ -124,12 +122,16 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
         print("UNIQUE ID KEYS:", unique_id_keys)
         print("EXISTING POST IDs:", existing_posts_id)
 
+        # Looking up the account attributes of every distinct author of the unique posts at once:
+        author_attributes = self._enrich_post_authors(
+            [content_lst[-1] for post_id, content_lst in posts_dict.items() if post_id in unique_id_keys])
+
         # Unpacking the "Author" parameter and extending Author derived params to the end of the content
         #  list for each dict key-value pair that is unique (not in the database):
         unique_posts_dict = {
 
             # Unpacking list for faster appending:
-            post_id:self._transform_post_content_lst(content_lst) for post_id, content_lst 
+            post_id:self._transform_post_content_lst(content_lst, author_attributes) for post_id, content_lst 
             in posts_dict.items() if post_id in unique_id_keys
             
             }
@@ -159,6 +161,151 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
 
         yield posts_df
          
+    def _existing_post_ids(self, candidate_ids, subreddit_name):
+        """Internal method returning the candidate post ids that are already
+        stored by the Web API.
+
+        Instead of downloading the whole collection, the endpoint is queried for
+        the candidate ids only, WEB_DEDUP_BATCH_SIZE ids per request through the
+        `dedup_id_filter` query parameter. If `dedup_id_filter` is None the posts
+        created in the last `dedup_window` are queried instead.
+
+        If the endpoint returns a post that is not in the batch it asked for, the
+        endpoint is ignoring the id filter (and would return the whole collection
+        for every batch). The pipeline then stops querying by id and falls back to
+        the single `dedup_window` query for this and the following runs.
+
+        Paginated responses are streamed page by page (see `_iter_api_pages()`) and
+        only the ids of the candidate posts are kept.
+
+        Arguments:
+            candidate_ids (list): The ids of the extracted posts.
+
+            subreddit_name (str): The subreddit the posts were extracted from.
+
+        Returns:
+            set: The ids that are already in the database.
+
+        """
+        headers = self._dedup_headers()
+
+        if self._use_dedup_id_filter():
+            existing_ids = self._existing_post_ids_by_id(candidate_ids, headers)
+            if existing_ids is not None:
+                return existing_ids
+
+            self._ignore_dedup_id_filter(subreddit_name)
+
+        candidates = set(candidate_ids)
+        existing_ids = set()
+        for page in self._iter_api_pages(self.api_endpoint, self._dedup_window_params(), headers):
+            existing_ids.update(post["id"] for post in page if post.get("id") in candidates)
+
+        return existing_ids
+
+    def _dedup_headers(self):
+        "Internal method returning the headers sent with every dedup request."
+        key = self.kwargs["API_Key"]
+        return {"Authorization":f"Token {key}"}
+
+    def _use_dedup_id_filter(self):
+        "Internal method returning True while the dedup requests should query by post id."
+        return self.dedup_id_filter is not None and not self._dedup_id_filter_ignored
+
+    def _ignore_dedup_id_filter(self, subreddit_name):
+        "Internal method switching the dedup requests to the `dedup_window` query for this and the following runs."
+        print(f"The Web API ignores the '{self.dedup_id_filter}' filter, deduping {subreddit_name} posts against the last {self.dedup_window}")
+        self._dedup_id_filter_ignored = True
+
+    def _dedup_window_params(self):
+        "Internal method returning the query parameters of the `dedup_window` query."
+        since = datetime.now(tz=timezone("EST")) - self.dedup_window
+        return {self.dedup_since_filter: str(since)}
+
+    def _dedup_batches(self, candidate_ids):
+        "Internal method splitting the candidate post ids into the `dedup_id_filter` batches."
+        for position in range(0, len(candidate_ids), WEB_DEDUP_BATCH_SIZE):
+            batch = candidate_ids[position:position + WEB_DEDUP_BATCH_SIZE]
+            yield batch, {self.dedup_id_filter: ",".join(batch)}
+
+    def _existing_post_ids_by_id(self, candidate_ids, headers):
+        """Internal method querying the Web API for the candidate post ids in
+        batches of WEB_DEDUP_BATCH_SIZE ids through the `dedup_id_filter`.
+
+        Arguments:
+            candidate_ids (list): The ids of the extracted posts.
+
+            headers (dict): The headers sent with every request.
+
+        Returns:
+            set: The ids that are already in the database.
+
+            None: None type if the endpoint returned posts outside of a batch,
+                meaning it does not honour the filter.
+
+        """
+        existing_ids = set()
+        for batch, params in self._dedup_batches(candidate_ids):
+            for page in self._iter_api_pages(self.api_endpoint, params, headers):
+                page_ids = {post.get("id") for post in page}
+
+                # Stopping at the first page holding posts that were not asked for:
+                if not page_ids.issubset(batch):
+                    return None
+
+                existing_ids.update(page_ids)
+
+        return existing_ids
+
+    def _iter_api_pages(self, url, params, headers):
+        """Internal method streaming the pages of records returned by a Web API
+        GET request, following the 'next' links of paginated responses.
+
+        Arguments:
+            url (str): The endpoint being queried.
+
+            params (dict): The query parameters of the first request. The 'next'
+                links already contain them.
+
+            headers (dict): The headers sent with every request.
+
+        Yields:
+            list: The records of each page.
+
+        """
+        session = self.get_service("http")
+
+        while url is not None:
+            response = session.get(url, params=params, headers=headers)
+            records, url = self._parse_api_page(response)
+            params = None
+
+            yield records
+
+    def _parse_api_page(self, response):
+        """Internal method parsing a page of records returned by a Web API GET
+        request.
+
+        Arguments:
+            response (requests.Response|AsyncResponse): The response of the request.
+
+        Returns:
+            tuple: The records of the page and the url of the next page, None
+                if it is the last page.
+
+        """
+        # Conditional that ensures correct get request status code:  
+        if response.status_code != 200:
+            raise ValueError(f"Response from Web API Request w/ Status Code {response.status_code}")
+
+        content = response.json()
+
+        # Unpaginated endpoints return every record in a single list:
+        if isinstance(content, list):
+            return content, None
+
+        return content.get("results", []), content.get("next")
+
     def load_posts(self, *args):
         """Method writes the reddit posts dataframe into the database
         through the Web API. 
@@ -180,56 +327,117 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
         posts_df = args[0]
         
         # Posting data to the Web API via the generic web api load method:
-        web_api_json_load(posts_df, self.api_endpoint, API_Key=self.kwargs["API_Key"])
+        web_api_json_load(posts_df, self.api_endpoint, sink=self.get_service("web_api_sink"), API_Key=self.kwargs["API_Key"])
 
-    def build_graph(self, **options):
-        """The method that is used to construct a Bonobo ETL pipeline
-        DAG that schedules the following ETL methods:
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extraction legs used by the asyncio execution
+        mode (see `async_runner.run_async()`).
 
-        - Extraction: extract_daily_top_posts, extract_rising_posts
-        - Transformation: transform_posts
-        - Loading: load_posts
+        PRAW is a synchronous client, so the top and rising listings are extracted
+        concurrently in worker threads and merged by `merge_posts()`. The Web API
+        is then queried for the posts it already stores through the async session
+        (see `_existing_post_ids_async()`), so the transform node makes no request.
+
+        Arguments:
+            session (AsyncHTTPSession): The open async session.
+
+        Yields:
+            tuple: The merged dict of posts and the set of their ids already in the database.
 
-        Returns: 
-            bonobo.Graph: The Bonobo Graph that is declared as an instance
-                parameter and that will be executed by the self.execute_pipeline method.
-        
         """
-        # Building the Graph:
-        self.graph = bonobo.Graph()    
-
-        # Creating the main method chain for the graph:
-        self.graph.add_chain(
-            self.transform_posts,
-            self.load_posts,
-            _input=None # Input set to None so self.transform_posts does not stat untill params are passed.
-        ) 
-
-        # Adding the first leg that extracts the top posts for the day:    
-        self.graph.add_chain(
-            self.extract_daily_top_posts, 
-            _output=self.transform_posts # Output of this extraction method is fed into self.transform_posts.
-        )
+        loop = asyncio.get_event_loop()
 
-        # Adding the second leg that extracts the current rising posts:
-        self.graph.add_chain(
-            self.extract_rising_posts,
-            _output= self.transform_posts
-        )
+        legs_output = await asyncio.gather(*(
+            loop.run_in_executor(None, lambda extract_method=extract_method: list(extract_method()))
+            for extract_method in self.post_extraction_legs()))
 
-        return self.graph
+        posts_dict = self.merge_posts(legs_output)
+        existing_posts_id = await self._existing_post_ids_async(session, list(posts_dict.keys()), self.subreddit_name)
+
+        yield posts_dict, existing_posts_id
+
+    async def _existing_post_ids_async(self, session, candidate_ids, subreddit_name):
+        """Async variant of `_existing_post_ids()` querying the Web API through
+        the async session.
+
+        The `dedup_id_filter` batches are requested concurrently, bounded by the
+        session's `max_in_flight` requests, and fall back to the `dedup_window`
+        query exactly as the synchronous method does.
+
+        Arguments:
+            session (AsyncHTTPSession): The open async session.
+
+            candidate_ids (list): The ids of the extracted posts.
+
+            subreddit_name (str): The subreddit the posts were extracted from.
+
+        Returns:
+            set: The ids that are already in the database.
+
+        """
+        headers = self._dedup_headers()
+
+        if self._use_dedup_id_filter():
+            batches_ids = await asyncio.gather(*(
+                self._existing_batch_ids_async(session, batch, params, headers)
+                for batch, params in self._dedup_batches(candidate_ids)))
+
+            if None not in batches_ids:
+                return set().union(*batches_ids)
+
+            self._ignore_dedup_id_filter(subreddit_name)
+
+        candidates = set(candidate_ids)
+        existing_ids = set()
+        url, params = self.api_endpoint, self._dedup_window_params()
+        while url is not None:
+            page, url = self._parse_api_page(await session.get(url, params=params, headers=headers))
+            params = None
+
+            existing_ids.update(post["id"] for post in page if post.get("id") in candidates)
+
+        return existing_ids
+
+    async def _existing_batch_ids_async(self, session, batch, params, headers):
+        """Internal method querying the Web API for a single `dedup_id_filter`
+        batch through the async session, following the 'next' links.
+
+        Returns:
+            set: The ids of the batch that are already in the database.
+
+            None: None type if the endpoint returned posts outside of the batch.
+
+        """
+        existing_ids = set()
+        url = self.api_endpoint
+        while url is not None:
+            page, url = self._parse_api_page(await session.get(url, params=params, headers=headers))
+            params = None
+
+            page_ids = {post.get("id") for post in page}
+            if not page_ids.issubset(batch):
+                return None
+
+            existing_ids.update(page_ids)
+
+        return existing_ids
+
+    def transform(self, *args):
+        "The transform node of the asyncio execution mode, see `transform_posts()`."
+        return self.transform_posts(*args)
+
+    async def load_async(self, sink, posts_df):
+        """Async variant of `load_posts()` used by the asyncio execution mode.
+
+        Returns:
+            dict: The report of the write.
+
+        """
+        return await web_api_json_load_async(posts_df, self.api_endpoint, sink, API_Key=self.kwargs["API_Key"])
 
-    # Executon method:
-    def execute_pipeline(self):
-        
-        self.bonobo_parser = bonobo.get_argument_parser()
-        with bonobo.parse_args(self.bonobo_parser) as options:
-            bonobo.run(
-                self.build_graph(**options),
-                services=self.get_services(**options))
-    
     # Internal Data Formatting Method:
-    def _transform_post_content_lst(self, lst):
+    def _transform_post_content_lst(self, lst, author_attributes=None):
         """Internal method is used to transform the base list of reddit 
         post submissions recived from the extraction methods into a full
         list of params assocaited with the reddit post.
@@ -256,12 +464,20 @@ class RedditContentWebAPIPipeline(RedditContentPipeline):
         Arguments:
             list (list): A list contaiing all the extracted reddit data in the order described above.
 
+            author_attributes (dict): The author attributes of the batch, by author name, looked
+                up by `_enrich_post_authors()`. If None the attributes are read from the Redditor.
+
         Returns:
             list: The transformed list with full feature extraction and error-catching as described 
                 above.
 
         """
 
+        # Using the attributes looked up for the whole batch by `_enrich_post_authors()`:
+        if author_attributes is not None:
+            attributes = author_attributes.get(str(lst[-1])) if lst[-1] is not None else None
+            return [*lst, *(attributes if attributes is not None else ["NaN", "NaN", "NaN", "NaN", "NaN"])]
+
         # TODO: For Gods sake this is the laziest error-catching I have ever written please make this less horrible:
         try:
             transformed_lst = [
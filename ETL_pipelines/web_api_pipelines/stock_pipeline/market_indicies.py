@@ -2,17 +2,13 @@
 import pandas as pd
 import yfinance as yf
 import sqlite3
-import json
 
 # Importing ETL libraries:
 import bonobo
 
-# Importing webscraping packages:
-import requests 
-from bs4 import BeautifulSoup 
-
 # Importing the Base Pipeline API Object:
-from ETL_pipelines.base_pipeline import Pipeline
+from ETL_pipelines.base_pipeline import web_api_json_load
+from ETL_pipelines.async_runner import fetch_page, web_api_json_load_async
 
 # Importing the Sqlite Pipeline API Objects to Re-Factor:
 from ETL_pipelines.sqlite_pipelines.stock_pipeline.market_indicies import *
@@ -39,7 +35,7 @@ class SPYCompositionWebAPIPipeline(SPYCompositionPipeline):
             This is the url endpoint that the requests method uses to Query and Write JSON data to.
 
     """
-    def __init__(self, api_endpoint, **kwargs):
+    def __init__(self, api_endpoint, execute=True, **kwargs):
 
         # Declaring instance params:
         self.api_endpoint = api_endpoint
@@ -47,8 +43,9 @@ class SPYCompositionWebAPIPipeline(SPYCompositionPipeline):
         # Hard Coded URL for S&P 500 Index Contents:
         self.spy_comp_url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
 
-        # Executing the pipeline:
-        self.execute_pipeline() 
+        # Executing the pipeline unless it is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     # Overwriting the ETL load method to perform POST request:
     def load(self, *args):
@@ -56,7 +53,8 @@ class SPYCompositionWebAPIPipeline(SPYCompositionPipeline):
         composition data and loads the data to the velkozz web API.
 
         The method seralizes the dataframe into a JSON format and sends
-        data to the REST API through a POST request.
+        data to the REST API through the chunked POST requests of the
+        'web_api_sink' service.
 
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
@@ -65,12 +63,28 @@ class SPYCompositionWebAPIPipeline(SPYCompositionPipeline):
         # Unpacking the argument tuples:
         content_df = args[0]
 
-        # Seralizing Dataframe into a JSON format:
-        posts_json = content_df.to_json(orient="records")
-        parsed_content = json.loads(posts_json)
+        # Writing the records to the Web API in chunked POST requests:
+        web_api_json_load(content_df, self.api_endpoint, sink=self.get_service("web_api_sink"))
+
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extract method used by the asyncio execution
+        mode (see `async_runner.run_async()`).
+
+        Yields:
+            AsyncResponse: The response containing the wikipedia page.
+
+        """
+        yield await fetch_page(session, self.spy_comp_url)
+
+    async def load_async(self, sink, content_df):
+        """Async variant of the load method used by the asyncio execution mode.
 
-        # Making a POST request to the Web API to write data to the database:
-        post_response = requests.post(self.api_endpoint, json=parsed_content)
+        Returns:
+            dict: The report of the write.
+
+        """
+        return await web_api_json_load_async(content_df, self.api_endpoint, sink)
 
 class DJIACompositionWebAPIPipeline(DJIACompositionPipeline):
     """An object that contains all the logic and methods
@@ -94,7 +108,7 @@ class DJIACompositionWebAPIPipeline(DJIACompositionPipeline):
             This is the url endpoint that the requests method uses to Query and Write JSON data to.
     
     """
-    def __init__(self, api_endpoint, **kwargs):
+    def __init__(self, api_endpoint, execute=True, **kwargs):
 
         # Declaring instance params:
         self.api_endpoint = api_endpoint
@@ -102,8 +116,9 @@ class DJIACompositionWebAPIPipeline(DJIACompositionPipeline):
         # Hard Coded URL for S&P 500 Index Contents:
         self.djia_comp_url = "https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average"
 
-        # Executing the pipeline:
-        self.execute_pipeline() 
+        # Executing the pipeline unless it is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     # Overwriting the ETL load method to perform POST request:
     def load(self, *args):
@@ -111,7 +126,8 @@ class DJIACompositionWebAPIPipeline(DJIACompositionPipeline):
         composition data and loads the data to the velkozz web API.
 
         The method seralizes the dataframe into a JSON format and sends
-        data to the REST API through a POST request.
+        data to the REST API through the chunked POST requests of the
+        'web_api_sink' service.
 
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
@@ -120,14 +136,28 @@ class DJIACompositionWebAPIPipeline(DJIACompositionPipeline):
         # Unpacking the argument tuples:
         content_df = args[0]
 
-        # Seralizing Dataframe into a JSON format:
-        posts_json = content_df.to_json(orient="records")
-        parsed_content = json.loads(posts_json)
+        # Writing the records to the Web API in chunked POST requests:
+        web_api_json_load(content_df, self.api_endpoint, sink=self.get_service("web_api_sink"))
+
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extract method used by the asyncio execution
+        mode (see `async_runner.run_async()`).
+
+        Yields:
+            AsyncResponse: The response containing the wikipedia page.
+
+        """
+        yield await fetch_page(session, self.djia_comp_url)
+
+    async def load_async(self, sink, content_df):
+        """Async variant of the load method used by the asyncio execution mode.
 
-        print(parsed_content)
+        Returns:
+            dict: The report of the write.
 
-        # Making a POST request to the Web API to write data to the database:
-        post_response = requests.post(self.api_endpoint, json=parsed_content)
+        """
+        return await web_api_json_load_async(content_df, self.api_endpoint, sink)
 
 class SPTSXCompositionWebAPIPipeline(SPTSXCompositionPipeline):
     """An object that contains all the logic and methods
@@ -151,7 +181,7 @@ class SPTSXCompositionWebAPIPipeline(SPTSXCompositionPipeline):
             This is the url endpoint that the requests method uses to Query and Write JSON data to.
     
     """
-    def __init__(self, api_endpoint, **kwargs):
+    def __init__(self, api_endpoint, execute=True, **kwargs):
 
         # Declaring instance params:
         self.api_endpoint = api_endpoint
@@ -159,8 +189,9 @@ class SPTSXCompositionWebAPIPipeline(SPTSXCompositionPipeline):
         # Hard Coded URL for S&P 500 Index Contents:
         self.sptsx_composite_url = "https://en.wikipedia.org/wiki/S%26P/TSX_Composite_Index"   
 
-        # Executing the pipeline:
-        self.execute_pipeline() 
+        # Executing the pipeline unless it is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     # Overwriting the ETL load method to perform POST request:
     def load(self, *args):
@@ -168,7 +199,8 @@ class SPTSXCompositionWebAPIPipeline(SPTSXCompositionPipeline):
         composition data and loads the data to the velkozz web API.
 
         The method seralizes the dataframe into a JSON format and sends
-        data to the REST API through a POST request.
+        data to the REST API through the chunked POST requests of the
+        'web_api_sink' service.
 
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
@@ -177,12 +209,28 @@ class SPTSXCompositionWebAPIPipeline(SPTSXCompositionPipeline):
         # Unpacking the argument tuples:
         content_df = args[0]
 
-        # Seralizing Dataframe into a JSON format:
-        posts_json = content_df.to_json(orient="records")
-        parsed_content = json.loads(posts_json)
-        print(parsed_content)
-        # Making a POST request to the Web API to write data to the database:
-        post_response = requests.post(self.api_endpoint, json=parsed_content)
+        # Writing the records to the Web API in chunked POST requests:
+        web_api_json_load(content_df, self.api_endpoint, sink=self.get_service("web_api_sink"))
+
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extract method used by the asyncio execution
+        mode (see `async_runner.run_async()`).
+
+        Yields:
+            AsyncResponse: The response containing the wikipedia page.
+
+        """
+        yield await fetch_page(session, self.sptsx_composite_url)
+
+    async def load_async(self, sink, content_df):
+        """Async variant of the load method used by the asyncio execution mode.
+
+        Returns:
+            dict: The report of the write.
+
+        """
+        return await web_api_json_load_async(content_df, self.api_endpoint, sink)
 
 class FTSECompositionWebAPIPipeline(FTSECompositionPipeline):
     """An object that contains all the logic and methods
@@ -206,7 +254,7 @@ class FTSECompositionWebAPIPipeline(FTSECompositionPipeline):
             This is the url endpoint that the requests method uses to Query and Write JSON data to.
     
     """
-    def __init__(self, api_endpoint, **kwargs):
+    def __init__(self, api_endpoint, execute=True, **kwargs):
 
         # Declaring instance params:
         self.api_endpoint = api_endpoint
@@ -214,8 +262,9 @@ class FTSECompositionWebAPIPipeline(FTSECompositionPipeline):
         # Hard Coded URL for S&P 500 Index Contents:
         self.ftse_market_index_url = "https://en.wikipedia.org/wiki/FTSE_100_Index"   
 
-        # Executing the pipeline:
-        self.execute_pipeline() 
+        # Executing the pipeline unless it is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     # Overwriting the ETL load method to perform POST request:
     def load(self, *args):
@@ -223,7 +272,8 @@ class FTSECompositionWebAPIPipeline(FTSECompositionPipeline):
         composition data and loads the data to the velkozz web API.
 
         The method seralizes the dataframe into a JSON format and sends
-        data to the REST API through a POST request.
+        data to the REST API through the chunked POST requests of the
+        'web_api_sink' service.
 
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
@@ -232,12 +282,28 @@ class FTSECompositionWebAPIPipeline(FTSECompositionPipeline):
         # Unpacking the argument tuples:
         content_df = args[0]
 
-        # Seralizing Dataframe into a JSON format:
-        posts_json = content_df.to_json(orient="records")
-        parsed_content = json.loads(posts_json)
+        # Writing the records to the Web API in chunked POST requests:
+        web_api_json_load(content_df, self.api_endpoint, sink=self.get_service("web_api_sink"))
 
-        # Making a POST request to the Web API to write data to the database:
-        post_response = requests.post(self.api_endpoint, json=parsed_content)
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extract method used by the asyncio execution
+        mode (see `async_runner.run_async()`).
+
+        Yields:
+            AsyncResponse: The response containing the wikipedia page.
+
+        """
+        yield await fetch_page(session, self.ftse_market_index_url)
+
+    async def load_async(self, sink, content_df):
+        """Async variant of the load method used by the asyncio execution mode.
+
+        Returns:
+            dict: The report of the write.
+
+        """
+        return await web_api_json_load_async(content_df, self.api_endpoint, sink)
 
 class SMICompositionWebAPIPipeline(SMICompositionPipeline):
     """An object that contains all the logic and methods
@@ -261,7 +327,7 @@ class SMICompositionWebAPIPipeline(SMICompositionPipeline):
             This is the url endpoint that the requests method uses to Query and Write JSON data to.
     
     """
-    def __init__(self, api_endpoint, **kwargs):
+    def __init__(self, api_endpoint, execute=True, **kwargs):
 
         # Declaring instance params:
         self.api_endpoint = api_endpoint
@@ -269,8 +335,9 @@ class SMICompositionWebAPIPipeline(SMICompositionPipeline):
         # Hard Coded URL for S&P 500 Index Contents:
         self.smi_composition_url = "https://en.wikipedia.org/wiki/Swiss_Market_Index"   
 
-        # Executing the pipeline:
-        self.execute_pipeline() 
+        # Executing the pipeline unless it is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     # Overwriting the ETL load method to perform POST request:
     def load(self, *args):
@@ -278,7 +345,8 @@ class SMICompositionWebAPIPipeline(SMICompositionPipeline):
         composition data and loads the data to the velkozz web API.
 
         The method seralizes the dataframe into a JSON format and sends
-        data to the REST API through a POST request.
+        data to the REST API through the chunked POST requests of the
+        'web_api_sink' service.
 
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
@@ -287,12 +355,28 @@ class SMICompositionWebAPIPipeline(SMICompositionPipeline):
         # Unpacking the argument tuples:
         content_df = args[0]
 
-        # Seralizing Dataframe into a JSON format:
-        posts_json = content_df.to_json(orient="records")
-        parsed_content = json.loads(posts_json)
+        # Writing the records to the Web API in chunked POST requests:
+        web_api_json_load(content_df, self.api_endpoint, sink=self.get_service("web_api_sink"))
+
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extract method used by the asyncio execution
+        mode (see `async_runner.run_async()`).
+
+        Yields:
+            AsyncResponse: The response containing the wikipedia page.
+
+        """
+        yield await fetch_page(session, self.smi_composition_url)
 
-        # Making a POST request to the Web API to write data to the database:
-        post_response = requests.post(self.api_endpoint, json=parsed_content)
+    async def load_async(self, sink, content_df):
+        """Async variant of the load method used by the asyncio execution mode.
+
+        Returns:
+            dict: The report of the write.
+
+        """
+        return await web_api_json_load_async(content_df, self.api_endpoint, sink)
 
 class SPICompositionWebAPIPipeline(SPICompositionPipeline):
     """An object that contains all the logic and methods
@@ -316,7 +400,7 @@ class SPICompositionWebAPIPipeline(SPICompositionPipeline):
             This is the url endpoint that the requests method uses to Query and Write JSON data to.
     
     """
-    def __init__(self, api_endpoint, **kwargs):
+    def __init__(self, api_endpoint, execute=True, **kwargs):
 
         # Declaring instance params:
         self.api_endpoint = api_endpoint
@@ -324,8 +408,9 @@ class SPICompositionWebAPIPipeline(SPICompositionPipeline):
         # Hard Coded URL for S&P 500 Index Contents:
         self.spi_composition_url = "https://en.wikipedia.org/wiki/Swiss_Performance_Index"   
 
-        # Executing the pipeline:
-        self.execute_pipeline() 
+        # Executing the pipeline unless it is driven by the asyncio execution mode:
+        if execute:
+            self.execute_pipeline()
 
     # Overwriting the ETL load method to perform POST request:
     def load(self, *args):
@@ -333,7 +418,8 @@ class SPICompositionWebAPIPipeline(SPICompositionPipeline):
         composition data and loads the data to the velkozz web API.
 
         The method seralizes the dataframe into a JSON format and sends
-        data to the REST API through a POST request.
+        data to the REST API through the chunked POST requests of the
+        'web_api_sink' service.
 
         Arguments:
             args (tuple): A length-1 tuple containing the formatted
@@ -342,9 +428,25 @@ class SPICompositionWebAPIPipeline(SPICompositionPipeline):
         # Unpacking the argument tuples:
         content_df = args[0]
 
-        # Seralizing Dataframe into a JSON format:
-        posts_json = content_df.to_json(orient="records")
-        parsed_content = json.loads(posts_json)
+        # Writing the records to the Web API in chunked POST requests:
+        web_api_json_load(content_df, self.api_endpoint, sink=self.get_service("web_api_sink"))
+
+    # <-----------Asyncio Execution Mode Methods----------->
+    async def extract_async(self, session):
+        """Async variant of the extract method used by the asyncio execution
+        mode (see `async_runner.run_async()`).
+
+        Yields:
+            AsyncResponse: The response containing the wikipedia page.
 
-        # Making a POST request to the Web API to write data to the database:
-        post_response = requests.post(self.api_endpoint, json=parsed_content)
+        """
+        yield await fetch_page(session, self.spi_composition_url)
+
+    async def load_async(self, sink, content_df):
+        """Async variant of the load method used by the asyncio execution mode.
+
+        Returns:
+            dict: The report of the write.
+
+        """
+        return await web_api_json_load_async(content_df, self.api_endpoint, sink)
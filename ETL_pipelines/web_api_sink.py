@@ -0,0 +1,347 @@
+"Script containing the chunked, compressed Web API sink shared by the Web API Pipeline APIs"
+
+# Importing External Packages:
+import gzip
+import time
+import requests
+import pandas as pd
+
+# orjson is an optional, faster JSON encoder used when it is installed:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The status code of a server refusing a gzip compressed request body:
+UNSUPPORTED_MEDIA_TYPE = 415
+
+# Response status codes after which a chunk is sent again. POST requests are not
+# idempotent, so only the codes meaning the records were not processed are retried:
+RETRYABLE_STATUS_CODES = (408, 429, 503)
+
+class WebAPIWriteError(ValueError):
+    """Error raised when records written to a Web API were rejected or could not
+    be sent. The report of the write is available as the `report` param."""
+    def __init__(self, message, report):
+        super(WebAPIWriteError, self).__init__(message)
+        self.report = report
+
+def dataframe_to_json_bytes(df):
+    """Method serializes a dataframe directly into the UTF-8 encoded JSON
+    array of its records, eg: b'[{"col1": 1, "col2": "a"}, ...]'.
+
+    The bytes are meant to be sent as-is as a request body, so the records are
+    encoded once instead of being written to a JSON string, parsed back into
+    python objects and encoded again by requests.
+
+    - Datetime columns (timezone aware or not) are written as ISO 8601 strings,
+        not as epoch milliseconds.
+    - NaN, NaT and None are written as null.
+
+    If orjson is installed it encodes the records, otherwise pandas' own C JSON
+    encoder is used. Both produce the same records, except that pandas writes
+    floats with at most 15 significant digits where orjson writes the shortest
+    representation that round trips (up to 17 digits).
+
+    Arguments:
+        df (pandas.DataFrame): The dataframe being serialized. The index is not written.
+
+    Returns:
+        bytes: The JSON array of records.
+
+    """
+    # Converting datetime columns to ISO 8601 strings so both encoders agree:
+    datetime_columns = [col for col, dtype in df.dtypes.items()
+        if pd.api.types.is_datetime64_any_dtype(dtype)]
+    if datetime_columns:
+        df = df.copy(deep=False)
+        for col in datetime_columns:
+            values = df[col]
+            df[col] = values.map(lambda timestamp: timestamp.isoformat(), na_action="ignore").where(values.notna(), None)
+
+    if orjson is None:
+        return df.to_json(orient="records", date_format="iso", double_precision=15).encode("utf-8")
+
+    # Replacing missing values with None, which orjson writes as null:
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+    return orjson.dumps(records, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+class WebAPISink(object):
+    """A sink that writes dataframes to a REST Web API as JSON records
+    through a pooled HTTP session.
+
+    Instead of sending a whole dataframe as a single POST request, the records
+    are split into chunks of `chunk_size` rows that are each serialized straight
+    to bytes and sent as one gzip compressed JSON array over the session's
+    persistent connections. Large batches no longer time out as a single request
+    and small batches reuse an open connection.
+
+    Bodies are not compressed for the `uncompressed_endpoints`. An endpoint that
+    refuses a compressed body with a '415 Unsupported Media Type' response is
+    added to them and the chunk is sent again uncompressed, as are the following
+    chunks sent to it.
+
+    Chunks that fail with a connection error or a retryable status code (see
+    RETRYABLE_STATUS_CODES) are sent again, up to `max_retries` times with an
+    exponential backoff, without resending the chunks that were already accepted.
+    Chunks rejected with any other status code, or whose response timed out, are
+    not retried since the server may have stored them. A connection dropped after
+    a chunk was sent can still cause it to be stored twice, so endpoints should
+    reject records they already hold (eg: with a unique id).
+
+    Unless `raise_on_rejected` is disabled, a write with rejected rows or failed
+    chunks raises a WebAPIWriteError carrying the report, so that records are
+    never dropped silently.
+
+    The number of accepted and rejected rows is read from each response: a JSON
+    object with 'accepted' and 'rejected' counts is used as is, a JSON array is
+    counted as the accepted records and any other successful response accepts
+    the whole chunk.
+
+    Like the other Pipeline services it is shared by the nodes of a pipeline
+    through the Bonobo services dict under the name 'web_api_sink':
+
+        report = self.get_service("web_api_sink").post(self.api_endpoint, content_df)
+
+    Arguments:
+        session (requests.Session): The session the requests are made with, normally
+            the pipeline's pooled 'http' service.
+
+        chunk_size (int): The number of records sent in each request. Defaults to 500.
+
+        compress (bool): If the request bodies are gzip compressed. Defaults to True.
+
+        compresslevel (int): The gzip compression level. Defaults to 6.
+
+        uncompressed_endpoints (list): The urls of the endpoints whose request bodies
+            are never compressed. Defaults to None.
+
+        max_retries (int): The number of times a failed chunk is sent again. Defaults to 3.
+
+        backoff (float): The number of seconds waited before the first retry, doubled
+            for each following retry. Defaults to 0.5.
+
+        raise_on_rejected (bool): If a WebAPIWriteError is raised when rows are
+            rejected or chunks failed. Defaults to True.
+
+    """
+    def __init__(self, session, chunk_size=500, compress=True, compresslevel=6, max_retries=3, backoff=0.5,
+        raise_on_rejected=True, uncompressed_endpoints=None):
+
+        if chunk_size < 1:
+            raise ValueError(f"The chunk_size of a WebAPISink must be at least 1, not {chunk_size}")
+
+        # Declaring instance params:
+        self.session = session
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.compresslevel = compresslevel
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.raise_on_rejected = raise_on_rejected
+        self.uncompressed_endpoints = set(uncompressed_endpoints or ())
+
+    def serialize_records(self, df):
+        """Method serializes a dataframe into the UTF-8 encoded JSON array of
+        its records (see `dataframe_to_json_bytes()`).
+
+        Arguments:
+            df (pandas.DataFrame): The dataframe being serialized.
+
+        Returns:
+            bytes: The JSON array of records.
+
+        """
+        return dataframe_to_json_bytes(df)
+
+    def chunks(self, df):
+        """Method splits a dataframe into the chunks of rows sent in each request.
+
+        Yields:
+            pandas.DataFrame: The consecutive chunks of at most `chunk_size` rows.
+
+        """
+        for position in range(0, len(df), self.chunk_size):
+            yield df.iloc[position:position + self.chunk_size]
+
+    def post(self, url, df, headers=None):
+        """Method writes the records of a dataframe to a Web API endpoint in
+        chunks, retrying the chunks that failed.
+
+        Arguments:
+            url (str): The api end point the records are sent to.
+
+            df (pandas.DataFrame): The dataframe whose records are written.
+
+            headers (dict): Additional headers sent with every request, eg: an
+                'Authorization' header.
+
+        Returns:
+            dict: The report of the write containing the number of 'rows', 'chunks'
+                and 'requests' sent, the number of 'accepted' and 'rejected' rows and
+                the number of 'failed_chunks' that were still failing after the
+                last retry (their rows are counted as rejected).
+
+        Raises:
+            WebAPIWriteError: If rows were rejected and `raise_on_rejected` is set.
+
+        """
+        request_headers = self._request_headers(url, headers)
+        pending = self._prepare_chunks(url, df)
+        report = self._new_report(df, pending)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.retry_delay(attempt))
+
+            failed = []
+            for num_rows, body in pending:
+                report["requests"] += 1
+                result = self._send_chunk(url, body, num_rows, request_headers)
+
+                if result is None:
+                    failed.append((num_rows, body))
+                else:
+                    report["accepted"] += result[0]
+                    report["rejected"] += result[1]
+
+            pending = failed
+            if not pending:
+                break
+
+        return self._finish_report(report, pending, url)
+
+    def retry_delay(self, attempt):
+        "Method returns the number of seconds waited before a retry attempt (starting at 1)."
+        return self.backoff * 2 ** (attempt - 1)
+
+    def compresses(self, url):
+        "Method returns True if the request bodies sent to an endpoint are gzip compressed."
+        return self.compress and url not in self.uncompressed_endpoints
+
+    def _request_headers(self, url, headers):
+        "Internal method building the headers sent with every chunk."
+        request_headers = {"Content-Type": "application/json"}
+        if self.compresses(url):
+            request_headers["Content-Encoding"] = "gzip"
+        if headers is not None:
+            request_headers.update(headers)
+
+        return request_headers
+
+    def _prepare_chunks(self, url, df):
+        """Internal method serializing (and compressing) every chunk of a
+        dataframe once, before any request is made.
+
+        Returns:
+            list: The (number of rows, request body) tuple of each chunk.
+
+        """
+        compress = self.compresses(url)
+
+        pending = []
+        for chunk in self.chunks(df):
+            body = self.serialize_records(chunk)
+            if compress:
+                body = gzip.compress(body, compresslevel=self.compresslevel)
+
+            pending.append((len(chunk), body))
+
+        return pending
+
+    def _new_report(self, df, pending):
+        "Internal method creating the report of a write."
+        return {"rows": len(df), "chunks": len(pending), "requests": 0, "accepted": 0, "rejected": 0, "failed_chunks": 0}
+
+    def _finish_report(self, report, pending, url):
+        """Internal method counting the rows of the chunks still failing after the
+        last retry as rejected, raising a WebAPIWriteError if any row was rejected."""
+        report["failed_chunks"] = len(pending)
+        report["rejected"] += sum(num_rows for num_rows, _ in pending)
+
+        if self.raise_on_rejected and (report["rejected"] or report["failed_chunks"]):
+            raise WebAPIWriteError(
+                f"{report['rejected']} of {report['rows']} rows written to {url} were rejected "
+                f"({report['failed_chunks']} chunks still failing after {self.max_retries} retries)", report)
+
+        return report
+
+    def _send_chunk(self, url, body, num_rows, headers):
+        """Internal method sending a single chunk.
+
+        Returns:
+            tuple: The (accepted, rejected) row counts of the chunk.
+
+            None: None type if the chunk failed and should be sent again.
+
+        """
+        body, headers = self._chunk_encoding(url, body, headers)
+        try:
+            response = self.session.post(url, data=body, headers=headers)
+        except requests.ConnectionError:
+            return None
+        except requests.Timeout:
+            # The server may have stored the chunk, so it is not sent again:
+            return 0, num_rows
+
+        # Sending the chunk again uncompressed if the endpoint refused the gzip body:
+        if self._gzip_refused(url, response, headers):
+            return self._send_chunk(url, body, num_rows, headers)
+
+        return self._chunk_result(response, num_rows)
+
+    def _chunk_encoding(self, url, body, headers):
+        """Internal method decompressing a chunk prepared before its endpoint was
+        found to refuse compressed bodies.
+
+        Returns:
+            tuple: The request body and headers the chunk is sent with.
+
+        """
+        if headers.get("Content-Encoding") == "gzip" and not self.compresses(url):
+            headers = {key: value for key, value in headers.items() if key != "Content-Encoding"}
+            body = gzip.decompress(body)
+
+        return body, headers
+
+    def _gzip_refused(self, url, response, headers):
+        "Internal method adding the endpoint to the `uncompressed_endpoints` if it refused a compressed chunk."
+        if response.status_code == UNSUPPORTED_MEDIA_TYPE and headers.get("Content-Encoding") == "gzip":
+            if url not in self.uncompressed_endpoints:
+                print(f"{url} does not accept gzip compressed request bodies, sending them uncompressed")
+                self.uncompressed_endpoints.add(url)
+            return True
+
+        return False
+
+    def _chunk_result(self, response, num_rows):
+        "Internal method reading the (accepted, rejected) row counts of a chunk's response, None if it should be retried."
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            return None
+
+        if not response.ok:
+            return 0, num_rows
+
+        return self._response_counts(response, num_rows)
+
+    def _response_counts(self, response, num_rows):
+        "Internal method reading the (accepted, rejected) row counts of a successful response."
+        try:
+            content = response.json()
+        except ValueError:
+            return num_rows, 0
+
+        if isinstance(content, dict) and ("accepted" in content or "rejected" in content):
+            accepted = int(content.get("accepted", num_rows - int(content.get("rejected", 0))))
+            return accepted, int(content.get("rejected", num_rows - accepted))
+
+        if isinstance(content, list):
+            accepted = min(len(content), num_rows)
+            return accepted, num_rows - accepted
+
+        return num_rows, 0
+
+    def close(self):
+        "Method is a no-op, the session is closed with the 'http' service."
+        pass
@@ -0,0 +1,254 @@
+"Script containing the local stand-ins for the external services used by the Pipeline benchmarks"
+
+# Importing External Packages:
+import gzip
+import hashlib
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+def make_fake_yf_download(n_days=5000, seed=0):
+    """Method builds a stand-in for `yfinance.download` that generates
+    random OHLC bars instead of downloading them from Yahoo Finance.
+
+    The returned dataframe is laid out the same way as the yfinance one when
+    called with group_by='ticker': a multi-index of (ticker, field) columns
+    for more than one ticker and flat columns for a single ticker.
+
+    Arguments:
+        n_days (int): The number of business days of history generated for
+            period='max' downloads.
+
+        seed (int): The seed of the random generator.
+
+    Returns:
+        function: The fake download function.
+
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp("2021-01-29")
+    full_index = pd.bdate_range(end=end, periods=n_days, name="Date")
+
+    def fake_download(tickers, period=None, start=None, group_by="ticker", **kwargs):
+        ticker_lst = tickers.split(" ")
+        index = full_index if start is None else full_index[full_index >= pd.Timestamp(start)]
+
+        frames = {}
+        for ticker in ticker_lst:
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+            frames[ticker] = pd.DataFrame({
+                "Open": close * (1 + rng.normal(0, 0.002, len(index))),
+                "High": close * 1.01,
+                "Low": close * 0.99,
+                "Close": close,
+                "Adj Close": close,
+                "Volume": rng.integers(1000, 1000000, len(index)),
+            }, index=index)
+
+        if len(ticker_lst) == 1:
+            return frames[ticker_lst[0]]
+
+        return pd.concat(frames, axis=1)
+
+    return fake_download
+
+
+class FakeRedditor(object):
+    """A stand-in for a lazy PRAW Redditor. The first access to one of the
+    account attributes sleeps for `latency` seconds to mimic the API call
+    PRAW makes when a lazy Redditor is fetched."""
+    def __init__(self, name, latency=0.0):
+        self.name = name
+        self._latency = latency
+        self._fetched = False
+
+    def _fetch(self):
+        if not self._fetched:
+            time.sleep(self._latency)
+            self._fetched = True
+
+    def __getattr__(self, attr):
+        account_attrs = {
+            "is_gold": False,
+            "is_mod": False,
+            "has_verified_email": True,
+            "created_utc": 1300000000.0,
+            "comment_karma": 1234,
+        }
+        if attr not in account_attrs:
+            raise AttributeError(attr)
+
+        self._fetch()
+        return account_attrs[attr]
+
+    def __str__(self):
+        return self.name
+
+
+class FakeSubmission(object):
+    "A stand-in for a PRAW Submission with the attributes the pipeline reads."
+    def __init__(self, post_id, author, body_size=2000):
+        self.id = post_id
+        self.title = f"Post {post_id}"
+        self.selftext = "Some post content. " * (body_size // 19)
+        self.upvote_ratio = 0.95
+        self.score = 100
+        self.num_comments = 10
+        self.created_utc = 1611900000.0
+        self.stickied = False
+        self.over_18 = False
+        self.spoiler = False
+        self.permalink = f"/r/benchmark/comments/{post_id}/"
+        self.author = author
+
+
+class FakeSubreddit(object):
+    """A stand-in for a PRAW Subreddit. The 'top' and 'rising' listings
+    share a quarter of their posts, as the real listings often do, and
+    posts are written by a pool of authors a third of the size of the
+    listing so that authors repeat."""
+    def __init__(self, display_name, n_posts, author_latency=0.0):
+        self.display_name = display_name
+        n_authors = max(1, n_posts // 3)
+        authors = [FakeRedditor(f"user_{display_name}_{i}", author_latency) for i in range(n_authors)]
+
+        overlap = n_posts // 4
+        self._top = [FakeSubmission(f"{display_name}_t{i}", authors[i % n_authors]) for i in range(n_posts)]
+        self._rising = self._top[:overlap] + [
+            FakeSubmission(f"{display_name}_r{i}", authors[i % n_authors]) for i in range(n_posts - overlap)]
+
+    def top(self, time_filter="all", **kwargs):
+        return iter(self._top)
+
+    def rising(self, **kwargs):
+        return iter(self._rising)
+
+
+class FakeReddit(object):
+    "A stand-in for praw.Reddit that hands out FakeSubreddit and FakeRedditor objects."
+    def __init__(self, n_posts=100, author_latency=0.0, **kwargs):
+        self.read_only = True
+        self._n_posts = n_posts
+        self._author_latency = author_latency
+
+    def subreddit(self, display_name):
+        return FakeSubreddit(display_name, self._n_posts, self._author_latency)
+
+    def redditor(self, name):
+        return FakeRedditor(name, self._author_latency)
+
+
+class StubServer(object):
+    """A local HTTP server that stands in for Wikipedia, SEC EDGAR and the
+    velkozz REST API.
+
+    GET requests are answered from a dict of url path -> html content, with an
+    ETag so that conditional requests get a '304 Not Modified' response. EDGAR
+    search result requests are resolved by their CIK query parameter. POST
+    requests are accepted and their JSON bodies counted, and GET requests to
+    a path with no page return an empty JSON list, like an empty REST collection.
+
+    POST bodies sent with 'Content-Encoding: gzip' are decompressed before being
+    counted if `accept_gzip` is set, otherwise they are refused with a '415
+    Unsupported Media Type' response, like an API that does not decode them.
+
+    Example:
+        with StubServer({"/wiki/SPY": "<html>...</html>"}) as server:
+            url = server.url("/wiki/SPY")
+
+    Arguments:
+        pages (dict): A dict mapping each url path to the html content served.
+
+        latency (float): The number of seconds each request is delayed by, to
+            mimic the round trip to a remote host.
+
+        accept_gzip (bool): If gzip compressed POST bodies are accepted. Defaults to False.
+
+    """
+    def __init__(self, pages, latency=0.0, accept_gzip=False):
+        self.pages = pages
+        self.latency = latency
+        self.accept_gzip = accept_gzip
+        self.requests_served = 0
+        self.bytes_served = 0
+        self.records_posted = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, status, body, content_type, etag=None):
+                time.sleep(stub.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+                with stub._lock:
+                    stub.requests_served += 1
+                    stub.bytes_served += len(body)
+
+            def do_GET(self):
+                parsed_url = urlparse(self.path)
+                path = parsed_url.path
+
+                if path == "/cgi-bin/browse-edgar":
+                    path = "{}/{}".format(path, parse_qs(parsed_url.query).get("CIK", [""])[0])
+
+                if path in stub.pages:
+                    body = stub.pages[path].encode("utf-8")
+                    etag = '"{}"'.format(hashlib.md5(body).hexdigest())
+                    if self.headers.get("If-None-Match") == etag:
+                        self._respond(304, b"", "text/html; charset=utf-8", etag)
+                    else:
+                        self._respond(200, body, "text/html; charset=utf-8", etag)
+                else:
+                    self._respond(200, b"[]", "application/json")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+                if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                    if not stub.accept_gzip:
+                        self._respond(415, b'{"detail": "Unsupported Content-Encoding"}', "application/json")
+                        return
+                    body = gzip.decompress(body)
+
+                try:
+                    records = json.loads(body)
+                    n_records = len(records) if isinstance(records, list) else 1
+                except ValueError:
+                    n_records = 0
+
+                with stub._lock:
+                    stub.records_posted += n_records
+
+                self._respond(201, json.dumps({"accepted": n_records}).encode("utf-8"), "application/json")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, path=""):
+        """Method returns the absolute url of a path on the stub server."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,157 @@
+"Script containing the recorded and generated page fixtures used by the Pipeline benchmarks"
+
+# Importing External Packages:
+import os
+import html
+
+# Directory that recorded pages can be saved to. A recorded page named after
+# the fixture (eg: 'SPY_components.html') is used in place of the generated one:
+RECORDED_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded")
+
+def load_recorded_page(name, default):
+    """Method returns the contents of a recorded html page if one exists
+    in the recorded pages directory, otherwise the generated default page.
+
+    Arguments:
+        name (str): The name of the fixture, used as the file name '{name}.html'.
+
+        default (str): The generated html content used if no recording exists.
+
+    Returns:
+        str: The html content of the page.
+
+    """
+    recorded_path = os.path.join(RECORDED_PAGES_DIR, f"{name}.html")
+    if os.path.exists(recorded_path):
+        with open(recorded_path, "rt", encoding="utf-8") as recorded_file:
+            return recorded_file.read()
+
+    return default
+
+def _html_table(headers, rows, attrs=""):
+    """Internal method that builds a html table string from a list of
+    header strings and a list of row lists."""
+    header_html = "".join(f"<th>{html.escape(str(header))}</th>" for header in headers)
+    rows_html = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+
+    return f"<table {attrs}><tbody><tr>{header_html}</tr>{rows_html}</tbody></table>"
+
+def _wiki_page(tables_html):
+    """Internal method that wraps tables in a page laid out like a
+    Wikipedia article, with filler prose so page sizes are realistic."""
+    filler = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40 + "</p>"
+    body = filler.join(tables_html)
+
+    return f"<html><head><title>Benchmark</title></head><body>{filler}{body}{filler}</body></html>"
+
+def ticker_symbols(n_tickers):
+    """Method generates a list of unique, table-name safe ticker symbols.
+
+    Arguments:
+        n_tickers (int): The number of ticker symbols generated.
+
+    Returns:
+        list: A list of ticker strings eg: ['TKAA', 'TKAB', ...].
+
+    """
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return [f"TK{letters[(i // 26) % 26]}{letters[i % 26]}{i // 676 or ''}" for i in range(n_tickers)]
+
+def composition_pages(n_components):
+    """Method generates the Wikipedia pages scraped by the six composition
+    pipelines, each containing a table located the same way as on the
+    real page (by id or by class).
+
+    Arguments:
+        n_components (int): The number of rows in each components table.
+
+    Returns:
+        dict: A dict mapping the components table name to its html page
+            {"SPY_components": html, ...}.
+
+    """
+    tickers = ticker_symbols(n_components)
+
+    spy_rows = [
+        [ticker, f"Company {ticker}", '<a href="#">reports</a>', "Sector", "Sub Industry",
+            "City, State", "2000-01-01", str(1000000 + i), "1990"]
+        for i, ticker in enumerate(tickers)]
+    spy_table = _html_table(
+        ["Symbol", "Security", "SEC filings", "GICS Sector", "GICS Sub-Industry",
+            "Headquarters Location", "Date first added", "CIK", "Founded"],
+        spy_rows, 'id="constituents" class="wikitable sortable"')
+
+    djia_rows = [
+        [f"Company {ticker}", "NYSE", f"NYSE: {ticker}", "Industry", "2000-01-01", "Notes", "1.0%"]
+        for ticker in tickers]
+    djia_table = _html_table(
+        ["Company", "Exchange", "Symbol", "Industry", "Date added", "Notes", "Index weighting"],
+        djia_rows, 'id="constituents" class="wikitable sortable"')
+
+    sptsx_rows = [[ticker, f"Company {ticker}", "Sector", "Industry"] for ticker in tickers]
+    sptsx_tables = [
+        _html_table(["Year", "Value"], [["2020", "100"]], 'class="wikitable"'),
+        _html_table(["Symbol", "Company", "Sector", "Industry"], sptsx_rows, 'class="wikitable sortable"')]
+
+    ftse_rows = [[f"Company {ticker}", ticker, "Sector"] for ticker in tickers]
+    ftse_table = _html_table(["Company", "EPIC", "FTSE Industry Classification Benchmark sector[13]"],
+        ftse_rows, 'id="constituents" class="wikitable sortable"')
+
+    swiss_rows = [[f"Company {ticker}", "Industry", ticker, "Zurich"] for ticker in tickers]
+    swiss_table = _html_table(["Name", "Industry", "Ticker", "Canton"], swiss_rows, 'class="wikitable sortable"')
+
+    return {
+        "SPY_components": load_recorded_page("SPY_components", _wiki_page([spy_table])),
+        "DJIA_components": load_recorded_page("DJIA_components", _wiki_page([djia_table])),
+        "SPTSX_components": load_recorded_page("SPTSX_components", _wiki_page(sptsx_tables)),
+        "FTSE_components": load_recorded_page("FTSE_components", _wiki_page([ftse_table])),
+        "SMI_components": load_recorded_page("SMI_components", _wiki_page([swiss_table])),
+        "SPI_components": load_recorded_page("SPI_components", _wiki_page([swiss_table])),
+    }
+
+def edgar_pages(cik, n_filings, document_size=200000):
+    """Method generates the SEC EDGAR pages crawled by the EDGARFilingsPipeline
+    for a single company: the 'EDGAR Search Results' page, one 'Filing Detail'
+    page per filing and one filing document per filing.
+
+    Arguments:
+        cik (str): The CIK of the company.
+
+        n_filings (int): The number of filings listed on the search results page.
+
+        document_size (int): The approximate size in bytes of each filing document.
+
+    Returns:
+        dict: A dict mapping each url path to the html content served for it.
+
+    """
+    pages = {}
+    search_rows = []
+    filler = "<p>" + "Item 7. Management's Discussion and Analysis. " * (document_size // 48) + "</p>"
+
+    for i in range(n_filings):
+        accession = f"{cik}-{i:06d}"
+        detail_path = f"/Archives/edgar/data/{cik}/{accession}-index.htm"
+        document_path = f"/Archives/edgar/data/{cik}/{accession}/doc.htm"
+
+        search_rows.append([
+            "10-K",
+            f'<a href="{detail_path}" id="documentsbutton">&nbsp;Documents</a>',
+            f"Annual report [Section 13 and 15(d)] Acc-no: {accession}",
+            f"20{i % 20:02d}-02-01",
+            f"001-{cik}-{i:06d}"])
+
+        pages[detail_path] = _html_table(
+            ["Seq", "Description", "Document", "Type", "Size"],
+            [["1", "10-K", f'<a href="/ix?doc={document_path}">doc.htm</a>', "10-K", str(document_size)]],
+            'class="tableFile" summary="Document Format Files"')
+
+        pages[document_path] = f"<html><body>{filler}</body></html>"
+
+    search_table = _html_table(
+        ["Filings", "Format", "Description", "Filing Date", "File/Film Number"],
+        search_rows, 'class="tableFile2" summary="Results"')
+    pages[f"/cgi-bin/browse-edgar/{cik}"] = f"<html><body>{search_table}</body></html>"
+
+    return pages
@@ -0,0 +1,312 @@
+"""Script that benchmarks the sqlite Pipeline APIs against local stand-ins
+for Wikipedia, SEC EDGAR, Yahoo Finance and Reddit.
+
+Every pipeline graph is built with its own `build_graph()` method and its nodes
+are executed in topological order in the current process, one node at a time,
+so that the wall time, rows in/out and peak memory of every node can be measured
+on its own. No network access is needed: HTML pages are served by a local stub
+server, `yf.download` and `praw.Reddit` are replaced by fakes (see fakes.py).
+
+Example (from the root of the repository):
+    python -m benchmarks.run_benchmarks --tickers 500 --posts 200 --filings 50
+    python -m benchmarks.run_benchmarks --only ohlc edgar --json results.json
+    python -m benchmarks.run_benchmarks --only compositions edgar --http-cache
+
+By default the on-disk HTTP cache is disabled so that every run measures the
+fetches. With --http-cache each pipeline is run twice against a fresh cache
+directory, a cold run that fills the cache and a warm run that is served from it.
+
+"""
+# Importing External Packages:
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+import types
+from unittest import mock
+
+from bonobo.constants import BEGIN
+
+# Importing the Pipeline APIs being benchmarked:
+from ETL_pipelines.base_pipeline import Pipeline
+from ETL_pipelines.metrics import count_rows
+from ETL_pipelines.rate_limiter import TokenBucket
+from ETL_pipelines.sqlite_pipelines.stock_pipeline import OHLC, market_indicies, sec_filings
+from ETL_pipelines.sqlite_pipelines.social_media_pipeline import reddit_posts
+
+# Importing the local stand-ins:
+from benchmarks.fakes import make_fake_yf_download, FakeReddit, StubServer
+from benchmarks.fixtures import composition_pages, edgar_pages, ticker_symbols
+
+# The composition pipelines with the instance param holding their Wikipedia url:
+COMPOSITION_PIPELINES = [
+    (market_indicies.SPYCompositionPipeline, "spy_comp_url", "SPY_components"),
+    (market_indicies.DJIACompositionPipeline, "djia_comp_url", "DJIA_components"),
+    (market_indicies.SPTSXCompositionPipeline, "sptsx_composite_url", "SPTSX_components"),
+    (market_indicies.FTSECompositionPipeline, "ftse_market_index_url", "FTSE_components"),
+    (market_indicies.SMICompositionPipeline, "smi_composition_url", "SMI_components"),
+    (market_indicies.SPICompositionPipeline, "spi_composition_url", "SPI_components"),
+]
+
+def _as_args(output):
+    "Internal method packing a node output into the args of the next node, as Bonobo does."
+    return output if isinstance(output, tuple) else (output,)
+
+def run_node(name, node, inputs, trace_memory=True):
+    """Method calls a node once for every input, draining any generator it
+    returns, and measures the calls.
+
+    Arguments:
+        name (str): The name the node is reported under.
+
+        node (callable): The node being executed.
+
+        inputs (list): A list of argument tuples, one per call.
+
+        trace_memory (bool): If the peak traced memory of the node is measured.
+
+    Returns:
+        tuple: The list of outputs of the node and a dict of its measurements.
+
+    """
+    outputs = []
+    rows_in = sum(count_rows(args) for args in inputs if args)
+
+    if trace_memory:
+        tracemalloc.reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    for args in inputs:
+        result = node(*args)
+        if isinstance(result, types.GeneratorType):
+            outputs.extend(result)
+        elif result is not None:
+            outputs.append(result)
+    wall_time = time.perf_counter() - start
+
+    peak_memory = tracemalloc.get_traced_memory()[1] - base_memory if trace_memory else None
+    rows_out = sum(count_rows(output) for output in outputs)
+
+    return outputs, {
+        "node": name,
+        "calls": len(inputs),
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "wall_time_s": wall_time,
+        "rows_per_s": (rows_out or rows_in) / wall_time if wall_time > 0 else None,
+        "peak_memory_mb": peak_memory / 1e6 if peak_memory is not None else None,
+    }
+
+def run_pipeline(pipeline, trace_memory=True):
+    """Method executes the graph built by a pipeline's `build_graph()` method
+    node by node in topological order and returns the measurements of each node.
+
+    The services of the pipeline are closed at the end of the run and the time
+    it takes (eg: flushing buffered sqlite writes) is reported as 'close_services'.
+
+    Arguments:
+        pipeline (Pipeline): The pipeline being benchmarked.
+
+        trace_memory (bool): If the peak traced memory of each node is measured.
+
+    Returns:
+        list: A list of dicts containing the measurements of each node.
+
+    """
+    graph = pipeline.build_graph()
+    pipeline.get_services()
+
+    # Counting the parents of each node to sort the graph (Kahn's algorithm):
+    parents = {idx: 0 for idx in range(len(graph.nodes))}
+    for idx in list(range(len(graph.nodes))):
+        for child in graph.outputs_of(idx):
+            parents[child] += 1
+
+    inputs = {idx: [] for idx in range(len(graph.nodes))}
+    ready = list(graph.outputs_of(BEGIN))
+    for idx in ready:
+        inputs[idx].append(())
+
+    results = []
+    while ready:
+        idx = ready.pop(0)
+        node = graph.nodes[idx]
+        outputs, result = run_node(getattr(node, "__name__", repr(node)), node, inputs[idx], trace_memory)
+        results.append(result)
+
+        for child in graph.outputs_of(idx):
+            inputs[child].extend(_as_args(output) for output in outputs)
+            parents[child] -= 1
+            if parents[child] == 0:
+                ready.append(child)
+
+    start = time.perf_counter()
+    pipeline.close_services()
+    results.append({"node": "close_services", "calls": 1, "rows_in": 0, "rows_out": 0,
+        "wall_time_s": time.perf_counter() - start, "rows_per_s": None, "peak_memory_mb": None})
+
+    return results
+
+def bench_ohlc(dbpath, options):
+    "Method benchmarks the OHLCPipeline for an initial and an incremental run."
+    results = {}
+    fake_download = make_fake_yf_download(n_days=options.days)
+
+    with mock.patch.object(OHLC.yf, "download", fake_download):
+        for run_name, full_refresh in (("ohlc (initial)", True), ("ohlc (incremental)", False)):
+            pipeline = OHLC.OHLCPipeline(dbpath, full_refresh=full_refresh, storage_layout=options.ohlc_layout)
+            pipeline.ticker_lst = ticker_symbols(options.tickers)
+            results[run_name] = run_pipeline(pipeline, options.trace_memory)
+
+    return results
+
+def bench_compositions(dbpath, options):
+    "Method benchmarks the six Wikipedia composition pipelines."
+    results = {}
+    pages = {f"/wiki/{tbl_name}": page for tbl_name, page in composition_pages(options.components).items()}
+
+    with StubServer(pages, latency=options.latency) as server:
+        for pipeline_cls, url_param, tbl_name in COMPOSITION_PIPELINES:
+
+            # The composition pipelines execute from their constructor:
+            with mock.patch.object(Pipeline, "execute_pipeline", lambda self: None):
+                pipeline = pipeline_cls(dbpath)
+
+            setattr(pipeline, url_param, server.url(f"/wiki/{tbl_name}"))
+            results[pipeline_cls.__name__] = run_pipeline(pipeline, options.trace_memory)
+
+    return results
+
+def bench_composition_suite(dbpath, options):
+    "Method benchmarks the CompositionSuitePipeline refreshing the six composition tables in one graph."
+    pages = {f"/wiki/{tbl_name}": page for tbl_name, page in composition_pages(options.components).items()}
+
+    with StubServer(pages, latency=options.latency) as server:
+        pipeline = market_indicies.CompositionSuitePipeline(dbpath, execute=False)
+
+        for member, (_, url_param, tbl_name) in zip(pipeline.members, COMPOSITION_PIPELINES):
+            setattr(member, url_param, server.url(f"/wiki/{tbl_name}"))
+
+        results = run_pipeline(pipeline, options.trace_memory)
+
+    return {"CompositionSuitePipeline": results}
+
+def bench_edgar(dbpath, options):
+    "Method benchmarks the EDGARFilingsPipeline."
+    tickers = ticker_symbols(options.edgar_tickers)
+    ciks = [str(1000000 + i) for i in range(len(tickers))]
+
+    # Seeding the SPY_components table the pipeline reads CIKs from:
+    con = sqlite3.connect(dbpath)
+    con.execute("DROP TABLE IF EXISTS SPY_components")
+    con.execute('CREATE TABLE SPY_components ("Symbol" TEXT, "CIK" TEXT)')
+    con.executemany("INSERT INTO SPY_components VALUES (?, ?)", list(zip(tickers, ciks)))
+    con.commit()
+    con.close()
+
+    pages = {}
+    for cik in ciks:
+        pages.update(edgar_pages(cik, options.filings, options.document_size))
+
+    with StubServer(pages, latency=options.latency) as server:
+        pipeline = sec_filings.EDGARFilingsPipeline(dbpath, "10-K")
+        pipeline.ticker_lst = tickers
+        pipeline.base_sec_url = server.url()
+
+        # Requests to the stub server are paced at --sec-rate instead of SEC's limit:
+        with mock.patch.object(sec_filings, "SEC_RATE_LIMITER", TokenBucket(rate=options.sec_rate, capacity=1)):
+            results = run_pipeline(pipeline, options.trace_memory)
+
+    return {"EDGARFilingsPipeline": results}
+
+def bench_reddit(dbpath, options):
+    "Method benchmarks the RedditContentPipeline."
+    fake_reddit = lambda **kwargs: FakeReddit(n_posts=options.posts, author_latency=options.author_latency)
+    credentials = {"CLIENT_ID": "benchmark", "CLIENT_SECRET": "benchmark", "USER_AGENT": "benchmark"}
+
+    # The author cache is kept next to the benchmark database instead of in the user's cache:
+    author_cache_params = {"path": os.path.join(os.path.dirname(dbpath), "reddit_authors.sqlite")}
+
+    with mock.patch.dict(os.environ, credentials), mock.patch.object(reddit_posts.praw, "Reddit", fake_reddit), \
+        mock.patch.object(reddit_posts.RedditContentPipeline, "author_cache_params", author_cache_params):
+
+        with mock.patch.object(Pipeline, "execute_pipeline", lambda self: None):
+            pipeline = reddit_posts.RedditContentPipeline(dbpath, "benchmark")
+
+        results = run_pipeline(pipeline, options.trace_memory)
+
+    return {"RedditContentPipeline": results}
+
+BENCHMARKS = {
+    "ohlc": bench_ohlc,
+    "compositions": bench_compositions,
+    "composition_suite": bench_composition_suite,
+    "edgar": bench_edgar,
+    "reddit": bench_reddit,
+}
+
+def print_results(results):
+    "Method prints the measurements of every benchmarked pipeline as a table."
+    header = f"{'node':<32}{'calls':>7}{'rows in':>10}{'rows out':>10}{'wall (s)':>11}{'rows/s':>12}{'peak MB':>10}"
+    for pipeline_name, node_results in results.items():
+        print(f"\n{pipeline_name}\n{header}\n{'-' * len(header)}")
+        for result in node_results:
+            rows_per_s = "" if result["rows_per_s"] is None else f"{result['rows_per_s']:.1f}"
+            peak_memory = "" if result["peak_memory_mb"] is None else f"{result['peak_memory_mb']:.2f}"
+            print(f"{result['node']:<32}{result['calls']:>7}{result['rows_in']:>10}{result['rows_out']:>10}"
+                f"{result['wall_time_s']:>11.3f}{rows_per_s:>12}{peak_memory:>10}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline throughput benchmarks for the sqlite Pipeline APIs.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=sorted(BENCHMARKS),
+        help="The benchmarks that are run.")
+    parser.add_argument("--tickers", type=int, default=50, help="Number of tickers in the OHLC benchmark.")
+    parser.add_argument("--days", type=int, default=2500, help="Days of OHLC history per ticker.")
+    parser.add_argument("--ohlc-layout", choices=["per_ticker", "long"], default="per_ticker",
+        help="The storage layout written by the OHLC benchmark.")
+    parser.add_argument("--components", type=int, default=500, help="Rows in each composition table.")
+    parser.add_argument("--edgar-tickers", type=int, default=2, help="Number of tickers in the EDGAR benchmark.")
+    parser.add_argument("--filings", type=int, default=20, help="Number of filings per EDGAR ticker.")
+    parser.add_argument("--document-size", type=int, default=200000, help="Size in bytes of each filing document.")
+    parser.add_argument("--sec-rate", type=float, default=10.0, help="Requests per second allowed to the stub EDGAR.")
+    parser.add_argument("--posts", type=int, default=100, help="Number of posts in each subreddit listing.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each stub server response.")
+    parser.add_argument("--author-latency", type=float, default=0.0, help="Seconds taken by each Redditor fetch.")
+    parser.add_argument("--http-cache", action="store_true",
+        help="Run each pipeline cold and warm against a temporary on-disk HTTP cache.")
+    parser.add_argument("--no-memory", dest="trace_memory", action="store_false",
+        help="Disable tracemalloc peak memory measurement (it slows nodes down).")
+    parser.add_argument("--json", dest="json_path", help="Path the results are written to as JSON.")
+    options = parser.parse_args(argv)
+
+    if options.trace_memory:
+        tracemalloc.start()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for benchmark_name in options.only:
+            dbpath = os.path.join(tmp_dir, f"{benchmark_name}.sqlite")
+
+            if not options.http_cache:
+                with mock.patch.object(Pipeline, "http_cache_params", None):
+                    results.update(BENCHMARKS[benchmark_name](dbpath, options))
+                continue
+
+            cache_params = {"cache_dir": os.path.join(tmp_dir, f"{benchmark_name}_http_cache")}
+            with mock.patch.object(Pipeline, "http_cache_params", cache_params):
+                for run_name in ("cold cache", "warm cache"):
+                    run_results = BENCHMARKS[benchmark_name](dbpath, options)
+                    results.update({f"{name} ({run_name})": value for name, value in run_results.items()})
+
+    print_results(results)
+
+    if options.json_path is not None:
+        with open(options.json_path, "wt") as json_file:
+            json.dump({"params": vars(options), "results": results}, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Importing the testing and data management packages:
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("backtrader")
+
+# Importing the Parquet sink and the StockData API being tested:
+from ETL_pipelines.parquet_sink import ParquetOHLCSink
+from Database_API.stock_api import StockData
+
+@pytest.fixture
+def stock_data(tmp_path):
+    "Fixture writing two tickers spanning three years to a Parquet dataset."
+    dates = pd.date_range("2020-12-01", "2022-01-31", freq="D", name="Date")
+    sink = ParquetOHLCSink(str(tmp_path / "parquet"))
+    for ticker in ("AAA", "BBB"):
+        sink.write(ticker, pd.DataFrame(
+            np.arange(len(dates) * 6, dtype="float64").reshape(len(dates), 6),
+            index=dates,
+            columns=["Open", "High", "Low", "Close", "Adj Close", "Volume"]))
+
+    return StockData(str(tmp_path / "test.sqlite"), parquet_dir=str(tmp_path / "parquet"))
+
+def test_get_ohlc_parquet_date_filter(stock_data):
+    ohlc_df = stock_data.get_ohlc_parquet("AAA", start="2021-01-20", end="2021-02-10", columns=["Close"])
+
+    assert list(ohlc_df.columns) == ["Close"]
+    assert ohlc_df.index[0] == pd.Timestamp("2021-01-20")
+    assert ohlc_df.index[-1] == pd.Timestamp("2021-02-10")
+    assert len(ohlc_df) == 22
+
+def test_get_ohlc_parquet_date_filter_many_tickers(stock_data):
+    ohlc_df = stock_data.get_ohlc_parquet(["AAA", "BBB"], start="2021-12-30")
+
+    assert set(ohlc_df.index.get_level_values("ticker")) == {"AAA", "BBB"}
+    assert ohlc_df.index.get_level_values("Date").min() == pd.Timestamp("2021-12-30")
+    assert len(ohlc_df) == 2 * 33
@@ -0,0 +1,56 @@
+# Importing the testing and data management packages:
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("orjson")
+
+# Importing the Web API sink module being tested:
+from ETL_pipelines import web_api_sink
+
+@pytest.fixture
+def records_df():
+    "Fixture building a dataframe with floats, missing values and timestamps."
+    return pd.DataFrame({
+        "id": ["a", "b", "c"],
+        "score": [1, 2, 3],
+        "ratio": [1 / 3, np.nan, 123456.789012345678],
+        "price": [0.1 + 0.2, 1e-12, 2.5e15],
+        "created_on": pd.to_datetime(["2021-01-20 09:30:00", None, "2021-03-01 16:00:00"]),
+        "created_on_est": pd.to_datetime(["2021-01-20 09:30:00", "2021-02-01 10:00:00", None]).tz_localize("US/Eastern"),
+        "stickied": [True, False, None],
+    })
+
+def _records(df, monkeypatch, use_orjson):
+    "Method serializes a dataframe with one of the two encoders and parses the records back."
+    if not use_orjson:
+        monkeypatch.setattr(web_api_sink, "orjson", None)
+
+    return json.loads(web_api_sink.dataframe_to_json_bytes(df))
+
+def test_encoders_produce_the_same_records(records_df, monkeypatch):
+    orjson_records = _records(records_df, monkeypatch, use_orjson=True)
+    pandas_records = _records(records_df, monkeypatch, use_orjson=False)
+
+    assert len(orjson_records) == len(pandas_records) == len(records_df)
+    for orjson_record, pandas_record in zip(orjson_records, pandas_records):
+        assert orjson_record.keys() == pandas_record.keys()
+
+        for col, value in orjson_record.items():
+            # The pandas encoder writes at most 15 significant digits:
+            if isinstance(value, float):
+                assert pandas_record[col] == pytest.approx(value, rel=1e-14)
+            else:
+                assert pandas_record[col] == value
+
+def test_missing_values_and_timestamps(records_df, monkeypatch):
+    for use_orjson in (True, False):
+        records = _records(records_df, monkeypatch, use_orjson)
+
+        assert records[1]["ratio"] is None
+        assert records[1]["created_on"] is None
+        assert records[2]["created_on_est"] is None
+        assert records[0]["created_on"] == "2021-01-20T09:30:00"
+        assert records[0]["created_on_est"] == "2021-01-20T09:30:00-05:00"
+        assert records[0]["ratio"] == pytest.approx(1 / 3, rel=1e-14)